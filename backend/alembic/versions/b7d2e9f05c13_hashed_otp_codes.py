@@ -0,0 +1,37 @@
+"""hashed_otp_codes
+
+Revision ID: b7d2e9f05c13
+Revises: a3c8e1f47b29
+Create Date: 2026-10-19 09:12:47.301562
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2e9f05c13'
+down_revision = 'a3c8e1f47b29'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Pending plaintext codes cannot be hashed without the app secret; they expire
+    # within minutes anyway, so users just request a new one
+    op.execute("DELETE FROM otp_verifications WHERE verified = FALSE")
+    with op.batch_alter_table('otp_verifications') as batch_op:
+        batch_op.add_column(sa.Column('otp_hash', sa.String(length=128), nullable=False, server_default=''))
+        batch_op.drop_column('otp_code')
+    op.create_index(
+        'ix_otp_verifications_lookup', 'otp_verifications',
+        ['user_id', 'company_id', 'company_email', 'verified'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_otp_verifications_lookup', table_name='otp_verifications')
+    op.execute("DELETE FROM otp_verifications WHERE verified = FALSE")
+    with op.batch_alter_table('otp_verifications') as batch_op:
+        batch_op.add_column(sa.Column('otp_code', sa.String(length=6), nullable=False, server_default=''))
+        batch_op.drop_column('otp_hash')
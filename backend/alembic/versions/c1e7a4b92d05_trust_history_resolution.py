@@ -0,0 +1,38 @@
+"""trust_history_resolution
+
+Revision ID: c1e7a4b92d05
+Revises: 2bca3f34cbd6
+Create Date: 2026-10-18 10:12:41.204318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c1e7a4b92d05'
+down_revision = '2bca3f34cbd6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # trust_score_history is created from the models on fresh installs; only patch existing tables
+    if not sa.inspect(op.get_bind()).has_table('trust_score_history'):
+        return
+
+    # Add resolution column used by the retention/downsampling job
+    op.add_column('trust_score_history', sa.Column('resolution', sa.String(length=10), nullable=False, server_default='raw'))
+    op.create_index(op.f('ix_trust_score_history_resolution'), 'trust_score_history', ['resolution'], unique=False)
+
+    # Composite index for per-user history range queries
+    op.create_index('ix_trust_score_history_user_id_created_at', 'trust_score_history', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table('trust_score_history'):
+        return
+
+    op.drop_index('ix_trust_score_history_user_id_created_at', table_name='trust_score_history')
+    op.drop_index(op.f('ix_trust_score_history_resolution'), table_name='trust_score_history')
+    op.drop_column('trust_score_history', 'resolution')
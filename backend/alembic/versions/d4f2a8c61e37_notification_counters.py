@@ -0,0 +1,45 @@
+"""notification_counters
+
+Revision ID: d4f2a8c61e37
+Revises: c1e7a4b92d05
+Create Date: 2026-10-18 14:03:27.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4f2a8c61e37'
+down_revision = 'c1e7a4b92d05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'notification_counters',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('total_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('unread_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # Backfill from existing notifications
+    if sa.inspect(op.get_bind()).has_table('notifications'):
+        op.execute(
+            """
+            INSERT INTO notification_counters (user_id, total_count, unread_count, updated_at)
+            SELECT recipient_id,
+                   COUNT(*),
+                   SUM(CASE WHEN is_read = false AND is_archived = false THEN 1 ELSE 0 END),
+                   CURRENT_TIMESTAMP
+            FROM notifications
+            GROUP BY recipient_id
+            """
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('notification_counters')
@@ -0,0 +1,28 @@
+"""email_outbox_template
+
+Revision ID: d5a1c7e3b924
+Revises: c9e4f1a27d68
+Create Date: 2026-10-19 15:12:48.204913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a1c7e3b924'
+down_revision = 'c9e4f1a27d68'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Template and JSON context of templated bulk emails, so SendGrid can send one
+    # shared body with per-recipient substitutions
+    op.add_column('email_outbox', sa.Column('template', sa.String(length=100), nullable=True))
+    op.add_column('email_outbox', sa.Column('template_context', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('email_outbox', 'template_context')
+    op.drop_column('email_outbox', 'template')
@@ -0,0 +1,34 @@
+"""notification_group_key
+
+Revision ID: e7b3c5d90a14
+Revises: d4f2a8c61e37
+Create Date: 2026-10-18 16:41:09.730125
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b3c5d90a14'
+down_revision = 'd4f2a8c61e37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # notifications is created from the models on fresh installs; only patch existing tables
+    if not sa.inspect(op.get_bind()).has_table('notifications'):
+        return
+
+    # Digest key used to coalesce similar notifications
+    op.add_column('notifications', sa.Column('group_key', sa.String(length=200), nullable=True))
+    op.create_index('ix_notifications_recipient_id_group_key', 'notifications', ['recipient_id', 'group_key'], unique=False)
+
+
+def downgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table('notifications'):
+        return
+
+    op.drop_index('ix_notifications_recipient_id_group_key', table_name='notifications')
+    op.drop_column('notifications', 'group_key')
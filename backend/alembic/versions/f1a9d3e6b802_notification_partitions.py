@@ -0,0 +1,136 @@
+"""notification_partitions
+
+Revision ID: f1a9d3e6b802
+Revises: e7b3c5d90a14
+Create Date: 2026-10-18 19:22:54.106337
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1a9d3e6b802'
+down_revision = 'e7b3c5d90a14'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+NOTIFICATION_INDEXES = [
+    ('ix_notifications_recipient_id', ['recipient_id']),
+    ('ix_notifications_sender_id', ['sender_id']),
+    ('ix_notifications_notification_type', ['notification_type']),
+    ('ix_notifications_is_read', ['is_read']),
+    ('ix_notifications_is_archived', ['is_archived']),
+    ('ix_notifications_recipient_id_group_key', ['recipient_id', 'group_key']),
+    ('ix_notifications_recipient_id_is_archived_created_at', ['recipient_id', 'is_archived', 'created_at']),
+]
+
+
+def _month(ts, offset=0):
+    month = ts.year * 12 + ts.month - 1 + offset
+    return datetime(month // 12, month % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # notifications is created from the models on fresh installs; only patch existing tables.
+    # There it starts unpartitioned; `python archive_notifications.py --partition` converts it.
+    if not sa.inspect(bind).has_table('notifications'):
+        return
+
+    op.create_table(
+        'notifications_archive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('recipient_id', sa.Integer(), nullable=False),
+        sa.Column('sender_id', sa.Integer(), nullable=True),
+        sa.Column('title', sa.String(length=200), nullable=False),
+        sa.Column('message', sa.String(length=1000), nullable=False),
+        sa.Column('notification_type', sa.String(length=50), nullable=False),
+        sa.Column('priority', sa.String(length=20), nullable=False),
+        sa.Column('channels', sa.String(length=100), nullable=False),
+        sa.Column('notification_metadata', sa.JSON(), nullable=True),
+        sa.Column('is_read', sa.Boolean(), nullable=False),
+        sa.Column('is_archived', sa.Boolean(), nullable=False),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.Column('read_at', sa.DateTime(), nullable=True),
+        sa.Column('group_key', sa.String(length=200), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_notifications_archive_recipient_id', 'notifications_archive', ['recipient_id'], unique=False)
+    op.create_index('ix_notifications_archive_archived_at', 'notifications_archive', ['archived_at'], unique=False)
+
+    # total_count now excludes archived notifications
+    op.execute(
+        """
+        UPDATE notification_counters
+        SET total_count = (
+            SELECT COUNT(*) FROM notifications n
+            WHERE n.recipient_id = notification_counters.user_id AND n.is_archived = false
+        )
+        """
+    )
+
+    if bind.dialect.name != 'postgresql':
+        op.create_index(
+            'ix_notifications_recipient_id_is_archived_created_at', 'notifications',
+            ['recipient_id', 'is_archived', 'created_at'], unique=False
+        )
+        return
+
+    # Rebuild notifications as a table range-partitioned by month on created_at.
+    # The primary key must include the partition key.
+    op.execute("CREATE TABLE notifications_partitioned (LIKE notifications INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)")
+    op.execute("ALTER TABLE notifications_partitioned ADD PRIMARY KEY (id, created_at)")
+
+    oldest = bind.execute(sa.text("SELECT MIN(created_at) FROM notifications")).scalar() or datetime.utcnow()
+    start, end = _month(oldest), _month(datetime.utcnow(), MONTHS_AHEAD + 1)
+    while start < end:
+        op.execute(
+            f"CREATE TABLE notifications_p{start:%Y%m} PARTITION OF notifications_partitioned "
+            f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{_month(start, 1):%Y-%m-%d}')"
+        )
+        start = _month(start, 1)
+    op.execute("CREATE TABLE notifications_default PARTITION OF notifications_partitioned DEFAULT")
+
+    op.execute("INSERT INTO notifications_partitioned SELECT * FROM notifications")
+    # Keep the id sequence alive when the old table is dropped
+    op.execute(
+        "DO $$ BEGIN EXECUTE format('ALTER SEQUENCE %s OWNED BY notifications_partitioned.id', "
+        "pg_get_serial_sequence('notifications', 'id')); END $$"
+    )
+    op.execute("DROP TABLE notifications")
+    op.execute("ALTER TABLE notifications_partitioned RENAME TO notifications")
+    for name, columns in NOTIFICATION_INDEXES:
+        op.create_index(name, 'notifications', columns, unique=False)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table('notifications'):
+        return
+
+    if bind.dialect.name == 'postgresql':
+        op.execute("CREATE TABLE notifications_plain (LIKE notifications INCLUDING DEFAULTS)")
+        op.execute("INSERT INTO notifications_plain SELECT * FROM notifications")
+        op.execute(
+            "DO $$ BEGIN EXECUTE format('ALTER SEQUENCE %s OWNED BY notifications_plain.id', "
+            "pg_get_serial_sequence('notifications', 'id')); END $$"
+        )
+        op.execute("DROP TABLE notifications CASCADE")
+        op.execute("ALTER TABLE notifications_plain RENAME TO notifications")
+        op.execute("ALTER TABLE notifications ADD PRIMARY KEY (id)")
+        for name, columns in NOTIFICATION_INDEXES[:-1]:
+            op.create_index(name, 'notifications', columns, unique=False)
+    else:
+        op.drop_index('ix_notifications_recipient_id_is_archived_created_at', table_name='notifications')
+
+    op.drop_index('ix_notifications_archive_archived_at', table_name='notifications_archive')
+    op.drop_index('ix_notifications_archive_recipient_id', table_name='notifications_archive')
+    op.drop_table('notifications_archive')
@@ -2,9 +2,9 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db_session
-from app.dependencies.auth import get_current_user, require_role
-from app.models.user import User, UserRole
+from app.db.session import get_async_db_session
+from app.dependencies.auth import CurrentUser, get_current_user, require_role
+from app.models.user import UserRole
 from app.schemas.analytics import (
     AnalyticsRequest, DashboardData, Leaderboard, TrendData
 )
@@ -18,8 +18,8 @@ async def get_dashboard_data(
     time_range: str = Query("last_30_days", description="Time range for analytics"),
     company_id: Optional[int] = Query(None, description="Filter by company ID"),
     user_id: Optional[int] = Query(None, description="Filter by user ID"),
-    current_user: User = Depends(require_role([UserRole.admin])),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(require_role([UserRole.admin])),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get comprehensive dashboard analytics (admin only)."""
     request = AnalyticsRequest(
@@ -36,8 +36,8 @@ async def get_dashboard_data(
 async def get_referral_analytics(
     time_range: str = Query("last_30_days", description="Time range for analytics"),
     company_id: Optional[int] = Query(None, description="Filter by company ID"),
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get referral analytics."""
     request = AnalyticsRequest(
@@ -54,8 +54,8 @@ async def get_referral_analytics(
 async def get_job_analytics(
     time_range: str = Query("last_30_days", description="Time range for analytics"),
     company_id: Optional[int] = Query(None, description="Filter by company ID"),
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get job analytics."""
     request = AnalyticsRequest(
@@ -71,8 +71,8 @@ async def get_job_analytics(
 @router.get("/users")
 async def get_user_analytics(
     time_range: str = Query("last_30_days", description="Time range for analytics"),
-    current_user: User = Depends(require_role([UserRole.admin])),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(require_role([UserRole.admin])),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get user analytics (admin only)."""
     request = AnalyticsRequest(time_range=time_range)
@@ -85,8 +85,8 @@ async def get_user_analytics(
 @router.get("/companies")
 async def get_company_analytics(
     time_range: str = Query("last_30_days", description="Time range for analytics"),
-    current_user: User = Depends(require_role([UserRole.admin])),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(require_role([UserRole.admin])),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get company analytics (admin only)."""
     request = AnalyticsRequest(time_range=time_range)
@@ -100,8 +100,8 @@ async def get_company_analytics(
 async def get_leaderboard(
     leaderboard_type: str,
     limit: int = Query(10, ge=1, le=100, description="Number of entries to return"),
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get leaderboard data."""
     analytics_service = AnalyticsService(db)
@@ -112,8 +112,8 @@ async def get_leaderboard(
 async def get_trend_data(
     metric: str,
     time_range: str = Query("last_30_days", description="Time range for trend analysis"),
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get trend data for a specific metric."""
     # This would implement trend analysis for various metrics
@@ -133,8 +133,8 @@ async def get_trend_data(
 @router.get("/my/stats")
 async def get_my_analytics(
     time_range: str = Query("last_30_days", description="Time range for analytics"),
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get analytics for current user."""
     request = AnalyticsRequest(
@@ -1,35 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlmodel import Session, select
 
 from app.db.session import get_db_session
-from app.schemas.auth import UserRegister, UserLogin, TokenResponse, TokenRefresh, UserResponse
+from app.schemas.auth import UserRegister, UserLogin, TokenResponse, TokenRefresh, UserResponse, LogoutRequest
 from app.services.auth_service import AuthService
 from app.security.jwt import create_access_token, create_refresh_token, decode_token
-from app.dependencies.auth import get_current_user
+from app.dependencies.auth import CurrentUser, bearer_token, get_current_user, get_current_user_row
 from app.models.user import User
+from app.core.config import settings
+from app.core.rate_limit import SLIDING_WINDOW, TOKEN_BUCKET
+from app.dependencies.rate_limit import BY_EMAIL_AND_IP, BY_IP, limit, rate_limit
+from app.security.principal import invalidate_user
+from app.security.revocation import token_revocations
 
 router = APIRouter()
 
+login_rate_limit = rate_limit(
+    "login",
+    limit(BY_EMAIL_AND_IP, SLIDING_WINDOW, settings.RATE_LIMIT_LOGIN_PER_EMAIL_IP),
+    limit(BY_IP, TOKEN_BUCKET, settings.RATE_LIMIT_LOGIN_PER_IP),
+)
+
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(
+async def register(
     user_data: UserRegister,
     db: Session = Depends(get_db_session)
 ):
     """Register a new user (employee or job seeker)."""
     auth_service = AuthService(db)
-    user = auth_service.register_user(user_data)
+    user = await auth_service.register_user(user_data)
     return UserResponse.model_validate(user)
 
 
-@router.post("/login", response_model=TokenResponse)
-def login(
+@router.post("/login", response_model=TokenResponse, dependencies=[Depends(login_rate_limit)])
+async def login(
     login_data: UserLogin,
     db: Session = Depends(get_db_session)
 ):
     """Login user and return JWT tokens."""
     auth_service = AuthService(db)
-    user = auth_service.authenticate_user(login_data)
+    user = await auth_service.authenticate_user(login_data)
     
     if not user:
         raise HTTPException(
@@ -63,11 +76,15 @@ def refresh_token(
                 detail="Invalid refresh token"
             )
         
+        if token_revocations.is_revoked(int(user_id), payload.get("jti"), payload.get("iat", 0)):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Refresh token has been revoked"
+            )
+        
         # Verify user still exists and is active
-        from sqlalchemy import text
         result = db.exec(
-            text("SELECT id FROM users WHERE id = :user_id AND is_active = true"),
-            {"user_id": int(user_id)}
+            select(User.id).where(User.id == int(user_id), User.is_active == True)
         )
         if not result.first():
             raise HTTPException(
@@ -90,9 +107,38 @@ def refresh_token(
         )
 
 
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(
+    request: Request,
+    data: Optional[LogoutRequest] = None,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db_session)
+):
+    """Revoke the access token of this request and, if given, its refresh token."""
+    token_revocations.revoke(db, current_user.id, decode_token(bearer_token(request)))
+    if data and data.refresh_token:
+        try:
+            claims = decode_token(data.refresh_token)
+        except Exception:
+            # Expired or invalid: unusable anyway
+            claims = None
+        if claims and claims.get("type") == "refresh" and claims.get("sub") == str(current_user.id):
+            token_revocations.revoke(db, current_user.id, claims)
+
+
+@router.post("/logout-all", status_code=status.HTTP_204_NO_CONTENT)
+def logout_all(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db_session)
+):
+    """Revoke every access and refresh token issued to the current user."""
+    token_revocations.revoke_all(db, current_user.id)
+    invalidate_user(current_user.id)
+
+
 @router.get("/me-simple")
 def get_current_user_info_simple(
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Get current user information - simplified version."""
     try:
@@ -118,7 +164,7 @@ def test_no_auth():
 
 @router.get("/me", response_model=UserResponse)
 def get_current_user_info(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_row)
 ):
     """Get current user information."""
     try:
@@ -2,9 +2,9 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db_session
-from app.dependencies.auth import get_current_user
-from app.models.user import User, UserRole
+from app.db.session import get_async_db_session
+from app.dependencies.auth import CurrentUser, get_current_user
+from app.models.user import UserRole
 from app.services.dashboard_service import DashboardService
 from app.schemas.dashboard import (
     JobRecommendationResponse, ActivityFeedResponse, SavedSearchCreate,
@@ -16,8 +16,8 @@ router = APIRouter()
 
 @router.get("/overview", response_model=dict)
 async def get_dashboard_overview(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get complete dashboard overview based on user role"""
     dashboard_service = DashboardService(db)
@@ -50,8 +50,8 @@ async def get_dashboard_overview(
 @router.get("/recommendations", response_model=List[JobRecommendationResponse])
 async def get_job_recommendations(
     limit: int = Query(10, ge=1, le=50),
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get personalized job recommendations"""
     if current_user.role != UserRole.jobseeker:
@@ -63,8 +63,8 @@ async def get_job_recommendations(
 @router.get("/activity", response_model=List[ActivityFeedResponse])
 async def get_activity_feed(
     limit: int = Query(20, ge=1, le=100),
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get user's activity feed"""
     dashboard_service = DashboardService(db)
@@ -77,8 +77,8 @@ async def create_activity(
     description: str,
     status: str = "new",
     action_url: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Create a new activity in the feed"""
     dashboard_service = DashboardService(db)
@@ -97,8 +97,8 @@ async def create_activity(
 
 @router.get("/saved-searches", response_model=List[SavedSearchResponse])
 async def get_saved_searches(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get user's saved searches"""
     dashboard_service = DashboardService(db)
@@ -107,8 +107,8 @@ async def get_saved_searches(
 @router.post("/saved-searches", response_model=SavedSearchResponse)
 async def create_saved_search(
     search_data: SavedSearchCreate,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Create a new saved search"""
     dashboard_service = DashboardService(db)
@@ -124,8 +124,8 @@ async def create_saved_search(
 
 @router.get("/profile-completion", response_model=ProfileCompletionResponse)
 async def get_profile_completion(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get user's profile completion status"""
     dashboard_service = DashboardService(db)
@@ -133,8 +133,8 @@ async def get_profile_completion(
 
 @router.get("/stats", response_model=DashboardStatsResponse)
 async def get_dashboard_stats(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get dashboard statistics"""
     dashboard_service = DashboardService(db)
@@ -142,8 +142,8 @@ async def get_dashboard_stats(
 
 @router.get("/jobseeker", response_model=JobSeekerDashboardData)
 async def get_jobseeker_dashboard(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get job seeker dashboard data"""
     if current_user.role != UserRole.jobseeker:
@@ -154,8 +154,8 @@ async def get_jobseeker_dashboard(
 
 @router.get("/employee", response_model=EmployeeDashboardData)
 async def get_employee_dashboard(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get employee dashboard data"""
     if current_user.role != UserRole.employee:
@@ -166,8 +166,8 @@ async def get_employee_dashboard(
 
 @router.get("/admin", response_model=AdminDashboardData)
 async def get_admin_dashboard(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get admin dashboard data"""
     if current_user.role != UserRole.admin:
@@ -179,8 +179,8 @@ async def get_admin_dashboard(
 @router.post("/mark-activity-read/{activity_id}")
 async def mark_activity_read(
     activity_id: int,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Mark an activity as read"""
     # This would update the activity in the database
@@ -189,8 +189,8 @@ async def mark_activity_read(
 
 @router.post("/mark-all-activities-read")
 async def mark_all_activities_read(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Mark all activities as read"""
     # This would update all activities for the user
@@ -3,8 +3,7 @@ from sqlmodel import Session
 from typing import Optional, List
 
 from app.db.session import get_db_session
-from app.dependencies.auth import get_current_user
-from app.models.user import User
+from app.dependencies.auth import CurrentUser, get_current_user
 from app.schemas.profile import (
     EmployeeProfileResponse, EmployeeProfileUpdateRequest, ProfilePictureUploadResponse,
     EmailVerificationRequest, EmailVerificationResponse
@@ -16,7 +15,7 @@ router = APIRouter()
 
 @router.get("/me", response_model=EmployeeProfileResponse)
 def get_employee_profile(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Get comprehensive employee profile information"""
@@ -33,7 +32,7 @@ def get_employee_profile(
 @router.put("/me", response_model=EmployeeProfileResponse)
 def update_employee_profile(
     profile_data: EmployeeProfileUpdateRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Update comprehensive employee profile"""
@@ -50,7 +49,7 @@ def update_employee_profile(
 @router.post("/me/profile-picture", response_model=ProfilePictureUploadResponse)
 def upload_profile_picture(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Upload profile picture for employee"""
@@ -91,7 +90,7 @@ def upload_profile_picture(
 @router.post("/me/verify-email", response_model=EmailVerificationResponse)
 def initiate_email_verification(
     verification_request: EmailVerificationRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Initiate email verification process for company email change"""
@@ -120,7 +119,7 @@ def initiate_email_verification(
 
 @router.get("/me/metrics")
 def get_profile_metrics(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Get employee profile metrics and statistics"""
@@ -143,7 +142,7 @@ def get_profile_metrics(
 
 @router.get("/me/completion")
 def get_profile_completion(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Get detailed profile completion information"""
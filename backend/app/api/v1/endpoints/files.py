@@ -4,7 +4,7 @@ from sqlmodel import Session
 from typing import Optional, List
 import os
 
-from app.dependencies.auth import get_current_user
+from app.dependencies.auth import CurrentUser, get_current_user, get_current_user_row
 from app.db.session import get_db_session
 from app.models.user import User
 from app.services.s3_service import S3FileService
@@ -18,7 +18,7 @@ router = APIRouter()
 async def upload_file(
     file: UploadFile = File(...),
     file_type: str = Form(default="resume"),
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_row),
     db: Session = Depends(get_db_session)
 ):
     """Upload file to S3"""
@@ -71,7 +71,7 @@ async def upload_file(
 @router.get("/info/{file_key}")
 async def get_file_info(
     file_key: str,
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Get file information"""
     try:
@@ -85,7 +85,7 @@ async def get_file_info(
 @router.delete("/delete/{file_key}")
 async def delete_file(
     file_key: str,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_row),
     db: Session = Depends(get_db_session)
 ):
     """Delete file from S3"""
@@ -117,7 +117,7 @@ async def delete_file(
 @router.get("/download/{file_key:path}")
 async def get_download_url(
     file_key: str,
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Get presigned download URL"""
     try:
@@ -136,7 +136,7 @@ async def get_download_url(
 @router.get("/download")
 async def download_file(
     file_path: str = Query(..., description="File path to download"),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Download file by path (for local files)"""
     try:
@@ -181,7 +181,7 @@ async def download_file(
 async def list_user_files(
     user_id: str,
     file_type: Optional[str] = None,
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """List user's files"""
     try:
@@ -1,7 +1,14 @@
 from fastapi import APIRouter, Depends
 from sqlmodel import Session, text
 from app.db.session import get_db_session
+from app.db.replicas import replica_router
 from app.core.config import get_settings
+from app.core.realtime import connections
+from app.services.email_outbox_service import EmailOutboxService, email_dispatcher
+from app.services.email_service import email_service
+from app.security.passwords import password_hasher
+from app.security.principal import user_principals
+from app.security.revocation import token_revocations
 
 router = APIRouter()
 
@@ -32,3 +39,31 @@ async def detailed_health_check(session: Session = Depends(get_db_session)):
         "environment": settings.ENV,
         "version": "1.0.0"
     }
+
+@router.get("/health/realtime")
+async def realtime_health_check():
+    """Real-time connection metrics for this worker"""
+    return connections.stats()
+
+@router.get("/health/email")
+def email_health_check(session: Session = Depends(get_db_session)):
+    """Email outbox backlog and this worker's dispatcher counters"""
+    return {
+        "outbox": EmailOutboxService(session).stats(),
+        "dispatcher": email_dispatcher.stats(),
+        "providers": email_service.router.stats(),
+    }
+
+@router.get("/health/auth")
+async def auth_health_check():
+    """This worker's password hashing pool, authenticated-user cache and revocation filter"""
+    return {
+        "password_hasher": password_hasher.stats(),
+        "cached_users": len(user_principals),
+        "token_revocations": token_revocations.stats(),
+    }
+
+@router.get("/health/database")
+async def database_health_check():
+    """Read replica health and how this worker's read-only calls were routed"""
+    return replica_router.stats()
@@ -3,18 +3,17 @@ from sqlmodel import Session
 from typing import Optional
 
 from ....db.session import get_db_session
-from ....models.user import User
 from ....schemas.auth import UserResponse
 from ....schemas.job_post import JobPostCreate, JobPostUpdate, JobPostResponse, JobPostListResponse
 from ....services.job_post_service import JobPostService
-from ....dependencies.auth import get_current_user
+from ....dependencies.auth import CurrentUser, get_current_user
 
 router = APIRouter()
 
 @router.post("/", response_model=JobPostResponse, status_code=201)
 def create_job_post(
     job_data: JobPostCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Create a new job posting"""
@@ -47,7 +46,7 @@ def get_job_posts(
 def get_my_job_posts(
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(10, ge=1, le=100, description="Items per page"),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Get job posts created by the current user"""
@@ -78,7 +77,7 @@ def get_job_post(
 def update_job_post(
     job_id: int,
     job_data: JobPostUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Update a job posting"""
@@ -96,7 +95,7 @@ def update_job_post(
 @router.delete("/{job_id}", status_code=204)
 def delete_job_post(
     job_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Delete a job posting (soft delete)"""
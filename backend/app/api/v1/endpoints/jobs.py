@@ -1,14 +1,19 @@
+import asyncio
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
+from sqlmodel import Session
 
-from app.db.session import get_db_session
-from app.dependencies.auth import get_current_user, require_role
-from app.models.user import User, UserRole, Employee
+from app.db.session import engine, get_async_db_session
+from app.dependencies.auth import CurrentUser, get_current_user, require_role
+from app.models.user import UserRole, Employee
 from app.schemas.job import (
     JobCreate, JobUpdate, JobResponse, JobDetailResponse, JobSearchParams, JobListResponse
 )
+from app.schemas.notification import (
+    NotificationCreate, NotificationType, NotificationPriority, NotificationChannel
+)
 from pydantic import BaseModel
 from typing import Optional
 
@@ -21,8 +26,8 @@ router = APIRouter()
 @router.post("/", response_model=JobResponse)
 async def create_job(
     job_data: JobCreate,
-    current_user: User = Depends(require_role([UserRole.employee])),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(require_role([UserRole.employee])),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Create a new job posting."""
     # Get employee profile
@@ -43,7 +48,6 @@ async def create_job(
 
     # Fire-and-forget: find top matches and create notifications (simplified)
     try:
-        notif_service = NotificationService(db)
         # Find recent jobseeker profiles to consider (simplified to last 100 users)
         seekers_res = await db.execute(
             text(
@@ -67,27 +71,31 @@ async def create_job(
                 scored.append((s.user_id, score))
         scored.sort(key=lambda x: x[1], reverse=True)
         top = scored[:10]
-        for user_id, score in top:
-            await notif_service.create_notification(
-                notification_data=
-                    # inline object to avoid importing schema; fields match create_notification usage
-                    type('Obj', (), {
-                        'recipient_id': user_id,
-                        'sender_id': current_user.id,
-                        'title': f"New Job Match: {job.title}",
-                        'message': f"We found a job that matches your skills! Match score: {round(score*100)}%",
-                        'notification_type': 'job_posted',
-                        'priority': 'high' if score > 0.8 else 'medium',
-                        'channels': ['in_app', 'email'],
-                        'metadata': { 'job_id': job.id, 'company_id': job.company_id, 'match_score': score }
-                    })
+        await asyncio.to_thread(_create_notifications, [
+            NotificationCreate(
+                recipient_id=user_id,
+                sender_id=current_user.id,
+                title=f"New Job Match: {job.title}",
+                message=f"We found a job that matches your skills! Match score: {round(score*100)}%",
+                notification_type=NotificationType.job_posted,
+                priority=NotificationPriority.high if score > 0.8 else NotificationPriority.medium,
+                channels=[NotificationChannel.in_app, NotificationChannel.email],
+                metadata={'job_id': job.id, 'company_id': job.company_id, 'match_score': score}
             )
+            for user_id, score in top
+        ])
     except Exception:
         # Non-blocking best-effort; do not fail job creation
         pass
     return job
 
 
+def _create_notifications(notifications: List[NotificationCreate]) -> None:
+    # NotificationService is sync; give it its own session off the event loop
+    with Session(engine) as session:
+        NotificationService(session).create_notifications_bulk(notifications)
+
+
 @router.get("/", response_model=JobListResponse)
 async def search_jobs(
     query: str = Query(None, description="Search term for title, description, or skills"),
@@ -99,8 +107,8 @@ async def search_jobs(
     is_active: bool = Query(True, description="Filter by active status"),
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(20, ge=1, le=100, description="Page size"),
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Search and filter jobs."""
     # Parse skills if provided
@@ -121,14 +129,10 @@ async def search_jobs(
     )
     
     job_service = JobService(db)
+    # The listing already holds every field of the detail response; loading each
+    # job again would cost a query (and a replica session) per row
     jobs, total = await job_service.search_jobs(search_params)
-    
-    # Convert to detail responses
-    job_details = []
-    for job in jobs:
-        job_detail = await job_service.get_job_with_details(job.id)
-        if job_detail:
-            job_details.append(job_detail)
+    job_details = list(jobs)
     
     pages = (total + size - 1) // size
     
@@ -144,8 +148,8 @@ async def search_jobs(
 @router.get("/{job_id}", response_model=JobDetailResponse)
 async def get_job(
     job_id: int,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get job details by ID."""
     job_service = JobService(db)
@@ -164,8 +168,8 @@ async def get_job(
 async def update_job(
     job_id: int,
     job_data: JobUpdate,
-    current_user: User = Depends(require_role([UserRole.employee])),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(require_role([UserRole.employee])),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Update job posting."""
     # Get employee profile
@@ -189,8 +193,8 @@ async def update_job(
 @router.delete("/{job_id}")
 async def delete_job(
     job_id: int,
-    current_user: User = Depends(require_role([UserRole.employee])),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(require_role([UserRole.employee])),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Delete job posting (soft delete)."""
     # Get employee profile
@@ -215,8 +219,8 @@ async def delete_job(
 async def get_my_jobs(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    current_user: User = Depends(require_role([UserRole.employee])),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(require_role([UserRole.employee])),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get jobs posted by current user."""
     # Get employee profile
@@ -242,8 +246,8 @@ async def get_company_jobs(
     company_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get jobs for a specific company."""
     job_service = JobService(db)
@@ -291,8 +295,8 @@ async def get_job_matches(
     min_score: float = Query(0.6, ge=0.0, le=1.0),
     page: int = Query(1, ge=1),
     size: int = Query(20, ge=1, le=100),
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Return ranked job matches for the current jobseeker."""
     # Basic guard: only jobseekers for now
@@ -333,10 +337,6 @@ async def get_job_matches(
 
     matches: List[JobMatchItem] = []
     for job in jobs:
-        # Convert job to detail response shape
-        detail = await job_service.get_job_with_details(job.id)
-        if not detail:
-            continue
         # Scoring
         reasons: List[str] = []
         skill_score, matching_skills = _calc_skill_match(seeker_skills, job.skills)
@@ -346,15 +346,15 @@ async def get_job_matches(
         if exp_score > 0.7:
             reasons.append("Experience matches requirement")
         # Job type preference (simple contains)
-        jt_score = 1.0 if (detail.employment_type and str(detail.employment_type) in seeker_pref_types) else (0.5 if seeker_pref_types == [] else 0.2)
+        jt_score = 1.0 if (job.employment_type and str(job.employment_type) in seeker_pref_types) else (0.5 if seeker_pref_types == [] else 0.2)
         if jt_score > 0.7:
             reasons.append("Job type matches preference")
         # Location (simplified)
         loc_score = 0.2
-        if not detail.location:
+        if not job.location:
             loc_score = 0.5
         else:
-            dl = detail.location.lower()
+            dl = job.location.lower()
             sl = (seeker_location or "").lower()
             if sl and (sl in dl or dl in sl):
                 loc_score = 1.0
@@ -371,7 +371,7 @@ async def get_job_matches(
         total_score = min(1.0, skill_score*0.4 + exp_score*0.2 + jt_score*0.15 + loc_score*0.15 + sal_score*0.1)
         if total_score >= min_score:
             matches.append(JobMatchItem(
-                job=detail,
+                job=job,
                 match_score=total_score,
                 matching_skills=matching_skills,
                 reasons=reasons,
@@ -1,14 +1,20 @@
+import asyncio
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Header
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session
 from sqlalchemy import text
 
-from app.db.session import get_db_session
-from app.dependencies.auth import get_current_user
-from app.models.user import User
+from app.core import realtime
+from app.core.config import settings
+from app.db.session import get_db_session, engine
+from app.dependencies.auth import CurrentUser, get_current_user, get_stream_user, require_role
+from app.models.user import UserRole
 from app.schemas.notification import (
     NotificationResponse, NotificationListResponse, NotificationUpdate,
-    NotificationPreferences, NotificationStats
+    NotificationPreferences, NotificationStats, NotificationBulkCreate,
+    SystemAnnouncementCreate
 )
 from app.services.notification_service import NotificationService
 
@@ -21,7 +27,8 @@ def get_notifications(
     limit: int = Query(100, ge=1, le=100),
     unread_only: bool = Query(False, description="Show only unread notifications"),
     notification_type: Optional[str] = Query(None, description="Filter by notification type"),
-    current_user: User = Depends(get_current_user),
+    include_archived: bool = Query(False, description="Include archived notifications"),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Get notifications for current user."""
@@ -31,14 +38,162 @@ def get_notifications(
         skip=skip,
         limit=limit,
         unread_only=unread_only,
-        notification_type=notification_type
+        notification_type=notification_type,
+        include_archived=include_archived
     )
 
 
+@router.get("/stream")
+async def stream_notifications(
+    request: Request,
+    last_event_id: Optional[int] = Header(None),
+    since_id: Optional[int] = Query(None, description="Resume after this notification id"),
+    current_user: CurrentUser = Depends(get_stream_user)
+):
+    """Server-Sent Events stream of notifications and chat messages for current user.
+
+    EventSource cannot set headers, so browsers pass the access token as ?token=.
+    Reconnecting clients send Last-Event-ID (or since_id) and receive what they missed.
+    If they missed more than SSE_REPLAY_LIMIT, they get a resync event instead and
+    should refetch. The first frame of a fresh stream and every resync carry the id of
+    the newest notification, so the next reconnect resumes from there.
+    """
+    user_id = current_user.id
+    resume_after = last_event_id if last_event_id is not None else since_id
+
+    def load_missed() -> List[NotificationResponse]:
+        # One extra row tells whether the replay would be cut short
+        with Session(engine) as session:
+            return NotificationService(session).get_notifications_after(
+                user_id, resume_after, settings.SSE_REPLAY_LIMIT + 1
+            )
+
+    def load_latest_id() -> int:
+        with Session(engine) as session:
+            return NotificationService(session).get_latest_notification_id(user_id)
+
+    async def resync() -> str:
+        # Without an id the browser keeps its old Last-Event-ID and is resynced on every reconnect
+        return f"id: {await asyncio.to_thread(load_latest_id)}\nevent: resync\ndata: {{}}\n\n"
+
+    async def events():
+        subscription = realtime.connections.subscribe(user_id, settings.SSE_QUEUE_SIZE)
+        try:
+            replayed = set()
+            if resume_after is None:
+                # Gives a client that has never received a notification a position to resume from
+                yield f"retry: 3000\nid: {await asyncio.to_thread(load_latest_id)}\n\n"
+            else:
+                yield "retry: 3000\n\n"
+                missed = await asyncio.to_thread(load_missed)
+                if len(missed) > settings.SSE_REPLAY_LIMIT:
+                    # Too far behind to replay; the client refetches instead
+                    yield await resync()
+                    missed = []
+                for notification in missed:
+                    replayed.add(notification.id)
+                    yield realtime.format_sse({
+                        "type": realtime.NOTIFICATION, "data": jsonable_encoder(notification)
+                    })
+            # Skip live copies of what was just replayed
+            for _ in range(subscription.queue.qsize()):
+                message = subscription.queue.get_nowait()
+                if message is realtime.CLOSE:
+                    return
+                if message.get("type") == realtime.NOTIFICATION and message["data"].get("id") in replayed:
+                    continue
+                yield realtime.format_sse(message)
+
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=settings.SSE_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                if message is realtime.CLOSE:
+                    # Evicted by the per-user connection limit
+                    return
+                if subscription.overflowed:
+                    # Buffer overflowed; the client should refetch instead of trusting the stream
+                    subscription.overflowed = False
+                    yield await resync()
+                yield realtime.format_sse(message)
+        finally:
+            realtime.connections.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/unread-count")
+def get_unread_count(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db_session)
+):
+    """Get the unread notification count for current user (navbar badge)."""
+    notification_service = NotificationService(db)
+    return {"unread_count": notification_service.get_unread_count(current_user.id)}
+
+
+@router.post("/bulk")
+def create_notifications_bulk(
+    bulk_data: NotificationBulkCreate,
+    current_user: CurrentUser = Depends(require_role([UserRole.admin])),
+    db: Session = Depends(get_db_session)
+):
+    """Create a batch of notifications in one transaction (admin only)."""
+    notification_service = NotificationService(db)
+    created = notification_service.create_notifications_bulk(bulk_data.notifications)
+    return {"created": len(created), "skipped": len(bulk_data.notifications) - len(created)}
+
+
+@router.post("/announcements")
+def send_system_announcement(
+    announcement: SystemAnnouncementCreate,
+    current_user: CurrentUser = Depends(require_role([UserRole.admin])),
+    db: Session = Depends(get_db_session)
+):
+    """Send a system announcement to every active user (admin only)."""
+    notification_service = NotificationService(db)
+    count = notification_service.send_system_announcement(
+        title=announcement.title,
+        message=announcement.message,
+        sender_id=current_user.id,
+        priority=announcement.priority
+    )
+    return {"message": f"Announcement sent to {count} users"}
+
+
+@router.get("/preferences", response_model=NotificationPreferences)
+def get_notification_preferences(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db_session)
+):
+    """Get notification preferences for current user."""
+    notification_service = NotificationService(db)
+    return notification_service.get_notification_preferences(current_user.id)
+
+
+@router.put("/preferences", response_model=NotificationPreferences)
+def update_notification_preferences(
+    preferences_data: NotificationPreferences,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db_session)
+):
+    """Update notification preferences for current user."""
+    notification_service = NotificationService(db)
+    return notification_service.update_notification_preferences(current_user.id, preferences_data)
+
+
 @router.get("/{notification_id}", response_model=NotificationResponse)
 def get_notification(
     notification_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Get specific notification by ID."""
@@ -68,7 +223,7 @@ def get_notification(
 def update_notification(
     notification_id: int,
     notification_data: NotificationUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Update notification (mark as read/archived)."""
@@ -105,7 +260,7 @@ def update_notification(
 
 @router.post("/mark-all-read")
 def mark_all_as_read(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Mark all notifications as read for current user."""
@@ -114,48 +269,9 @@ def mark_all_as_read(
     return {"message": f"Marked {count} notifications as read"}
 
 
-@router.get("/preferences", response_model=NotificationPreferences)
-def get_notification_preferences(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db_session)
-):
-    """Get notification preferences for current user."""
-    # Simplified implementation for now
-    return NotificationPreferences(
-        user_id=current_user.id,
-        email_notifications=True,
-        in_app_notifications=True,
-        sms_notifications=False,
-        push_notifications=True,
-        referral_notifications=True,
-        job_notifications=True,
-        system_notifications=True
-    )
-
-
-@router.put("/preferences", response_model=NotificationPreferences)
-def update_notification_preferences(
-    preferences_data: NotificationPreferences,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db_session)
-):
-    """Update notification preferences for current user."""
-    # Simplified implementation for now
-    return NotificationPreferences(
-        user_id=current_user.id,
-        email_notifications=preferences_data.email_notifications,
-        in_app_notifications=preferences_data.in_app_notifications,
-        sms_notifications=preferences_data.sms_notifications,
-        push_notifications=preferences_data.push_notifications,
-        referral_notifications=preferences_data.referral_notifications,
-        job_notifications=preferences_data.job_notifications,
-        system_notifications=preferences_data.system_notifications
-    )
-
-
 @router.get("/stats/overview", response_model=NotificationStats)
 def get_notification_stats(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Get notification statistics for current user."""
@@ -9,10 +9,25 @@ from app.services.otp_service import OTPService
 from app.schemas.verification import SendOTPRequest, SendOTPResponse, VerifyOTPRequest, VerifyOTPResponse
 from app.api.dependencies import get_current_user
 from app.models.user import User
+from app.core.config import settings
+from app.core.rate_limit import SLIDING_WINDOW, TOKEN_BUCKET
+from app.dependencies.rate_limit import BY_EMAIL, BY_IP, BY_USER, limit, rate_limit
 
 router = APIRouter()
 
-@router.post("/send-otp", response_model=SendOTPResponse)
+send_otp_rate_limit = rate_limit(
+    "otp_send",
+    limit(BY_EMAIL, SLIDING_WINDOW, settings.RATE_LIMIT_OTP_SEND_PER_EMAIL),
+    limit(BY_USER, SLIDING_WINDOW, settings.RATE_LIMIT_OTP_SEND_PER_USER),
+    limit(BY_IP, TOKEN_BUCKET, settings.RATE_LIMIT_OTP_SEND_PER_IP),
+    email_field="company_email",
+)
+verify_otp_rate_limit = rate_limit(
+    "otp_verify",
+    limit(BY_USER, SLIDING_WINDOW, settings.RATE_LIMIT_OTP_VERIFY_PER_USER),
+)
+
+@router.post("/send-otp", response_model=SendOTPResponse, dependencies=[Depends(send_otp_rate_limit)])
 async def send_otp(
     request: SendOTPRequest,
     current_user: User = Depends(get_current_user),
@@ -23,7 +38,7 @@ async def send_otp(
     result = await otp_service.send_otp(request, current_user.id)
     return SendOTPResponse(**result)
 
-@router.post("/verify-otp", response_model=VerifyOTPResponse)
+@router.post("/verify-otp", response_model=VerifyOTPResponse, dependencies=[Depends(verify_otp_rate_limit)])
 async def verify_otp(
     request: VerifyOTPRequest,
     current_user: User = Depends(get_current_user),
@@ -3,7 +3,7 @@ from sqlmodel import Session, select
 from typing import Optional, List
 
 from app.db.session import get_db_session
-from app.dependencies.auth import get_current_user
+from app.dependencies.auth import CurrentUser, get_current_user
 from app.models.referral_request import ReferralRequest
 from app.models.user import User
 from app.schemas.profile import (
@@ -21,7 +21,7 @@ router = APIRouter()
 
 @router.get("/me", response_model=ProfileResponse)
 def get_profile(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Get current user's profile"""
@@ -32,7 +32,7 @@ def get_profile(
 @router.put("/me", response_model=ProfileResponse)
 def update_profile(
     profile_data: ProfileUpdateRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Update current user's profile"""
@@ -42,7 +42,7 @@ def update_profile(
 
 @router.get("/me/jobseeker", response_model=Optional[JobSeekerProfileResponse])
 def get_jobseeker_profile(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Get current user's jobseeker profile"""
@@ -61,7 +61,7 @@ def get_jobseeker_profile(
 @router.get("/jobseeker/{user_id}", response_model=PublicJobSeekerProfileResponse)
 def get_jobseeker_profile_by_id(
     user_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Get a jobseeker profile by user id (employee access only)."""
@@ -96,7 +96,7 @@ def get_jobseeker_profile_by_id(
 @router.put("/me/jobseeker", response_model=JobSeekerProfileResponse)
 def update_jobseeker_profile(
     profile_data: JobSeekerProfileUpdateRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Update current user's jobseeker profile"""
@@ -109,7 +109,7 @@ def update_jobseeker_profile(
 
 @router.get("/me/employee", response_model=Optional[EmployeeProfileResponse])
 def get_employee_profile(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Get current user's employee profile"""
@@ -123,7 +123,7 @@ def get_employee_profile(
 @router.put("/me/employee", response_model=EmployeeProfileResponse)
 def update_employee_profile(
     profile_data: EmployeeProfileUpdateRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Update current user's employee profile"""
@@ -137,7 +137,7 @@ def update_employee_profile(
 @router.post("/me/resume")
 def upload_resume(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Upload resume for jobseeker"""
@@ -165,7 +165,7 @@ def upload_resume(
 
 @router.get("/me/resume")
 def get_resume(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Get current user's resume information"""
@@ -182,7 +182,7 @@ def get_resume(
 
 @router.delete("/me/resume")
 def delete_resume(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Delete current user's resume"""
@@ -199,7 +199,7 @@ def delete_resume(
 
 @router.get("/me/completion", response_model=ProfileCompletionResponse)
 def get_profile_completion(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Get profile completion percentage"""
@@ -210,7 +210,7 @@ def get_profile_completion(
 # Experience endpoints
 @router.get("/me/experience", response_model=List[ExperienceResponse])
 def get_experience(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Get user's experience"""
@@ -221,7 +221,7 @@ def get_experience(
 @router.post("/me/experience", response_model=ExperienceResponse)
 def create_experience(
     experience_data: ExperienceCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Create new experience entry"""
@@ -233,7 +233,7 @@ def create_experience(
 def update_experience(
     experience_id: int,
     experience_data: ExperienceUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Update experience entry"""
@@ -244,7 +244,7 @@ def update_experience(
 @router.delete("/me/experience/{experience_id}")
 def delete_experience(
     experience_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Delete experience entry"""
@@ -256,7 +256,7 @@ def delete_experience(
 # Education endpoints
 @router.get("/me/education", response_model=List[EducationResponse])
 def get_education(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Get user's education"""
@@ -267,7 +267,7 @@ def get_education(
 @router.post("/me/education", response_model=EducationResponse)
 def create_education(
     education_data: EducationCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Create new education entry"""
@@ -279,7 +279,7 @@ def create_education(
 def update_education(
     education_id: int,
     education_data: EducationUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Update education entry"""
@@ -290,7 +290,7 @@ def update_education(
 @router.delete("/me/education/{education_id}")
 def delete_education(
     education_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Delete education entry"""
@@ -302,7 +302,7 @@ def delete_education(
 # Certifications endpoints
 @router.get("/me/certifications", response_model=List[CertificationResponse])
 def get_certifications(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Get user's certifications"""
@@ -313,7 +313,7 @@ def get_certifications(
 @router.post("/me/certifications", response_model=CertificationResponse)
 def create_certification(
     certification_data: CertificationCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Create new certification entry"""
@@ -325,7 +325,7 @@ def create_certification(
 def update_certification(
     certification_id: int,
     certification_data: CertificationUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Update certification entry"""
@@ -336,7 +336,7 @@ def update_certification(
 @router.delete("/me/certifications/{certification_id}")
 def delete_certification(
     certification_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Delete certification entry"""
@@ -8,8 +8,9 @@ from datetime import datetime
 import uuid
 import json
 
+from app.core import realtime
 from app.db.session import get_db_session
-from app.dependencies.auth import get_current_user
+from app.dependencies.auth import CurrentUser, get_current_user
 from app.models.user import User, Job, Company
 from app.models.referral_request import ReferralRequest
 from app.schemas.referral_request import (
@@ -77,7 +78,7 @@ def create_referral_request(
     resume_filename: Optional[str] = Form(None),
     resume_key: Optional[str] = Form(None),
     resume_url: Optional[str] = Form(None),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Create a new referral request with optional resume upload"""
@@ -148,7 +149,7 @@ def get_referral_requests(
     status: Optional[str] = Query(None, description="Filter by status"),
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Get referral requests for the current user"""
@@ -213,7 +214,7 @@ def get_referral_requests(
 @router.get("/{request_id}", response_model=ReferralRequestDetail, summary="Get referral request details")
 def get_referral_request(
     request_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Get detailed information about a specific referral request"""
@@ -255,7 +256,7 @@ def get_referral_request(
 def update_referral_request(
     request_id: int,
     update_data: ReferralRequestUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Update a referral request (employee can respond, job seeker can withdraw)"""
@@ -276,7 +277,7 @@ def update_referral_request(
 @router.post("/{request_id}/chat/enable", response_model=ReferralChatState, summary="Enable chat for referral request")
 def enable_chat(
     request_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Enable chat for a referral request (employee only)."""
@@ -309,7 +310,7 @@ def enable_chat(
 @router.get("/{request_id}/chat", response_model=ReferralChatState, summary="Get referral chat state")
 def get_chat_state(
     request_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Get chat messages for a referral request."""
@@ -341,7 +342,7 @@ def get_chat_state(
 def send_chat_message(
     request_id: int,
     message_data: ReferralChatMessageCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Send a chat message for a referral request."""
@@ -386,12 +387,18 @@ def send_chat_message(
     )
     db.commit()
 
+    recipient_id = request.jobseeker_id if role_value == "employee" else request.employee_id
+    realtime.publish_to_user(recipient_id, realtime.CHAT_MESSAGE, {
+        "referral_request_id": request.id,
+        "message": new_message,
+    })
+
     return new_message
 
 
 @router.get("/stats/overview", response_model=ReferralRequestStats, summary="Get referral request statistics")
 def get_referral_request_stats(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Get referral request statistics for the current user"""
@@ -407,7 +414,7 @@ def get_referral_request_stats(
 
 @router.get("/notifications/pending", response_model=List[ReferralRequestList], summary="Get pending notifications")
 def get_pending_notifications(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Get pending referral request notifications (employee only)"""
@@ -424,7 +431,7 @@ def get_pending_notifications(
 @router.post("/{request_id}/mark-notification-sent", summary="Mark notification as sent")
 def mark_notification_sent(
     request_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Mark a notification as sent (employee only)"""
@@ -444,7 +451,7 @@ def mark_notification_sent(
 @router.get("/{request_id}/resume", summary="Download resume")
 def download_resume(
     request_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Download the resume file for a referral request"""
@@ -481,7 +488,7 @@ def download_resume(
 @router.post("/{request_id}/withdraw", response_model=ReferralRequestResponse, summary="Withdraw referral request")
 def withdraw_referral_request(
     request_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Withdraw a referral request (job seeker only)"""
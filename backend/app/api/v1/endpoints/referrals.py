@@ -3,9 +3,9 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
-from app.db.session import get_db_session
-from app.dependencies.auth import get_current_user, require_role
-from app.models.user import User, UserRole, Employee, JobSeeker
+from app.db.session import get_async_db_session
+from app.dependencies.auth import CurrentUser, get_current_user, require_role
+from app.models.user import UserRole, Employee, JobSeeker
 from app.schemas.referral import (
     ReferralCreate, ReferralUpdate, ReferralResponse, ReferralDetailResponse,
     ReferralSearchParams, ReferralListResponse, ReferralStatsResponse
@@ -18,8 +18,8 @@ router = APIRouter()
 @router.post("/", response_model=ReferralResponse)
 async def create_referral(
     referral_data: ReferralCreate,
-    current_user: User = Depends(require_role([UserRole.employee])),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(require_role([UserRole.employee])),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Create a new referral."""
     # Get employee profile
@@ -36,7 +36,7 @@ async def create_referral(
         )
     
     referral_service = ReferralService(db)
-    referral = await referral_service.create_referral(referral_data, employee[0])
+    referral = await referral_service.create_referral(referral_data, employee[0], actor_user_id=current_user.id)
     return referral
 
 
@@ -49,8 +49,8 @@ async def search_referrals(
     company_id: int = Query(None, description="Filter by company ID"),
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(20, ge=1, le=100, description="Page size"),
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Search and filter referrals."""
     search_params = ReferralSearchParams(
@@ -87,8 +87,8 @@ async def search_referrals(
 @router.get("/{referral_id}", response_model=ReferralDetailResponse)
 async def get_referral(
     referral_id: int,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get referral details by ID."""
     referral_service = ReferralService(db)
@@ -107,8 +107,8 @@ async def get_referral(
 async def update_referral(
     referral_id: int,
     referral_data: ReferralUpdate,
-    current_user: User = Depends(require_role([UserRole.employee])),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(require_role([UserRole.employee])),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Update referral status."""
     # Get employee profile
@@ -133,8 +133,8 @@ async def update_referral(
 async def get_my_referrals(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    current_user: User = Depends(require_role([UserRole.employee])),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(require_role([UserRole.employee])),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get referrals made by current user."""
     # Get employee profile
@@ -159,8 +159,8 @@ async def get_my_referrals(
 async def get_my_received_referrals(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    current_user: User = Depends(require_role([UserRole.jobseeker])),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(require_role([UserRole.jobseeker])),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get referrals received by current user."""
     # Get job seeker profile
@@ -183,8 +183,8 @@ async def get_my_received_referrals(
 
 @router.get("/stats/overview", response_model=ReferralStatsResponse)
 async def get_referral_stats(
-    current_user: User = Depends(require_role([UserRole.employee])),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(require_role([UserRole.employee])),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get referral statistics for current user."""
     # Get employee profile
@@ -207,8 +207,8 @@ async def get_referral_stats(
 
 @router.get("/stats/global", response_model=ReferralStatsResponse)
 async def get_global_referral_stats(
-    current_user: User = Depends(require_role([UserRole.admin])),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(require_role([UserRole.admin])),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get global referral statistics (admin only)."""
     referral_service = ReferralService(db)
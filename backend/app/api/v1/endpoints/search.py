@@ -2,9 +2,8 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db_session
-from app.dependencies.auth import get_current_user
-from app.models.user import User
+from app.db.session import get_async_db_session
+from app.dependencies.auth import CurrentUser, get_current_user
 from app.schemas.search import SearchRequest, SearchResponse, SearchSuggestion
 from app.services.search_service import SearchService
 
@@ -14,8 +13,8 @@ router = APIRouter()
 @router.post("/", response_model=SearchResponse)
 async def search(
     search_request: SearchRequest,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Perform comprehensive search across jobs, users, and referrals."""
     search_service = SearchService(db)
@@ -38,8 +37,8 @@ async def search_get(
     size: int = Query(20, ge=1, le=100, description="Page size"),
     sort_by: str = Query("relevance", description="relevance, date, title"),
     sort_order: str = Query("desc", description="asc, desc"),
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Perform search with query parameters."""
     # Parse skills if provided
@@ -76,8 +75,8 @@ async def search_get(
 @router.get("/suggestions", response_model=List[SearchSuggestion])
 async def get_search_suggestions(
     query: str = Query(..., min_length=1, max_length=100),
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get search suggestions based on query."""
     search_service = SearchService(db)
@@ -103,8 +102,8 @@ async def get_search_suggestions(
 
 @router.get("/analytics")
 async def get_search_analytics(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get search analytics and statistics."""
     search_service = SearchService(db)
@@ -114,8 +113,8 @@ async def get_search_analytics(
 @router.get("/popular")
 async def get_popular_searches(
     limit: int = Query(10, ge=1, le=50),
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get popular search queries."""
     # This would typically come from analytics data
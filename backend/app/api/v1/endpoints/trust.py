@@ -1,12 +1,13 @@
+from datetime import datetime
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db_session
-from app.dependencies.auth import get_current_user, require_role
-from app.models.user import User, UserRole
+from app.db.session import get_async_db_session
+from app.dependencies.auth import CurrentUser, get_current_user, require_role
+from app.models.user import UserRole
 from app.schemas.trust import (
-    TrustScore, FraudAlert, TrustMetrics, TrustAnalysis
+    TrustScore, FraudAlert, TrustMetrics, TrustAnalysis, TrustHistory
 )
 from app.services.trust_service import TrustService
 
@@ -15,8 +16,8 @@ router = APIRouter()
 
 @router.get("/my/score", response_model=TrustScore)
 async def get_my_trust_score(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get current user's trust score."""
     trust_service = TrustService(db)
@@ -31,8 +32,8 @@ async def get_my_trust_score(
 
 @router.post("/my/score/calculate", response_model=TrustScore)
 async def calculate_my_trust_score(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Calculate/update current user's trust score."""
     trust_service = TrustService(db)
@@ -41,18 +42,31 @@ async def calculate_my_trust_score(
 
 @router.get("/my/analysis", response_model=TrustAnalysis)
 async def get_my_trust_analysis(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get detailed trust analysis for current user."""
     trust_service = TrustService(db)
     return await trust_service.get_trust_analysis(current_user.id)
 
 
+@router.get("/my/history", response_model=TrustHistory)
+async def get_my_trust_history(
+    since: Optional[datetime] = Query(None, description="Start of the window (inclusive)"),
+    until: Optional[datetime] = Query(None, description="End of the window (exclusive)"),
+    granularity: Optional[str] = Query(None, pattern="^(daily|weekly)$", description="Resample to daily or weekly points"),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
+):
+    """Get trust score history for trend charts."""
+    trust_service = TrustService(db)
+    return await trust_service.get_trust_history(current_user.id, since, until, granularity)
+
+
 @router.get("/my/fraud-alerts", response_model=List[FraudAlert])
 async def get_my_fraud_alerts(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get fraud alerts for current user."""
     trust_service = TrustService(db)
@@ -62,8 +76,8 @@ async def get_my_fraud_alerts(
 @router.get("/user/{user_id}/score", response_model=TrustScore)
 async def get_user_trust_score(
     user_id: int,
-    current_user: User = Depends(require_role([UserRole.admin])),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(require_role([UserRole.admin])),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get trust score for a specific user (admin only)."""
     trust_service = TrustService(db)
@@ -81,8 +95,8 @@ async def get_user_trust_score(
 @router.post("/user/{user_id}/calculate", response_model=TrustScore)
 async def calculate_user_trust_score(
     user_id: int,
-    current_user: User = Depends(require_role([UserRole.admin])),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(require_role([UserRole.admin])),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Calculate trust score for a specific user (admin only)."""
     trust_service = TrustService(db)
@@ -92,18 +106,32 @@ async def calculate_user_trust_score(
 @router.get("/user/{user_id}/analysis", response_model=TrustAnalysis)
 async def get_user_trust_analysis(
     user_id: int,
-    current_user: User = Depends(require_role([UserRole.admin])),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(require_role([UserRole.admin])),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get trust analysis for a specific user (admin only)."""
     trust_service = TrustService(db)
     return await trust_service.get_trust_analysis(user_id)
 
 
+@router.get("/user/{user_id}/history", response_model=TrustHistory)
+async def get_user_trust_history(
+    user_id: int,
+    since: Optional[datetime] = Query(None, description="Start of the window (inclusive)"),
+    until: Optional[datetime] = Query(None, description="End of the window (exclusive)"),
+    granularity: Optional[str] = Query(None, pattern="^(daily|weekly)$", description="Resample to daily or weekly points"),
+    current_user: CurrentUser = Depends(require_role([UserRole.admin])),
+    db: AsyncSession = Depends(get_async_db_session)
+):
+    """Get trust score history for a specific user (admin only)."""
+    trust_service = TrustService(db)
+    return await trust_service.get_trust_history(user_id, since, until, granularity)
+
+
 @router.get("/metrics", response_model=TrustMetrics)
 async def get_trust_metrics(
-    current_user: User = Depends(require_role([UserRole.admin])),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(require_role([UserRole.admin])),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get overall trust metrics (admin only)."""
     trust_service = TrustService(db)
@@ -114,8 +142,8 @@ async def get_trust_metrics(
 async def get_all_fraud_alerts(
     status: Optional[str] = Query(None, description="Filter by status"),
     risk_level: Optional[str] = Query(None, description="Filter by risk level"),
-    current_user: User = Depends(require_role([UserRole.admin])),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(require_role([UserRole.admin])),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get all fraud alerts (admin only)."""
     # This would implement filtering and pagination
@@ -127,8 +155,8 @@ async def get_all_fraud_alerts(
 async def resolve_fraud_alert(
     alert_id: int,
     resolution: str = Query(..., description="Resolution notes"),
-    current_user: User = Depends(require_role([UserRole.admin])),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(require_role([UserRole.admin])),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Resolve a fraud alert (admin only)."""
     # This would implement alert resolution
@@ -138,8 +166,8 @@ async def resolve_fraud_alert(
 @router.get("/low-trust-users")
 async def get_low_trust_users(
     limit: int = Query(50, ge=1, le=100),
-    current_user: User = Depends(require_role([UserRole.admin])),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(require_role([UserRole.admin])),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get users with low trust scores (admin only)."""
     # This would implement query for low trust users
@@ -149,8 +177,8 @@ async def get_low_trust_users(
 @router.post("/detect-fraud/{user_id}")
 async def detect_fraud_for_user(
     user_id: int,
-    current_user: User = Depends(require_role([UserRole.admin])),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(require_role([UserRole.admin])),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Run fraud detection for a specific user (admin only)."""
     trust_service = TrustService(db)
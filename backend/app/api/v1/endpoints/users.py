@@ -2,8 +2,8 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db_session
-from app.dependencies.auth import get_current_user, require_role
+from app.db.session import get_async_db_session
+from app.dependencies.auth import CurrentUser, get_current_user, require_role
 from app.models.user import User, UserRole
 from app.schemas.user import (
     UserProfileResponse, UserProfileUpdate, UserListResponse, UserDetailResponse,
@@ -18,8 +18,8 @@ router = APIRouter()
 
 @router.get("/me", response_model=UserDetailResponse)
 async def get_my_profile(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get current user's detailed profile."""
     user_service = UserService(db)
@@ -37,8 +37,8 @@ async def get_my_profile(
 @router.put("/me", response_model=UserProfileResponse)
 async def update_my_profile(
     profile_data: UserProfileUpdate,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Update current user's profile."""
     user_service = UserService(db)
@@ -48,8 +48,8 @@ async def update_my_profile(
 
 @router.get("/me/employee", response_model=EmployeeProfileResponse)
 async def get_my_employee_profile(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get current user's employee profile."""
     user_service = UserService(db)
@@ -67,8 +67,8 @@ async def get_my_employee_profile(
 @router.post("/me/employee", response_model=EmployeeProfileResponse)
 async def create_my_employee_profile(
     profile_data: EmployeeProfileCreate,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Create current user's employee profile."""
     if current_user.role != UserRole.employee:
@@ -85,8 +85,8 @@ async def create_my_employee_profile(
 @router.put("/me/employee", response_model=EmployeeProfileResponse)
 async def update_my_employee_profile(
     profile_data: EmployeeProfileUpdate,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Update current user's employee profile."""
     user_service = UserService(db)
@@ -96,8 +96,8 @@ async def update_my_employee_profile(
 
 @router.get("/me/jobseeker", response_model=JobSeekerProfileResponse)
 async def get_my_jobseeker_profile(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get current user's job seeker profile."""
     user_service = UserService(db)
@@ -115,8 +115,8 @@ async def get_my_jobseeker_profile(
 @router.post("/me/jobseeker", response_model=JobSeekerProfileResponse)
 async def create_my_jobseeker_profile(
     profile_data: JobSeekerProfileCreate,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Create current user's job seeker profile."""
     if current_user.role != UserRole.jobseeker:
@@ -133,8 +133,8 @@ async def create_my_jobseeker_profile(
 @router.put("/me/jobseeker", response_model=JobSeekerProfileResponse)
 async def update_my_jobseeker_profile(
     profile_data: JobSeekerProfileUpdate,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Update current user's job seeker profile."""
     user_service = UserService(db)
@@ -147,8 +147,8 @@ async def list_users(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     role: Optional[UserRole] = Query(None),
-    current_user: User = Depends(require_role([UserRole.admin])),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(require_role([UserRole.admin])),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """List all users (admin only)."""
     user_service = UserService(db)
@@ -159,8 +159,8 @@ async def list_users(
 @router.get("/{user_id}", response_model=UserDetailResponse)
 async def get_user(
     user_id: int,
-    current_user: User = Depends(require_role([UserRole.admin])),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(require_role([UserRole.admin])),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Get user by ID (admin only)."""
     user_service = UserService(db)
@@ -179,8 +179,8 @@ async def get_user(
 async def list_companies(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """List all companies."""
     user_service = UserService(db)
@@ -192,8 +192,8 @@ async def list_companies(
 @router.post("/companies/", response_model=CompanyResponse)
 async def create_company(
     company_data: CompanyCreate,
-    current_user: User = Depends(require_role([UserRole.admin])),
-    db: AsyncSession = Depends(get_db_session)
+    current_user: CurrentUser = Depends(require_role([UserRole.admin])),
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """Create a new company (admin only)."""
     user_service = UserService(db)
@@ -15,15 +15,31 @@ sys.path.append('/Users/pradeepdyd/referconnect-backend')
 
 # Import email service
 from app.services.email_service import email_service
+from app.services.email_outbox_service import EmailOutboxService, PRIORITY_OTP
+from app.services.otp_store import OTPStore, VERIFIED, EXPIRED, INVALID
 from sqlmodel import Session
 from sqlalchemy import text
 from app.db.session import get_db_session
 from app.schemas.verification import CompanySearchResponse
-from app.dependencies.auth import get_current_user
-from app.models.user import User
+from app.dependencies.auth import CurrentUser, get_current_user
+from app.core.config import settings
+from app.core.rate_limit import SLIDING_WINDOW, TOKEN_BUCKET
+from app.dependencies.rate_limit import BY_EMAIL, BY_IP, BY_USER, limit, rate_limit
 
 router = APIRouter()
 
+send_otp_rate_limit = rate_limit(
+    "otp_send",
+    limit(BY_EMAIL, SLIDING_WINDOW, settings.RATE_LIMIT_OTP_SEND_PER_EMAIL),
+    limit(BY_USER, SLIDING_WINDOW, settings.RATE_LIMIT_OTP_SEND_PER_USER),
+    limit(BY_IP, TOKEN_BUCKET, settings.RATE_LIMIT_OTP_SEND_PER_IP),
+    email_field="company_email",
+)
+verify_otp_rate_limit = rate_limit(
+    "otp_verify",
+    limit(BY_USER, SLIDING_WINDOW, settings.RATE_LIMIT_OTP_VERIFY_PER_USER),
+)
+
 
 """
 Note: Using app.schemas.verification.CompanySearchResponse for response_model.
@@ -114,44 +130,20 @@ async def get_verified_companies(query: Optional[str] = None, db: Session = Depe
 
 
 
-@router.post("/send-otp", response_model=SendOTPResponse)
+@router.post("/send-otp", response_model=SendOTPResponse, dependencies=[Depends(send_otp_rate_limit)])
 async def send_otp(
     request: SendOTPRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Send OTP to company email for verification"""
     try:
         # Generate 6-digit OTP
         otp_code = ''.join(secrets.choice(string.digits) for _ in range(6))
-        expires_at = datetime.now(timezone.utc) + timedelta(minutes=10)
+        expires_at = datetime.utcnow() + timedelta(minutes=settings.OTP_EXPIRY_MINUTES)
         
-        # Ensure OTP table exists in Postgres and insert OTP
-        db.execute(text("""
-            CREATE TABLE IF NOT EXISTS otp_verifications (
-                id SERIAL PRIMARY KEY,
-                user_id INTEGER,
-                company_id INTEGER,
-                company_email TEXT,
-                otp_code TEXT,
-                expires_at TIMESTAMPTZ,
-                created_at TIMESTAMPTZ DEFAULT NOW(),
-                verified BOOLEAN DEFAULT FALSE
-            )
-        """))
-        db.execute(
-            text("""
-                INSERT INTO otp_verifications (user_id, company_id, company_email, otp_code, expires_at)
-                VALUES (:user_id, :company_id, :company_email, :otp_code, :expires_at)
-            """),
-            {
-                "user_id": current_user.id,  # Use actual user ID
-                "company_id": request.company_id,
-                "company_email": request.company_email,
-                "otp_code": otp_code,
-                "expires_at": expires_at,
-            }
-        )
+        # Store a salted hash of the OTP, replacing any pending one
+        OTPStore(db).issue(current_user.id, request.company_id, request.company_email, otp_code, expires_at)
         db.commit()
         
         # Get company name for email (use companies table to match prod schema)
@@ -160,20 +152,17 @@ async def send_otp(
         if res and res[0]:
             company_name = res[0]
         
-        # Send email using SendGrid
-        email_sent = await email_service.send_otp_email(
-            to_email=request.company_email,
-            otp_code=otp_code,
-            company_name=company_name
+        # Queue the email; the outbox dispatcher sends it
+        EmailOutboxService(db).enqueue(
+            request.company_email,
+            email_service.otp_email(otp_code, company_name),
+            priority=PRIORITY_OTP,
         )
         
-        if not email_sent:
-            print(f"Failed to send email to {request.company_email}")
-        
         return SendOTPResponse(
             success=True,
             message="OTP sent successfully",
-            expires_at=expires_at.isoformat(),
+            expires_at=expires_at.replace(tzinfo=timezone.utc).isoformat(),
             service_used=email_service.active_service
         )
         
@@ -181,61 +170,41 @@ async def send_otp(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to send OTP: {e}")
 
 
-@router.post("/verify-otp", response_model=VerifyOTPResponse)
+@router.post("/verify-otp", response_model=VerifyOTPResponse, dependencies=[Depends(verify_otp_rate_limit)])
 async def verify_otp(
     request: VerifyOTPRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Verify OTP code"""
     try:
-        # Find valid OTP in Postgres for this specific user
-        result = db.execute(
-            text("""
-                SELECT id, expires_at FROM otp_verifications
-                WHERE user_id = :user_id AND company_id = :company_id AND company_email = :company_email AND otp_code = :otp_code AND verified = FALSE
-                ORDER BY created_at DESC LIMIT 1
-            """),
-            {
-                "user_id": current_user.id,  # Filter by actual user ID
-                "company_id": request.company_id,
-                "company_email": request.company_email,
-                "otp_code": request.otp_code,
-            }
-        ).fetchone()
+        # Check the code against the stored hash for this specific user
+        check = OTPStore(db).verify(
+            current_user.id, request.company_id, request.company_email, request.otp_code, max_attempts=3
+        )
         
-        if not result:
+        if check.result == EXPIRED:
             return VerifyOTPResponse(
                 success=False,
-                message="Invalid or expired OTP code"
+                message="OTP code has expired"
             )
         
-        otp_id, expires_at_val = result
-        # Normalize expires_at to timezone-aware UTC
-        if isinstance(expires_at_val, str):
-            parsed = datetime.fromisoformat(expires_at_val)
-        else:
-            parsed = expires_at_val
-        if parsed.tzinfo is None:
-            expires_at = parsed.replace(tzinfo=timezone.utc)
-        else:
-            expires_at = parsed.astimezone(timezone.utc)
-        
-        # Check if OTP is expired
-        if datetime.now(timezone.utc) > expires_at:
+        if check.result == INVALID:
             return VerifyOTPResponse(
                 success=False,
-                message="OTP code has expired"
+                message=f"Invalid OTP code. {check.remaining_attempts} attempts remaining."
             )
         
-        # Mark OTP as verified
-        db.execute(text("UPDATE otp_verifications SET verified = TRUE WHERE id = :id"), {"id": otp_id})
-        db.commit()
+        if check.result != VERIFIED:
+            return VerifyOTPResponse(
+                success=False,
+                message="Invalid or expired OTP code"
+            )
         
         return VerifyOTPResponse(
             success=True,
             message="OTP verified successfully",
-            verification_id=otp_id
+            verification_id=check.otp_id
         )
         
     except Exception as e:
@@ -244,7 +213,7 @@ async def verify_otp(
 
 @router.get("/status")
 async def get_verification_status(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
     """Get verification status for current user"""
@@ -20,6 +20,18 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str = Field(default="sqlite:///./referconnect.db")
+    # Sync engine serves `def` endpoints from the threadpool, async engine the `async def` ones
+    DB_POOL_SIZE: int = Field(default=10)
+    DB_MAX_OVERFLOW: int = Field(default=20)
+    DB_ASYNC_POOL_SIZE: int = Field(default=20)
+    DB_ASYNC_MAX_OVERFLOW: int = Field(default=10)
+    DB_POOL_TIMEOUT_SECONDS: int = Field(default=10)
+    DB_POOL_RECYCLE_SECONDS: int = Field(default=1800)
+    # Read replicas for @read_only service methods (comma-separated URLs; empty: primary only)
+    DATABASE_READ_URLS: str = Field(default="")
+    DATABASE_REPLICA_MAX_LAG_SECONDS: float = Field(default=5.0)
+    DATABASE_REPLICA_CHECK_SECONDS: int = Field(default=10)
+    DATABASE_REPLICA_CHECK_TIMEOUT_SECONDS: float = Field(default=2.0)
 
     # CORS
     CORS_ALLOWED_ORIGINS: List[str] = Field(default_factory=lambda: [
@@ -65,6 +77,135 @@ class Settings(BaseSettings):
     AWS_ACCESS_KEY_ID: str = Field(default="")
     AWS_SECRET_ACCESS_KEY: str = Field(default="")
 
+    # Background jobs
+    SCHEDULER_ENABLED: bool = Field(default=True)
+    TRUST_RECOMPUTE_INTERVAL_HOURS: int = Field(default=24)
+    TRUST_RECOMPUTE_BATCH_SIZE: int = Field(default=1000)
+    TRUST_HISTORY_RAW_DAYS: int = Field(default=30)
+    TRUST_HISTORY_DAILY_DAYS: int = Field(default=180)
+    TRUST_HISTORY_COMPACTION_INTERVAL_HOURS: int = Field(default=24)
+    TRUST_HISTORY_COMPACTION_BATCH_USERS: int = Field(default=500)
+    TRUST_METRICS_TTL_SECONDS: int = Field(default=60)
+    TRUST_METRICS_STALE_SECONDS: int = Field(default=600)
+
+    # Streaming fraud detection
+    # Each worker writes <name>.<pid>.json; exited workers' files are merged on start
+    FRAUD_STREAM_CHECKPOINT_PATH: str = Field(default="fraud_stream_checkpoint.json")
+    FRAUD_STREAM_FLUSH_SECONDS: int = Field(default=10)
+    FRAUD_STREAM_CHECKPOINT_SECONDS: int = Field(default=60)
+    FRAUD_RULES_RELOAD_SECONDS: int = Field(default=300)
+
+    # Referral-graph collusion detection
+    COLLUSION_DETECTION_INTERVAL_HOURS: int = Field(default=24)
+    COLLUSION_LOOKBACK_DAYS: int = Field(default=90)
+    COLLUSION_MIN_COMPONENT_SIZE: int = Field(default=3)
+    COLLUSION_MAX_COMPONENT_SIZE: int = Field(default=50)
+    COLLUSION_MIN_SCORE: int = Field(default=60)
+    COLLUSION_SPRAY_MIN_EMPLOYEES: int = Field(default=5)
+
+    # Notification digests
+    NOTIFICATION_COALESCE_WINDOW_MINUTES: int = Field(default=60)
+    NOTIFICATION_EMAIL_DIGEST_INTERVAL_HOURS: int = Field(default=24)
+    NOTIFICATION_EMAIL_DIGEST_BATCH_USERS: int = Field(default=500)
+
+    # Notification preference cache (per worker process)
+    NOTIFICATION_PREFERENCES_CACHE_SIZE: int = Field(default=10000)
+    NOTIFICATION_PREFERENCES_CACHE_TTL_SECONDS: int = Field(default=300)
+
+    # Notification retention (hot table -> notifications_archive)
+    NOTIFICATION_RETENTION_DAYS: int = Field(default=90)
+    NOTIFICATION_ARCHIVED_RETENTION_DAYS: int = Field(default=7)
+    NOTIFICATION_RETENTION_BATCH_SIZE: int = Field(default=5000)
+    NOTIFICATION_RETENTION_INTERVAL_HOURS: int = Field(default=24)
+    NOTIFICATION_PARTITION_MONTHS_AHEAD: int = Field(default=3)
+
+    # Email provider connections (reused across sends)
+    EMAIL_HTTP_MAX_CONNECTIONS: int = Field(default=20)
+    EMAIL_HTTP_KEEPALIVE_SECONDS: float = Field(default=60)
+    EMAIL_HTTP_TIMEOUT_SECONDS: float = Field(default=15)
+    EMAIL_SMTP_POOL_SIZE: int = Field(default=4)
+    EMAIL_SMTP_IDLE_SECONDS: float = Field(default=60)
+    EMAIL_SMTP_TIMEOUT_SECONDS: float = Field(default=30)
+
+    # Email provider routing and circuit breakers
+    EMAIL_ROUTER_WINDOW: int = Field(default=50)
+    EMAIL_ROUTER_MIN_SAMPLES: int = Field(default=10)
+    EMAIL_ROUTER_MIN_SUCCESS_RATE: float = Field(default=0.5)
+    EMAIL_ROUTER_PROBE_SECONDS: float = Field(default=5)
+    EMAIL_ROUTER_EXPLORE_RATE: float = Field(default=0.05)
+    EMAIL_CIRCUIT_FAILURE_THRESHOLD: int = Field(default=5)
+    EMAIL_CIRCUIT_OPEN_SECONDS: float = Field(default=30)
+    EMAIL_CIRCUIT_MAX_OPEN_SECONDS: float = Field(default=600)
+
+    # Bulk email (digest lane)
+    EMAIL_BULK_BATCH_SIZE: int = Field(default=500)
+    EMAIL_BULK_CONCURRENCY: int = Field(default=4)
+    EMAIL_BULK_MAX_REQUEST_BYTES: int = Field(default=4_000_000)
+
+    # Email outbox (every worker runs a dispatcher; claims are row-locked)
+    EMAIL_OUTBOX_WORKERS: int = Field(default=4)
+    EMAIL_OUTBOX_POLL_SECONDS: float = Field(default=5)
+    EMAIL_OUTBOX_LEASE_SECONDS: int = Field(default=300)
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = Field(default=8)
+    EMAIL_OUTBOX_BACKOFF_BASE_SECONDS: float = Field(default=30)
+    EMAIL_OUTBOX_BACKOFF_MAX_SECONDS: float = Field(default=3600)
+    EMAIL_OUTBOX_SENT_RETENTION_DAYS: int = Field(default=7)
+    EMAIL_OUTBOX_CLEANUP_INTERVAL_HOURS: int = Field(default=24)
+
+    # Password hashing (dedicated bcrypt threads per worker; rounds changes rehash on login)
+    PASSWORD_BCRYPT_ROUNDS: int = Field(default=12)
+    PASSWORD_HASH_WORKERS: int = Field(default=2)
+    PASSWORD_HASH_MAX_QUEUE: int = Field(default=64)
+
+    # Authenticated-user cache (per worker; TTL bounds staleness across workers)
+    AUTH_USER_CACHE_SIZE: int = Field(default=10000)
+    AUTH_USER_CACHE_TTL_SECONDS: int = Field(default=60)
+
+    # Token revocation (per-worker Bloom filter over revoked_tokens, rebuilt every REFRESH_SECONDS)
+    TOKEN_REVOCATION_BLOOM_CAPACITY: int = Field(default=100000)
+    TOKEN_REVOCATION_BLOOM_ERROR_RATE: float = Field(default=0.001)
+    TOKEN_REVOCATION_REFRESH_SECONDS: int = Field(default=30)
+    TOKEN_REVOCATION_CACHE_SIZE: int = Field(default=10000)
+    TOKEN_REVOCATION_CLEANUP_INTERVAL_MINUTES: int = Field(default=60)
+
+    # OTP store (verify cache is per worker; 0 disables it)
+    OTP_EXPIRY_MINUTES: int = Field(default=10)
+    OTP_VERIFY_CACHE_SIZE: int = Field(default=10000)
+    OTP_VERIFY_CACHE_TTL_SECONDS: int = Field(default=600)
+    OTP_CLEANUP_INTERVAL_MINUTES: int = Field(default=15)
+    OTP_CLEANUP_BATCH_SIZE: int = Field(default=5000)
+
+    # Rate limiting for OTP and auth endpoints, limits as "count/seconds"
+    # ("local" keeps counts per worker, "shared" in a file mapped by all workers on one host)
+    RATE_LIMIT_ENABLED: bool = Field(default=True)
+    RATE_LIMIT_BACKEND: str = Field(default="local")
+    RATE_LIMIT_SHARED_PATH: str = Field(default="/dev/shm/referconnect-ratelimit")
+    RATE_LIMIT_SHARED_SLOTS: int = Field(default=16384)
+    RATE_LIMIT_LOCAL_MAX_KEYS: int = Field(default=100000)
+    RATE_LIMIT_OTP_SEND_PER_EMAIL: str = Field(default="1/60")
+    RATE_LIMIT_OTP_SEND_PER_USER: str = Field(default="5/600")
+    RATE_LIMIT_OTP_SEND_PER_IP: str = Field(default="20/600")
+    RATE_LIMIT_OTP_VERIFY_PER_USER: str = Field(default="10/600")
+    RATE_LIMIT_LOGIN_PER_EMAIL_IP: str = Field(default="10/900")
+    RATE_LIMIT_LOGIN_PER_IP: str = Field(default="30/60")
+    # Peers whose X-Forwarded-For is believed (comma-separated networks; empty ignores the header).
+    # The default covers the private ranges PaaS load balancers connect from
+    RATE_LIMIT_TRUSTED_PROXIES: str = Field(
+        default="127.0.0.0/8,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16,100.64.0.0/10,::1/128,fc00::/7"
+    )
+
+    # Real-time push ("local" for a single worker, "unix" to fan out across workers on one host)
+    REALTIME_BROKER: str = Field(default="local")
+    REALTIME_SOCKET_DIR: str = Field(default="/tmp/referconnect-realtime")
+    SSE_HEARTBEAT_SECONDS: int = Field(default=15)
+    SSE_QUEUE_SIZE: int = Field(default=100)
+    SSE_REPLAY_LIMIT: int = Field(default=100)
+    WS_SEND_QUEUE_SIZE: int = Field(default=100)
+    WS_OVERFLOW_POLICY: str = Field(default="drop_oldest")  # or "disconnect"
+    WS_SEND_TIMEOUT_SECONDS: int = Field(default=10)
+    WS_PING_INTERVAL_SECONDS: int = Field(default=20)
+    WS_MAX_CONNECTIONS_PER_USER: int = Field(default=5)
+
 
 @lru_cache()
 def get_settings() -> "Settings":
@@ -0,0 +1,247 @@
+"""
+Precompiled email templates.
+
+Templates live in templates/email/*.html and are compiled once: the <style> block
+is inlined into each element's style attribute (email clients ignore <style>),
+and the markup is split into static strings and placeholders. Rendering only
+fills in the placeholders and joins.
+
+Syntax:
+    {{ name }}                        HTML-escaped value; dotted paths read dict keys
+    {% for item in items %}...{% endfor %}
+
+Only top-level rules whose whole selector is one class (.name { ... }) are
+inlined; @media and other @-blocks, compound selectors and pseudo-classes are kept
+in the <style> block as is, and so are the classes they refer to. Inlined styles
+beat the kept rules, so responsive overrides need !important.
+
+For providers that substitute per-recipient values into one shared body
+(SendGrid), shared_body has every top-level variable and loop replaced by a
+substitution tag and render_parts renders those pieces for one context.
+"""
+import re
+from html import escape
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple, Union
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent.parent / "templates" / "email"
+
+TOKEN_RE = re.compile(r"{{\s*([\w.]+)\s*}}|{%\s*(for\s+(\w+)\s+in\s+([\w.]+)|endfor)\s*%}")
+STYLE_BLOCK_RE = re.compile(r"<style[^>]*>(.*?)</style>\s*", re.S)
+SINGLE_CLASS_RE = re.compile(r"\s*\.([\w-]+)\s*")
+CLASS_REF_RE = re.compile(r"\.([\w-]+)")
+CLASS_ATTR_RE = re.compile(r"<(\w+)([^>]*?)\sclass=\"([^\"]*)\"([^>]*)>")
+STYLE_ATTR_RE = re.compile(r"\sstyle=\"([^\"]*)\"")
+
+# Stands in for the index-th top-level dynamic node in shared_body
+SUBSTITUTION_TAG = "-part{}-"
+
+# Compiled node: a static string, a variable path, or (loop variable, iterable path, body)
+Node = Union[str, Tuple[str, ...], Tuple[str, Tuple[str, ...], List[Any]]]
+
+
+class TemplateError(Exception):
+    pass
+
+
+def inline_css(html: str) -> str:
+    """Move top-level `.class { ... }` rules from <style> into style attributes."""
+    rules: Dict[str, str] = {}
+    referenced = set()
+
+    def strip_rules(match: "re.Match") -> str:
+        kept = []
+        for prelude, block in _top_level_rules(match.group(1)):
+            single = SINGLE_CLASS_RE.fullmatch(prelude)
+            if single is None or "{" in block:
+                kept.append(f"{prelude}{{{block}}}" if block is not None else prelude)
+                continue
+            declarations = " ".join(d.strip() + ";" for d in block.split(";") if d.strip())
+            if declarations:
+                name = single.group(1)
+                rules[name] = f"{rules[name]} {declarations}" if name in rules else declarations
+        rest = "".join(kept).strip()
+        referenced.update(CLASS_REF_RE.findall(rest))
+        return f"<style>{rest}</style>\n" if rest else ""
+
+    html = STYLE_BLOCK_RE.sub(strip_rules, html)
+    if not rules:
+        return html
+
+    def apply_rules(match: "re.Match") -> str:
+        tag, before, classes, after = match.groups()
+        inlined = " ".join(rules[c] for c in classes.split() if c in rules)
+        if not inlined:
+            return match.group(0)
+        # Classes still used by a kept rule (e.g. inside @media) stay on the element
+        remaining = [c for c in classes.split() if c not in rules or c in referenced]
+        attrs = before + after
+        existing = STYLE_ATTR_RE.search(attrs)
+        if existing:
+            # Explicit style attributes win over class rules
+            inlined = f"{inlined} {existing.group(1)}".strip()
+            attrs = STYLE_ATTR_RE.sub("", attrs, count=1)
+        class_attr = f' class="{" ".join(remaining)}"' if remaining else ""
+        return f'<{tag}{attrs}{class_attr} style="{inlined}">'
+
+    return CLASS_ATTR_RE.sub(apply_rules, html)
+
+
+def _top_level_rules(css: str) -> List[Tuple[str, Optional[str]]]:
+    """Split a stylesheet into (prelude, block) pairs at brace depth 0; a block keeps
+    its nested braces. Trailing text without a block comes back with block None."""
+    pieces: List[Tuple[str, Optional[str]]] = []
+    depth, start, opened = 0, 0, 0
+    for i, char in enumerate(css):
+        if char == "{":
+            if depth == 0:
+                opened = i
+            depth += 1
+        elif char == "}" and depth:
+            depth -= 1
+            if depth == 0:
+                pieces.append((css[start:opened], css[opened + 1:i]))
+                start = i + 1
+    if css[start:].strip():
+        pieces.append((css[start:], None))
+    return pieces
+
+
+def compile_template(source: str) -> List[Node]:
+    root: List[Node] = []
+    stack: List[Tuple[List[Node], Optional[str]]] = [(root, None)]
+    position = 0
+    for match in TOKEN_RE.finditer(source):
+        nodes = stack[-1][0]
+        if match.start() > position:
+            nodes.append(source[position:match.start()])
+        position = match.end()
+        variable, block, loop_var, iterable = match.groups()
+        if variable:
+            nodes.append(tuple(variable.split(".")))
+        elif block == "endfor":
+            if len(stack) == 1:
+                raise TemplateError("{% endfor %} without {% for %}")
+            stack.pop()
+        else:
+            body: List[Node] = []
+            nodes.append((loop_var, tuple(iterable.split(".")), body))
+            stack.append((body, loop_var))
+    if len(stack) != 1:
+        raise TemplateError("{% for %} without {% endfor %}")
+    if position < len(source):
+        root.append(source[position:])
+    return _merge_static(root)
+
+
+def _merge_static(nodes: List[Node]) -> List[Node]:
+    merged: List[Node] = []
+    for node in nodes:
+        if isinstance(node, tuple) and len(node) == 3 and isinstance(node[2], list):
+            node = (node[0], node[1], _merge_static(node[2]))
+        if isinstance(node, str) and merged and isinstance(merged[-1], str):
+            merged[-1] += node
+        else:
+            merged.append(node)
+    return merged
+
+
+def _lookup(context: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+    value: Any = context
+    for key in path:
+        value = value.get(key) if isinstance(value, dict) else getattr(value, key, None)
+        if value is None:
+            return ""
+    return value
+
+
+def _render(nodes: List[Node], context: Dict[str, Any], out: List[str]) -> None:
+    for node in nodes:
+        if isinstance(node, str):
+            out.append(node)
+        elif isinstance(node[-1], list):
+            loop_var, iterable, body = node
+            scope = dict(context)
+            for item in _lookup(context, iterable) or ():
+                scope[loop_var] = item
+                _render(body, scope, out)
+        else:
+            out.append(escape(str(_lookup(context, node))))
+
+
+class EmailTemplate:
+    def __init__(self, name: str, source: str):
+        self.name = name
+        self.nodes = compile_template(inline_css(source))
+        self.shared_body = "".join(
+            node if isinstance(node, str) else SUBSTITUTION_TAG.format(index)
+            for index, node in enumerate(self.nodes)
+        )
+        # Bytes of the body that are the same for every recipient
+        self.static_bytes = sum(len(node.encode()) for node in self.nodes if isinstance(node, str))
+
+    def render(self, context: Dict[str, Any]) -> str:
+        out: List[str] = []
+        _render(self.nodes, context, out)
+        return "".join(out)
+
+    def render_parts(self, context: Dict[str, Any]) -> Dict[str, str]:
+        """The dynamic pieces of render(context), keyed by their tag in shared_body."""
+        parts: Dict[str, str] = {}
+        for index, node in enumerate(self.nodes):
+            if not isinstance(node, str):
+                out: List[str] = []
+                _render([node], context, out)
+                parts[SUBSTITUTION_TAG.format(index)] = "".join(out)
+        return parts
+
+
+class TemplateEngine:
+    def __init__(self, directory: Path = TEMPLATES_DIR):
+        self.directory = directory
+        self.templates: Dict[str, EmailTemplate] = {}
+
+    def load(self) -> int:
+        """Compile every template in the directory (app startup)."""
+        templates = {
+            path.stem: EmailTemplate(path.stem, path.read_text(encoding="utf-8"))
+            for path in sorted(self.directory.glob("*.html"))
+        }
+        self.templates = templates
+        return len(templates)
+
+    def get(self, name: str) -> EmailTemplate:
+        template = self.templates.get(name)
+        if template is None:
+            path = self.directory / f"{name}.html"
+            if not path.exists():
+                raise TemplateError(f"Unknown email template: {name}")
+            template = self.templates[name] = EmailTemplate(name, path.read_text(encoding="utf-8"))
+        return template
+
+    def render(self, name: str, context: Dict[str, Any]) -> str:
+        return self.get(name).render(context)
+
+    def render_batch(self, name: str, contexts: Iterable[Dict[str, Any]]) -> List[str]:
+        """Render one template for many recipients; identical contexts render once."""
+        template = self.get(name)
+        rendered: Dict[Hashable, str] = {}
+        results = []
+        for context in contexts:
+            key = _freeze(context)
+            html = rendered.get(key)
+            if html is None:
+                html = rendered[key] = template.render(context)
+            results.append(html)
+        return results
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+email_templates = TemplateEngine()
@@ -0,0 +1,34 @@
+"""
+In-process domain event hooks.
+
+Services publish small dict payloads after committing; subscribers must be cheap
+(no DB round trips) because they run inline on the publishing request.
+"""
+from collections import defaultdict
+from typing import Any, Callable, Dict, List
+
+REFERRAL_CREATED = "referral.created"
+REFERRAL_REQUEST_CREATED = "referral_request.created"
+
+EventHandler = Callable[[str, Dict[str, Any]], None]
+
+_subscribers: Dict[str, List[EventHandler]] = defaultdict(list)
+
+
+def subscribe(event: str, handler: EventHandler) -> None:
+    if handler not in _subscribers[event]:
+        _subscribers[event].append(handler)
+
+
+def unsubscribe(event: str, handler: EventHandler) -> None:
+    if handler in _subscribers[event]:
+        _subscribers[event].remove(handler)
+
+
+def publish(event: str, payload: Dict[str, Any]) -> None:
+    for handler in list(_subscribers.get(event, ())):
+        try:
+            handler(event, payload)
+        except Exception as e:
+            # Never fail the publishing request because of a subscriber
+            print(f"❌ Event handler for {event} failed: {e}")
@@ -0,0 +1,163 @@
+"""
+Rate limiting for OTP and auth endpoints.
+
+Algorithms:
+    token_bucket   - bursts of up to `limit`, refilled evenly over `period` seconds
+    sliding_window - at most `limit` hits in any `period` seconds (exact timestamp log)
+
+Backends hold the per-key state; neither touches the database:
+    local  - a dict in each worker process; enough for a single worker
+    shared - a memory-mapped file (RATE_LIMIT_SHARED_PATH) that every worker on the
+             host maps, guarded by flock. Fixed-size slots, so a sliding window
+             limit can be at most MAX_LOG_ENTRIES.
+"""
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+from app.core.config import settings
+
+TOKEN_BUCKET = "token_bucket"
+SLIDING_WINDOW = "sliding_window"
+
+# Per-key state capacity of the shared backend
+MAX_LOG_ENTRIES = 30
+# Slots looked at for a key before the least recently used one is taken over
+SHARED_PROBE_SLOTS = 4
+
+
+class Rate(NamedTuple):
+    limit: int
+    period: float
+
+    @classmethod
+    def parse(cls, value: str) -> "Rate":
+        """"5/600" -> 5 hits per 600 seconds"""
+        limit, period = value.split("/")
+        return cls(int(limit), float(period))
+
+
+# state -> (allowed, retry_after seconds, new state)
+Algorithm = Callable[[List[float], Rate, float], Tuple[bool, float, List[float]]]
+
+
+def token_bucket(state: List[float], rate: Rate, now: float) -> Tuple[bool, float, List[float]]:
+    tokens, updated = state if state else (float(rate.limit), now)
+    tokens = min(float(rate.limit), tokens + (now - updated) * rate.limit / rate.period)
+    if tokens >= 1:
+        return True, 0.0, [tokens - 1, now]
+    return False, (1 - tokens) * rate.period / rate.limit, [tokens, now]
+
+
+def sliding_window(state: List[float], rate: Rate, now: float) -> Tuple[bool, float, List[float]]:
+    # Oldest first
+    log = [t for t in state if t > now - rate.period]
+    if len(log) < rate.limit:
+        log.append(now)
+        return True, 0.0, log
+    return False, log[-rate.limit] + rate.period - now, log
+
+
+ALGORITHMS: Dict[str, Algorithm] = {TOKEN_BUCKET: token_bucket, SLIDING_WINDOW: sliding_window}
+
+
+class LocalBackend:
+    """Per-process state, least recently used keys dropped past `max_keys`."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, algorithm: Algorithm, rate: Rate, now: float) -> Tuple[bool, float]:
+        with self._lock:
+            allowed, retry_after, state = algorithm(self._entries.get(key, []), rate, now)
+            self._entries[key] = state
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+        return allowed, retry_after
+
+
+# Slot: key hash, last used, number of state values, state values
+SLOT = struct.Struct(f"<Qdd{MAX_LOG_ENTRIES}d")
+
+
+class SharedBackend:
+    """State in a memory-mapped file shared by all workers on the host.
+
+    Keys hash into `slots` fixed-size slots with short linear probing; when all
+    probed slots belong to other keys the least recently used one is reused.
+    """
+
+    def __init__(self, path: str, slots: int):
+        self.path = path
+        self.slots = slots
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a+b")
+        size = slots * SLOT.size
+        if os.fstat(self._file.fileno()).st_size < size:
+            self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+        # flock only excludes other processes; threads of this one share the descriptor
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, algorithm: Algorithm, rate: Rate, now: float) -> Tuple[bool, float]:
+        key_hash = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+        with self._lock:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            try:
+                offset, state = self._find(key_hash)
+                allowed, retry_after, state = algorithm(state, rate, now)
+                state = state[-MAX_LOG_ENTRIES:]
+                padded = state + [0.0] * (MAX_LOG_ENTRIES - len(state))
+                SLOT.pack_into(self._map, offset, key_hash, now, len(state), *padded)
+            finally:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        return allowed, retry_after
+
+    def _find(self, key_hash: int) -> Tuple[int, List[float]]:
+        start = key_hash % self.slots
+        victim, victim_used = None, None
+        for i in range(SHARED_PROBE_SLOTS):
+            offset = ((start + i) % self.slots) * SLOT.size
+            slot_hash, used, count, *values = SLOT.unpack_from(self._map, offset)
+            if slot_hash == key_hash:
+                return offset, list(values[:int(count)])
+            if victim_used is None or used < victim_used:
+                victim, victim_used = offset, used
+        return victim, []
+
+
+class RateLimiter:
+    def __init__(self, backend):
+        self.backend = backend
+        self.rejected = 0
+
+    def hit(self, key: str, algorithm: str, rate: Rate) -> float:
+        """Count one hit for `key`; returns 0 if allowed, else seconds until it would be."""
+        allowed, retry_after = self.backend.hit(key, ALGORITHMS[algorithm], rate, time.time())
+        if allowed:
+            return 0.0
+        self.rejected += 1
+        return max(retry_after, 0.001)
+
+
+def create_rate_limiter() -> RateLimiter:
+    if settings.RATE_LIMIT_BACKEND == "shared":
+        path = settings.RATE_LIMIT_SHARED_PATH
+        if not os.path.isdir(os.path.dirname(path)):
+            # No /dev/shm (macOS); a file under /tmp stays in the page cache anyway
+            path = os.path.join(tempfile.gettempdir(), os.path.basename(path))
+        return RateLimiter(SharedBackend(path, settings.RATE_LIMIT_SHARED_SLOTS))
+    return RateLimiter(LocalBackend(settings.RATE_LIMIT_LOCAL_MAX_KEYS))
+
+
+rate_limiter = create_rate_limiter()
@@ -0,0 +1,357 @@
+"""
+Real-time push to connected clients.
+
+Services call publish_to_user() from any thread after committing. The message goes
+through a broker so that every worker process sees it, and each worker delivers it
+to the WebSockets it holds locally.
+
+Brokers:
+    local - in-process only; enough for a single worker
+    unix  - every worker binds a datagram socket in REALTIME_SOCKET_DIR and
+            publishers send to all sockets found there. No extra service needed,
+            works for workers on one host; CLI scripts can publish too.
+"""
+import asyncio
+import glob
+import json
+import os
+import socket
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import WebSocket
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+
+NOTIFICATION = "notification"
+CHAT_MESSAGE = "chat_message"
+
+Message = Dict[str, Any]
+Deliver = Callable[[Message], None]
+
+# Linux default max datagram size is well above this; larger messages are dropped
+MAX_DATAGRAM_BYTES = 64 * 1024
+# How long a publisher off the event loop waits for a busy worker's socket
+PUBLISH_TIMEOUT_SECONDS = 1.0
+
+DROP_OLDEST = "drop_oldest"
+DISCONNECT = "disconnect"
+
+# Queued in place of a message to make the transport close the connection
+CLOSE = None
+
+
+class Subscription:
+    """Bounded outbound queue for one client connection (WebSocket or SSE).
+
+    When the client falls behind, the policy decides: drop_oldest discards the
+    oldest message and sets `overflowed` so the transport can ask the client to
+    resync; disconnect evicts the connection.
+    """
+
+    def __init__(self, user_id: int, maxsize: int, policy: str = DROP_OLDEST):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.policy = policy
+        self.dropped = 0
+        self.overflowed = False
+        self.closed = False
+
+    def offer(self, message: Message) -> bool:
+        """Queue a message; False if the connection has to be evicted instead."""
+        if self.closed:
+            return True
+        if self.queue.full():
+            self.dropped += 1
+            if self.policy == DISCONNECT:
+                return False
+            self.queue.get_nowait()
+            self.overflowed = True
+        self.queue.put_nowait(message)
+        return True
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(CLOSE)
+
+
+class ConnectionManager:
+    """Client connections held by this worker, keyed by user id. Event-loop thread only."""
+
+    def __init__(self, max_per_user: int = 0):
+        self.max_per_user = max_per_user
+        # Insertion-ordered so the oldest connection is evicted first
+        self.subscriptions: Dict[int, Dict[Subscription, None]] = {}
+        self.counters = {
+            "delivered": 0,
+            "dropped": 0,
+            "evicted_slow": 0,
+            "evicted_limit": 0,
+        }
+
+    def subscribe(self, user_id: int, maxsize: int, policy: str = DROP_OLDEST) -> Subscription:
+        subs = self.subscriptions.setdefault(user_id, {})
+        while self.max_per_user and len(subs) >= self.max_per_user:
+            oldest = next(iter(subs))
+            del subs[oldest]
+            oldest.close()
+            self.counters["evicted_limit"] += 1
+        subscription = Subscription(user_id, maxsize, policy)
+        subs[subscription] = None
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subs = self.subscriptions.get(subscription.user_id)
+        if subs is None:
+            return
+        subs.pop(subscription, None)
+        if not subs:
+            self.subscriptions.pop(subscription.user_id, None)
+
+    def deliver(self, message: Message) -> None:
+        for subscription in list(self.subscriptions.get(message.get("user_id"), ())):
+            dropped = subscription.dropped
+            if subscription.offer(message):
+                self.counters["delivered"] += 1
+            else:
+                self.counters["evicted_slow"] += 1
+                self.unsubscribe(subscription)
+                subscription.close()
+            self.counters["dropped"] += subscription.dropped - dropped
+
+    def stats(self) -> Dict[str, Any]:
+        depths = [sub.queue.qsize() for subs in self.subscriptions.values() for sub in subs]
+        return {
+            "users": len(self.subscriptions),
+            "connections": len(depths),
+            "queued": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            **self.counters,
+        }
+
+
+async def serve_websocket(websocket: WebSocket, user_id: int) -> None:
+    """Run an accepted notifications WebSocket until it closes.
+
+    A sender task drains the connection's bounded queue, sending an application
+    ping when idle so proxies keep the connection open. Clients do not have to
+    send anything: dead peers are found by the server's protocol-level ping/pong
+    (uvicorn --ws-ping-interval / --ws-ping-timeout), which closes the socket and
+    ends the receive loop, and by sends that miss WS_SEND_TIMEOUT_SECONDS.
+    """
+    subscription = connections.subscribe(user_id, settings.WS_SEND_QUEUE_SIZE, settings.WS_OVERFLOW_POLICY)
+    sender = asyncio.create_task(_send_loop(websocket, subscription))
+    receiver = asyncio.create_task(_receive_loop(websocket))
+    try:
+        await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+    except Exception:
+        # Disconnected
+        pass
+    finally:
+        connections.unsubscribe(subscription)
+        sender.cancel()
+        receiver.cancel()
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+
+
+async def _receive_loop(websocket: WebSocket) -> None:
+    # Inbound frames carry nothing we act on; returns once the client disconnects
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+    except Exception:
+        return
+
+
+async def _send_loop(websocket: WebSocket, subscription: Subscription) -> None:
+    while True:
+        try:
+            message = await asyncio.wait_for(subscription.queue.get(), timeout=settings.WS_PING_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            message = {"type": "ping"}
+        if message is CLOSE:
+            await websocket.close(code=1008)
+            return
+        if subscription.overflowed:
+            subscription.overflowed = False
+            await asyncio.wait_for(websocket.send_json({"type": "resync"}), timeout=settings.WS_SEND_TIMEOUT_SECONDS)
+        # A client that cannot take a frame within the timeout is dropped
+        await asyncio.wait_for(websocket.send_json(message), timeout=settings.WS_SEND_TIMEOUT_SECONDS)
+
+
+class LocalBroker:
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._deliver: Optional[Deliver] = None
+
+    async def start(self, deliver: Deliver) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._deliver = deliver
+
+    async def stop(self) -> None:
+        self._loop = None
+        self._deliver = None
+
+    def publish(self, messages: List[Message]) -> None:
+        loop, deliver = self._loop, self._deliver
+        if loop is None or deliver is None:
+            return
+        for message in messages:
+            loop.call_soon_threadsafe(_schedule, deliver, message)
+
+
+class UnixSocketBroker:
+    def __init__(self, socket_dir: str):
+        self.socket_dir = socket_dir
+        self._sock: Optional[socket.socket] = None
+        self._path: Optional[str] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self, deliver: Deliver) -> None:
+        os.makedirs(self.socket_dir, exist_ok=True)
+        self._path = os.path.join(self.socket_dir, f"worker-{os.getpid()}.sock")
+        if os.path.exists(self._path):
+            os.unlink(self._path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(self._path)
+        sock.setblocking(False)
+        self._sock = sock
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(sock.fileno(), self._drain, deliver)
+
+    async def stop(self) -> None:
+        if self._sock is None:
+            return
+        self._loop.remove_reader(self._sock.fileno())
+        self._sock.close()
+        self._sock = None
+        if self._path and os.path.exists(self._path):
+            os.unlink(self._path)
+
+    def _drain(self, deliver: Deliver) -> None:
+        while True:
+            try:
+                data = self._sock.recv(MAX_DATAGRAM_BYTES)
+            except (BlockingIOError, InterruptedError):
+                return
+            try:
+                messages = json.loads(data)
+            except json.JSONDecodeError:
+                continue
+            for message in messages:
+                _schedule(deliver, message)
+
+    def publish(self, messages: List[Message]) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is None:
+            self._send(messages)
+            return
+        # Never wait for a busy worker's socket on the event loop
+        future = loop.run_in_executor(None, self._send, messages)
+        future.add_done_callback(_log_publish_failure)
+
+    def _send(self, messages: List[Message]) -> None:
+        paths = glob.glob(os.path.join(self.socket_dir, "worker-*.sock"))
+        dropped = 0
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sender:
+            # A busy worker gets a moment to drain its socket before we give up on it
+            sender.settimeout(PUBLISH_TIMEOUT_SECONDS)
+            for data in _pack(messages):
+                for path in list(paths):
+                    try:
+                        sender.sendto(data, path)
+                    except (ConnectionRefusedError, FileNotFoundError):
+                        # Worker died without cleaning up
+                        _unlink_quietly(path)
+                        paths.remove(path)
+                    except (socket.timeout, BlockingIOError):
+                        dropped += 1
+        if dropped:
+            print(f"⚠️ Real-time queues full, {dropped} datagrams dropped")
+
+
+def _pack(messages: List[Message]) -> Iterable[bytes]:
+    """Encode messages as JSON arrays, as many per datagram as fit."""
+    batch: List[bytes] = []
+    size = 2
+    for message in messages:
+        data = json.dumps(message).encode()
+        if len(data) + 2 > MAX_DATAGRAM_BYTES:
+            print(f"⚠️ Dropping real-time message of {len(data)} bytes")
+            continue
+        if batch and size + len(data) + 1 > MAX_DATAGRAM_BYTES:
+            yield b"[" + b",".join(batch) + b"]"
+            batch, size = [], 2
+        batch.append(data)
+        size += len(data) + 1
+    if batch:
+        yield b"[" + b",".join(batch) + b"]"
+
+
+def _schedule(deliver: Deliver, message: Message) -> None:
+    try:
+        deliver(message)
+    except Exception as e:
+        print(f"❌ Real-time delivery failed: {e}")
+
+
+def _log_publish_failure(future: asyncio.Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        print(f"❌ Real-time publish failed: {future.exception()}")
+
+
+def _unlink_quietly(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def create_broker():
+    if settings.REALTIME_BROKER == "unix":
+        return UnixSocketBroker(settings.REALTIME_SOCKET_DIR)
+    return LocalBroker()
+
+
+connections = ConnectionManager(max_per_user=settings.WS_MAX_CONNECTIONS_PER_USER)
+broker = create_broker()
+
+
+def format_sse(message: Message) -> str:
+    """Render a message as an SSE frame; notification frames carry their id for resume."""
+    lines = []
+    data = message.get("data") or {}
+    if message.get("type") == NOTIFICATION and isinstance(data, dict) and data.get("id") is not None:
+        lines.append(f"id: {data['id']}")
+    lines.append(f"event: {message.get('type', 'message')}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def publish_to_user(user_id: int, event_type: str, data: Any) -> None:
+    """Push an event to every connected session of a user, on any worker."""
+    publish_to_users([(user_id, event_type, data)])
+
+
+def publish_to_users(items: Iterable[Tuple[int, str, Any]]) -> None:
+    """Push a batch of (user_id, event_type, data) events in one broker call."""
+    try:
+        broker.publish([
+            {"user_id": user_id, "type": event_type, "data": jsonable_encoder(data)}
+            for user_id, event_type, data in items
+        ])
+    except Exception as e:
+        # Real-time push is best effort; clients still see the data on their next fetch
+        print(f"❌ Real-time publish failed: {e}")
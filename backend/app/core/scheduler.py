@@ -0,0 +1,69 @@
+"""
+Lightweight in-process scheduler for periodic background jobs
+"""
+import asyncio
+import inspect
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class PeriodicTask:
+    name: str
+    interval_seconds: float
+    func: Callable[[], Any]
+    run_on_start: bool = False
+    last_result: Any = None
+    last_error: Optional[str] = None
+    runs: int = 0
+
+
+@dataclass
+class Scheduler:
+    """Runs registered jobs on fixed intervals inside the app's event loop.
+
+    Sync jobs run in a worker thread so they never block request handling.
+    Every uvicorn worker runs its own scheduler; set SCHEDULER_ENABLED=false
+    on all but one worker (or run the CLI scripts from cron) to avoid duplicate runs.
+    """
+    tasks: Dict[str, PeriodicTask] = field(default_factory=dict)
+    _handles: List[asyncio.Task] = field(default_factory=list)
+
+    def register(self, name: str, interval_seconds: float, func: Callable[[], Any], run_on_start: bool = False) -> None:
+        self.tasks[name] = PeriodicTask(name, interval_seconds, func, run_on_start)
+
+    async def run_once(self, name: str) -> Any:
+        task = self.tasks[name]
+        try:
+            if inspect.iscoroutinefunction(task.func):
+                task.last_result = await task.func()
+            else:
+                task.last_result = await asyncio.to_thread(task.func)
+            task.last_error = None
+        except Exception as e:
+            task.last_error = str(e)
+            print(f"❌ Scheduled task '{name}' failed: {e}")
+        task.runs += 1
+        return task.last_result
+
+    async def _loop(self, task: PeriodicTask) -> None:
+        if not task.run_on_start:
+            await asyncio.sleep(task.interval_seconds)
+        while True:
+            await self.run_once(task.name)
+            await asyncio.sleep(task.interval_seconds)
+
+    def start(self) -> None:
+        if self._handles:
+            return
+        for task in self.tasks.values():
+            self._handles.append(asyncio.create_task(self._loop(task), name=f"scheduler:{task.name}"))
+
+    async def stop(self) -> None:
+        for handle in self._handles:
+            handle.cancel()
+        await asyncio.gather(*self._handles, return_exceptions=True)
+        self._handles.clear()
+
+
+scheduler = Scheduler()
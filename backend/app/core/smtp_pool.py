@@ -0,0 +1,141 @@
+"""
+Pool of authenticated SMTP connections.
+
+smtplib is blocking, so sends run on a small dedicated thread pool. A connection
+is opened (connect, STARTTLS, login) once and reused for later messages. Idle
+connections are dropped after `idle_seconds`, and ones idle for a while are
+checked with NOOP before reuse; servers close quiet sessions on their own.
+"""
+import asyncio
+import smtplib
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+# Connections idle for longer than this get a NOOP before they are reused
+HEALTH_CHECK_AFTER_SECONDS = 10
+
+
+class SMTPConnectionPool:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        size: int = 4,
+        idle_seconds: float = 60,
+        timeout: float = 30,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size
+        self.idle_seconds = idle_seconds
+        self.timeout = timeout
+        self.opened = 0
+        self._idle: List[Tuple[smtplib.SMTP, float]] = []
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._context = ssl.create_default_context()
+
+    async def send(self, from_addr: str, to_addrs: List[str], message: str) -> None:
+        """Send one message on a pooled connection; raises on failure."""
+        if self._executor is None:
+            # One thread per connection: the pool never holds more than `size` sessions
+            self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix=f"smtp-{self.host}")
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._send, from_addr, to_addrs, message)
+
+    async def check(self) -> None:
+        """Open and authenticate a fresh session; raises if the server is not usable."""
+        conn = await asyncio.to_thread(self._connect)
+        self._release(conn)
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            _quit_quietly(conn)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _send(self, from_addr: str, to_addrs: List[str], message: str) -> None:
+        conn, reused = self._acquire()
+        try:
+            conn.sendmail(from_addr, to_addrs, message)
+        except smtplib.SMTPServerDisconnected:
+            _quit_quietly(conn)
+            if not reused:
+                raise
+            # The server dropped a pooled session between our check and the send
+            conn, reused = self._connect(), False
+            try:
+                conn.sendmail(from_addr, to_addrs, message)
+            except Exception:
+                _quit_quietly(conn)
+                raise
+        except smtplib.SMTPRecipientsRefused:
+            # The session itself is fine
+            self._release(conn)
+            raise
+        except Exception:
+            _quit_quietly(conn)
+            raise
+        self._release(conn)
+
+    def _acquire(self) -> Tuple[smtplib.SMTP, bool]:
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn, released_at = self._idle.pop()
+            idle_for = now - released_at
+            if idle_for > self.idle_seconds:
+                _quit_quietly(conn)
+                continue
+            if idle_for > HEALTH_CHECK_AFTER_SECONDS and not _is_alive(conn):
+                _quit_quietly(conn)
+                continue
+            return conn, True
+        return self._connect(), False
+
+    def _release(self, conn: smtplib.SMTP) -> None:
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append((conn, time.monotonic()))
+                return
+        _quit_quietly(conn)
+
+    def _connect(self) -> smtplib.SMTP:
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            conn.starttls(context=self._context)
+            conn.login(self.username, self.password)
+        except Exception:
+            _quit_quietly(conn)
+            raise
+        self.opened += 1
+        return conn
+
+
+def _is_alive(conn: smtplib.SMTP) -> bool:
+    try:
+        return conn.noop()[0] == 250
+    except Exception:
+        return False
+
+
+def _quit_quietly(conn: smtplib.SMTP) -> None:
+    try:
+        conn.quit()
+    except Exception:
+        try:
+            conn.close()
+        except Exception:
+            pass
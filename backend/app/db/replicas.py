@@ -0,0 +1,198 @@
+"""
+Read replicas for read-only service methods.
+
+DATABASE_READ_URLS lists replica URLs. Async service methods marked @read_only run
+on a replica session instead of the request's primary session. Replicas are picked
+round-robin among those that passed their last health check: reachable within
+DATABASE_REPLICA_CHECK_TIMEOUT_SECONDS and at most DATABASE_REPLICA_MAX_LAG_SECONDS
+behind. Checks run on every worker every DATABASE_REPLICA_CHECK_SECONDS.
+
+A method stays on the primary when there is no healthy replica, or when the
+request's session has written (pending or flushed changes), so a request reads
+its own writes. A read-only method called from another one runs on the caller's
+replica session. A call that fails on a replica with OperationalError,
+InterfaceError or OSError is retried on the primary. Only connection-level
+failures (refused or dropped connections) mark the replica down until its next
+passing check; a single failing statement, such as a query cancelled by a
+conflict with recovery, does not.
+
+Only mark methods that never write, including through the helpers they call.
+"""
+import asyncio
+import functools
+import itertools
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import async_database_url, pool_options
+
+# session.info keys
+ON_REPLICA = "on_replica"
+WROTE = "wrote"
+
+# Seconds of replay lag; 0 when caught up with everything received (an idle
+# primary would otherwise make the replay timestamp look old)
+POSTGRES_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_wrote(session: Session, flush_context: Any) -> None:
+    session.info[WROTE] = True
+
+
+class Replica:
+    def __init__(self, url: str):
+        self.url = async_database_url(url)
+        self.engine = create_async_engine(
+            self.url,
+            echo=settings.DEBUG,
+            **pool_options(self.url, settings.DB_ASYNC_POOL_SIZE, settings.DB_ASYNC_MAX_OVERFLOW),
+        )
+        self.sessions = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        # Unknown until the first check
+        self.healthy = False
+        self.lag: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.reads = 0
+
+    @property
+    def name(self) -> str:
+        return self.engine.url.render_as_string(hide_password=True)
+
+
+class ReplicaRouter:
+    def __init__(self, urls: List[str], max_lag: float):
+        self.replicas = [Replica(url) for url in urls]
+        self.max_lag = max_lag
+        self.primary_reads = 0
+        self._turn = itertools.count()
+
+    def pick(self) -> Optional[Replica]:
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._turn) % len(healthy)]
+
+    async def check(self) -> int:
+        """Refresh every replica's health and lag; returns how many are usable."""
+        await asyncio.gather(*(self._check(replica) for replica in self.replicas))
+        return sum(replica.healthy for replica in self.replicas)
+
+    def mark_down(self, replica: Replica, error: Exception) -> None:
+        # The driver's message, without the SQL that SQLAlchemy appends
+        reason = str(getattr(error, "orig", None) or error)
+        if replica.healthy:
+            print(f"⚠️ Read replica {replica.name} unavailable, reading from primary: {reason}")
+        replica.healthy = False
+        replica.last_error = reason
+
+    def record_failure(self, replica: Replica, error: Exception) -> None:
+        if _connection_lost(error):
+            self.mark_down(replica, error)
+        else:
+            print(f"⚠️ Read on replica {replica.name} failed, retrying on primary: {getattr(error, 'orig', None) or error}")
+        self.primary_reads += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "primary_reads": self.primary_reads,
+            "replicas": [
+                {
+                    "url": replica.name,
+                    "healthy": replica.healthy,
+                    "lag_seconds": replica.lag,
+                    "reads": replica.reads,
+                    "last_error": replica.last_error,
+                }
+                for replica in self.replicas
+            ],
+        }
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    async def _check(self, replica: Replica) -> None:
+        try:
+            lag = await asyncio.wait_for(self._lag(replica), settings.DATABASE_REPLICA_CHECK_TIMEOUT_SECONDS)
+        except Exception as e:
+            self.mark_down(replica, e)
+            return
+        replica.lag = lag
+        if lag > self.max_lag:
+            self.mark_down(replica, RuntimeError(f"{lag:.1f}s behind"))
+            return
+        if not replica.healthy:
+            print(f"✅ Read replica {replica.name} is serving reads")
+        replica.healthy = True
+        replica.last_error = None
+
+    @staticmethod
+    async def _lag(replica: Replica) -> float:
+        async with replica.engine.connect() as conn:
+            if conn.dialect.name == "postgresql":
+                return float(await conn.scalar(POSTGRES_LAG_QUERY) or 0)
+            await conn.execute(text("SELECT 1"))
+            return 0.0
+
+
+replica_router = ReplicaRouter(
+    [url.strip() for url in settings.DATABASE_READ_URLS.split(",") if url.strip()],
+    settings.DATABASE_REPLICA_MAX_LAG_SECONDS,
+)
+
+
+def _connection_lost(error: Exception) -> bool:
+    # asyncpg raises OSError unwrapped when it cannot connect at all
+    return isinstance(error, (InterfaceError, OSError)) or getattr(error, "connection_invalidated", False)
+
+
+def _on_replica(db: Any) -> bool:
+    return isinstance(db, AsyncSession) and bool(db.info.get(ON_REPLICA))
+
+
+def _may_leave_primary(db: Any) -> bool:
+    return (
+        isinstance(db, AsyncSession)
+        and not db.info.get(WROTE)
+        and not (db.new or db.dirty or db.deleted)
+    )
+
+
+def read_only(method):
+    """Run an async service method (whose service keeps its session in `self.db`) on a replica."""
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        if not replica_router.replicas or _on_replica(self.db):
+            return await method(self, *args, **kwargs)
+        primary = self.db
+        replica = replica_router.pick() if _may_leave_primary(primary) else None
+        if replica is None:
+            replica_router.primary_reads += 1
+            return await method(self, *args, **kwargs)
+        try:
+            async with replica.sessions() as session:
+                session.info[ON_REPLICA] = True
+                self.db = session
+                try:
+                    result = await method(self, *args, **kwargs)
+                finally:
+                    self.db = primary
+            replica.reads += 1
+            return result
+        except (OperationalError, InterfaceError, OSError) as e:
+            replica_router.record_failure(replica, e)
+            return await method(self, *args, **kwargs)
+
+    return wrapper
@@ -1,5 +1,4 @@
-from collections.abc import AsyncIterator
-from typing import AsyncGenerator, Generator
+from typing import Any, AsyncGenerator, Dict, Generator
 from sqlalchemy import create_engine
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlmodel import Session
@@ -8,31 +7,59 @@ import os
 from app.core.config import settings
 
 
+def pool_options(database_url: str, pool_size: int, max_overflow: int) -> Dict[str, Any]:
+    # SQLite gets SQLAlchemy's default pool; sizing only matters for a server
+    if database_url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": True,
+    }
+
+
 def get_engine():
     # Use environment variable if available, otherwise use settings
     database_url = os.getenv("DATABASE_URL", settings.DATABASE_URL)
     print(f"Database URL: {database_url}")
-    return create_engine(database_url, echo=settings.DEBUG)
+    return create_engine(
+        database_url,
+        echo=settings.DEBUG,
+        **pool_options(database_url, settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW),
+    )
 
 
-def get_async_engine():
-    # Convert postgresql:// to postgresql+asyncpg:// for async support
-    database_url = os.getenv("DATABASE_URL", settings.DATABASE_URL)
+def async_database_url(database_url: str) -> str:
+    # Same database through an async driver: asyncpg for Postgres, aiosqlite for SQLite
     if database_url.startswith("postgresql://"):
-        database_url = database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
-    elif database_url.startswith("postgresql+psycopg2://"):
-        database_url = database_url.replace("postgresql+psycopg2://", "postgresql+asyncpg://", 1)
-    
+        return database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if database_url.startswith("postgresql+psycopg2://"):
+        return database_url.replace("postgresql+psycopg2://", "postgresql+asyncpg://", 1)
+    if database_url.startswith("sqlite://"):
+        return database_url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return database_url
+
+
+def get_async_engine():
+    database_url = async_database_url(os.getenv("DATABASE_URL", settings.DATABASE_URL))
     print(f"Async Database URL: {database_url}")
-    return create_async_engine(database_url, echo=settings.DEBUG)
+    return create_async_engine(
+        database_url,
+        echo=settings.DEBUG,
+        **pool_options(database_url, settings.DB_ASYNC_POOL_SIZE, settings.DB_ASYNC_MAX_OVERFLOW),
+    )
 
 
 engine = get_engine()
-# async_engine = get_async_engine()  # Commented out since we're not using async sessions
-# async_session_maker = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+async_engine = get_async_engine()
+# Objects stay readable after commit without another round trip (no lazy loads in async code)
+async_session_maker = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
 
 
 def get_db_session() -> Generator[Session, None, None]:
+    """Sync session, for `def` endpoints (FastAPI runs those in its threadpool)."""
     try:
         with Session(engine) as session:
             yield session
@@ -42,6 +69,7 @@ def get_db_session() -> Generator[Session, None, None]:
 
 
 async def get_async_db_session() -> AsyncGenerator[AsyncSession, None]:
+    """Async session, for `async def` endpoints and services that await the database."""
     async with async_session_maker() as session:
         try:
             yield session
@@ -49,7 +77,3 @@ async def get_async_db_session() -> AsyncGenerator[AsyncSession, None]:
             print(f"Async database session error: {e}")
             await session.rollback()
             raise
-        finally:
-            await session.close()
-
-
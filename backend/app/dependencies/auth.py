@@ -1,28 +1,36 @@
-from fastapi import Depends, HTTPException, status, Request
+import asyncio
+from typing import Optional
+
+from fastapi import Depends, HTTPException, status
+from starlette.requests import HTTPConnection
 from sqlmodel import Session, select
-from app.db.session import get_db_session
+from app.db.session import engine, get_db_session
 from app.models.user import User
 from app.security.jwt import decode_token
+from app.security.principal import CurrentUser, user_principals
+from app.security.revocation import token_revocations
 from jwt import ExpiredSignatureError, InvalidTokenError
 
 
-def get_current_user(request: Request, db: Session = Depends(get_db_session)) -> User:
-    """Get current authenticated user from JWT token."""
+async def get_current_user(request: HTTPConnection) -> CurrentUser:
+    """Get current authenticated user from JWT token.
+
+    Returns a cached CurrentUser principal; the database is only read on a
+    cache miss. Use get_current_user_row when the full User row is needed.
+    """
+    return await _authenticate(request, allow_query_token=False)
+
+
+async def get_stream_user(request: HTTPConnection) -> CurrentUser:
+    """get_current_user for event streams: browsers' EventSource cannot set headers either,
+    so ?token= is accepted as well."""
+    return await _authenticate(request, allow_query_token=True)
+
+
+async def _authenticate(request: HTTPConnection, allow_query_token: bool) -> CurrentUser:
     try:
-        # Extract token from Authorization header
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Not authenticated"
-            )
-        
-        token = auth_header.split(" ")[1]
-        print(f"Token: {token[:20]}...")
-        
         # Decode the JWT token
-        payload = decode_token(token)
-        print(f"Payload: {payload}")
+        payload = decode_token(bearer_token(request, allow_query_token))
         user_id = payload.get("sub")
         
         if not user_id:
@@ -31,18 +39,28 @@ def get_current_user(request: Request, db: Session = Depends(get_db_session)) ->
                 detail="Invalid token"
             )
         
-        print(f"User ID: {user_id}")
-        
-        # Get user from database
-        user = db.exec(select(User).where(User.id == int(user_id))).first()
-        print(f"User found: {user is not None}")
-        print(f"User role: {user.role if user else 'None'}")
-        
-        if not user:
+        user_id = int(user_id)
+        iat = payload.get("iat", 0)
+        # Memory only, unless the revocation filter matches this token
+        revoked = token_revocations.check(user_id, payload.get("jti"), iat)
+        if revoked is None:
+            revoked = await asyncio.to_thread(token_revocations.lookup, user_id, payload.get("jti"), iat)
+        if revoked:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User not found"
+                detail="Token has been revoked"
             )
+
+        user = user_principals.get(user_id, iat)
+        if user is None:
+            generation = user_principals.generation()
+            user = await asyncio.to_thread(_load_principal, user_id)
+            if not user:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="User not found"
+                )
+            user_principals.set(user_id, iat, user, generation)
         
         return user
         
@@ -70,9 +88,54 @@ def get_current_user(request: Request, db: Session = Depends(get_db_session)) ->
         )
 
 
+def bearer_token(request: HTTPConnection, allow_query_token: bool = False) -> str:
+    """The raw JWT of the request."""
+    # Browsers cannot set headers on WebSocket handshakes, so those may pass ?token= instead
+    auth_header = request.headers.get("Authorization")
+    if auth_header and auth_header.startswith("Bearer "):
+        return auth_header.split(" ")[1]
+    if (allow_query_token or request.scope["type"] == "websocket") and request.query_params.get("token"):
+        return request.query_params["token"]
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Not authenticated"
+    )
+
+
+def get_current_user_row(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db_session)
+) -> User:
+    """The full User row of the authenticated user, attached to the request's session."""
+    user = db.get(User, current_user.id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    return user
+
+
+def _load_principal(user_id: int) -> Optional[CurrentUser]:
+    # Own short session: cache hits never check a connection out of the pool
+    with Session(engine) as session:
+        row = session.exec(
+            select(
+                User.id,
+                User.email,
+                User.role,
+                User.is_active,
+                User.is_email_verified,
+                User.first_name,
+                User.last_name,
+            ).where(User.id == user_id)
+        ).first()
+    return CurrentUser(*row) if row else None
+
+
 def require_role(allowed_roles: list):
     """Require specific roles for access"""
-    def role_checker(current_user: User = Depends(get_current_user)):
+    def role_checker(current_user: CurrentUser = Depends(get_current_user)):
         if current_user.role not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -0,0 +1,120 @@
+import ipaddress
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple, Union
+
+from fastapi import HTTPException, Request, status
+
+from app.core.config import settings
+from app.core.rate_limit import MAX_LOG_ENTRIES, SLIDING_WINDOW, Rate, rate_limiter
+from app.security.jwt import decode_token
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+BY_IP = "ip"
+BY_USER = "user"
+BY_EMAIL = "email"
+# Target email from one client address; a limit on the email alone lets anyone lock the account out
+BY_EMAIL_AND_IP = "email_ip"
+
+
+class Limit(NamedTuple):
+    by: str
+    algorithm: str
+    rate: Rate
+
+
+def limit(by: str, algorithm: str, rate: str) -> Limit:
+    parsed = Rate.parse(rate)
+    if settings.RATE_LIMIT_BACKEND == "shared" and algorithm == SLIDING_WINDOW and parsed.limit > MAX_LOG_ENTRIES:
+        raise ValueError(f"Sliding window limit {rate} exceeds {MAX_LOG_ENTRIES} for the shared backend")
+    return Limit(by, algorithm, parsed)
+
+
+def rate_limit(scope: str, *limits: Limit, email_field: str = "email"):
+    """Dependency that rejects with 429 once any of `limits` is exceeded.
+
+    Keys come from the client address, the `sub` of the bearer token (the user is
+    not loaded) and `email_field` of the JSON body, so no database access is needed.
+    Add it through `dependencies=[...]` so it runs before the auth dependencies.
+    """
+
+    async def check_rate_limit(request: Request) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        retry_after = 0.0
+        for rule in limits:
+            value = await _key_value(request, rule.by, email_field)
+            if value is None:
+                continue
+            retry_after = max(retry_after, rate_limiter.hit(f"{scope}:{rule.by}:{value}", rule.algorithm, rule.rate))
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests. Please try again later.",
+                headers={"Retry-After": str(int(retry_after) + 1)},
+            )
+
+    return check_rate_limit
+
+
+def client_ip(request: Request) -> Optional[str]:
+    """The client's address, read from X-Forwarded-For when the peer is a trusted proxy.
+
+    The header is walked right to left past trusted proxies; the first other
+    address is the client. Entries left of it came from the client and are ignored.
+    """
+    if request.client is None:
+        return None
+    host = request.client.host
+    networks = _trusted_networks(settings.RATE_LIMIT_TRUSTED_PROXIES)
+    if not _is_trusted(host, networks):
+        return host
+    forwarded = ",".join(request.headers.getlist("X-Forwarded-For"))
+    for hop in reversed(forwarded.split(",")):
+        hop = hop.strip()
+        if not hop:
+            continue
+        host = hop
+        if not _is_trusted(hop, networks):
+            break
+    return host
+
+
+@lru_cache(maxsize=4)
+def _trusted_networks(proxies: str) -> Tuple[Network, ...]:
+    return tuple(ipaddress.ip_network(proxy.strip(), strict=False) for proxy in proxies.split(",") if proxy.strip())
+
+
+def _is_trusted(host: str, networks: Tuple[Network, ...]) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+
+async def _key_value(request: Request, by: str, email_field: str) -> Optional[str]:
+    if by == BY_EMAIL_AND_IP:
+        email = await _key_value(request, BY_EMAIL, email_field)
+        ip = await _key_value(request, BY_IP, email_field)
+        return f"{email}|{ip}" if email and ip else None
+    if by == BY_IP:
+        return client_ip(request)
+    if by == BY_USER:
+        auth_header = request.headers.get("Authorization", "")
+        if not auth_header.startswith("Bearer "):
+            return None
+        try:
+            return str(decode_token(auth_header[7:]).get("sub") or "") or None
+        except Exception:
+            # The auth dependency rejects it
+            return None
+    if by == BY_EMAIL:
+        try:
+            # FastAPI has already parsed the body; Starlette caches it
+            body = await request.json()
+        except Exception:
+            return None
+        email = body.get(email_field) if isinstance(body, dict) else None
+        return email.strip().lower() if isinstance(email, str) else None
+    raise ValueError(f"Unknown rate limit key: {by}")
@@ -1,11 +1,116 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi import WebSocket, WebSocketDisconnect, Depends
+from fastapi import WebSocket, Depends
+from sqlmodel import Session
 
 from app.core.config import settings
+from app.core.email_templates import email_templates
+from app.core.realtime import broker, connections, serve_websocket
+from app.core.scheduler import scheduler
 from app.api.v1.router import api_router_v1
-from app.dependencies.auth import get_current_user
-from app.models.user import User
+from app.db.session import async_engine, get_db_session
+from app.db.replicas import replica_router
+from app.dependencies.auth import CurrentUser, get_current_user
+from app.services.email_outbox_service import email_dispatcher, run_email_outbox_cleanup
+from app.services.otp_store import run_otp_cleanup
+from app.services.email_service import email_service
+from app.security.passwords import password_hasher
+from app.security.revocation import run_token_revocation_cleanup, run_token_revocation_refresh
+from app.services.fraud_stream_service import fraud_engine, run_fraud_alert_flush, run_fraud_rules_reload
+from app.services.notification_digest_service import run_notification_email_digest
+from app.services.notification_retention_service import run_notification_retention
+from app.services.referral_graph_service import run_collusion_detection
+from app.services.trust_history_service import run_trust_history_compaction
+from app.services.trust_recompute_service import run_bulk_trust_recompute
+
+
+def register_worker_jobs() -> None:
+    """Jobs that maintain this worker's in-memory state; every worker runs them."""
+    scheduler.register("fraud_alert_flush", settings.FRAUD_STREAM_FLUSH_SECONDS, run_fraud_alert_flush)
+    scheduler.register("fraud_checkpoint", settings.FRAUD_STREAM_CHECKPOINT_SECONDS, fraud_engine.checkpoint)
+    scheduler.register("fraud_rules_reload", settings.FRAUD_RULES_RELOAD_SECONDS, run_fraud_rules_reload)
+    scheduler.register(
+        "token_revocation_refresh",
+        settings.TOKEN_REVOCATION_REFRESH_SECONDS,
+        run_token_revocation_refresh,
+        run_on_start=True,
+    )
+    if replica_router.replicas:
+        scheduler.register(
+            "replica_health_check",
+            settings.DATABASE_REPLICA_CHECK_SECONDS,
+            replica_router.check,
+            run_on_start=True,
+        )
+
+
+def register_background_jobs() -> None:
+    """Global batch jobs; only needed on one worker."""
+    scheduler.register(
+        "trust_recompute",
+        settings.TRUST_RECOMPUTE_INTERVAL_HOURS * 3600,
+        run_bulk_trust_recompute,
+    )
+    scheduler.register(
+        "trust_history_compaction",
+        settings.TRUST_HISTORY_COMPACTION_INTERVAL_HOURS * 3600,
+        run_trust_history_compaction,
+    )
+    scheduler.register(
+        "collusion_detection",
+        settings.COLLUSION_DETECTION_INTERVAL_HOURS * 3600,
+        run_collusion_detection,
+    )
+    scheduler.register(
+        "notification_email_digest",
+        settings.NOTIFICATION_EMAIL_DIGEST_INTERVAL_HOURS * 3600,
+        run_notification_email_digest,
+    )
+    scheduler.register(
+        "notification_retention",
+        settings.NOTIFICATION_RETENTION_INTERVAL_HOURS * 3600,
+        run_notification_retention,
+    )
+    scheduler.register(
+        "email_outbox_cleanup",
+        settings.EMAIL_OUTBOX_CLEANUP_INTERVAL_HOURS * 3600,
+        run_email_outbox_cleanup,
+    )
+    scheduler.register(
+        "otp_cleanup",
+        settings.OTP_CLEANUP_INTERVAL_MINUTES * 60,
+        run_otp_cleanup,
+    )
+    scheduler.register(
+        "token_revocation_cleanup",
+        settings.TOKEN_REVOCATION_CLEANUP_INTERVAL_MINUTES * 60,
+        run_token_revocation_cleanup,
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    email_templates.load()
+    await broker.start(connections.deliver)
+    email_service.router.start()
+    await email_dispatcher.start()
+    await asyncio.to_thread(fraud_engine.start)
+    register_worker_jobs()
+    if settings.SCHEDULER_ENABLED:
+        register_background_jobs()
+    scheduler.start()
+    yield
+    await scheduler.stop()
+    await asyncio.to_thread(fraud_engine.stop)
+    await email_dispatcher.stop()
+    await email_service.aclose()
+    password_hasher.close()
+    await async_engine.dispose()
+    await replica_router.dispose()
+    await broker.stop()
 
 
 def create_app() -> FastAPI:
@@ -15,6 +120,7 @@ def create_app() -> FastAPI:
         openapi_url="/openapi.json",
         docs_url="/docs",
         redoc_url="/redoc",
+        lifespan=lifespan,
     )
 
     app.add_middleware(
@@ -31,24 +137,18 @@ def create_app() -> FastAPI:
 
     app.include_router(api_router_v1, prefix="/api/v1")
 
-    # In-memory connection mapping (demo only; replace with Redis pub/sub for scale)
-    user_connections: dict[int, set[WebSocket]] = {}
-
+    # Pushes arrive through the real-time broker; each worker serves its own sockets
     @app.websocket("/ws/notifications")
-    async def notifications_ws(websocket: WebSocket, user: User = Depends(get_current_user)):
+    async def notifications_ws(
+        websocket: WebSocket,
+        user: CurrentUser = Depends(get_current_user),
+        db: Session = Depends(get_db_session),
+    ):
+        user_id = user.id
+        # Do not hold a pooled connection for the lifetime of the socket
+        db.close()
         await websocket.accept()
-        user_set = user_connections.setdefault(user.id, set())
-        user_set.add(websocket)
-        try:
-            while True:
-                # Keep connection alive; no inbound messages expected
-                await websocket.receive_text()
-        except WebSocketDisconnect:
-            pass
-        finally:
-            user_set.discard(websocket)
-            if not user_set:
-                user_connections.pop(user.id, None)
+        await serve_websocket(websocket, user_id)
 
     return app
 
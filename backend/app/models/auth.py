@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+from sqlmodel import SQLModel, Field
+
+
+class RevokedToken(SQLModel, table=True):
+    """A revoked JWT (jti set) or a user's "revoke all sessions" cutoff (jti empty).
+
+    Kept until `expires_at`, after which the token(s) it covers are expired anyway.
+    """
+    __tablename__ = "revoked_tokens"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    jti: Optional[str] = Field(default=None, max_length=64, unique=True)
+    user_id: int = Field(index=True)
+    # Without a jti: every token of the user issued at or before this is revoked
+    revoked_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime = Field(index=True)
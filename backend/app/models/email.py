@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Index
+from sqlmodel import Field
+
+from .base import TimestampedModel
+
+
+class EmailOutbox(TimestampedModel, table=True):
+    """Outgoing email, written in the caller's transaction and sent by the dispatcher."""
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        # Claim query: WHERE status AND next_attempt_at <= now ORDER BY priority, next_attempt_at
+        Index("ix_email_outbox_status_priority_next_attempt_at", "status", "priority", "next_attempt_at"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    to_email: str = Field(max_length=255)
+    subject: str = Field(max_length=500)
+    html_content: str
+    text_content: str = Field(default="")
+    # Template the body was rendered from and its context as JSON (bulk emails only)
+    template: Optional[str] = Field(default=None, max_length=100)
+    template_context: Optional[str] = Field(default=None)
+    # Lower is sent first (see email_outbox_service.PRIORITY_*)
+    priority: int = Field(default=50)
+    # pending, sending, sent, dead
+    status: str = Field(default="pending", max_length=20)
+    attempts: int = Field(default=0)
+    max_attempts: int = Field(default=8)
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow)
+    # A "sending" row whose lease ran out belongs to a crashed worker and is claimed again
+    locked_until: Optional[datetime] = Field(default=None)
+    last_error: Optional[str] = Field(default=None, max_length=1000)
+    provider: Optional[str] = Field(default=None, max_length=20)
+    sent_at: Optional[datetime] = Field(default=None)
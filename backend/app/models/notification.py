@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 from typing import Optional, Dict, Any
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Column, JSON
 
 from .base import TimestampedModel
@@ -9,6 +10,11 @@ from .base import TimestampedModel
 
 class Notification(TimestampedModel, table=True):
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index("ix_notifications_recipient_id_group_key", "recipient_id", "group_key"),
+        # Inbox listing: WHERE recipient_id AND NOT is_archived ORDER BY created_at DESC
+        Index("ix_notifications_recipient_id_is_archived_created_at", "recipient_id", "is_archived", "created_at"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     recipient_id: int = Field(index=True)
@@ -23,6 +29,31 @@ class Notification(TimestampedModel, table=True):
     is_archived: bool = Field(default=False, index=True)
     sent_at: Optional[datetime] = Field(default=None)
     read_at: Optional[datetime] = Field(default=None)
+    # "<type>:<key>" for digest notifications that absorb similar ones
+    group_key: Optional[str] = Field(default=None, max_length=200)
+
+
+class NotificationArchive(SQLModel, table=True):
+    """Cold storage for notifications moved out of the hot table by the retention job."""
+    __tablename__ = "notifications_archive"
+
+    id: int = Field(primary_key=True)
+    recipient_id: int = Field(index=True)
+    sender_id: Optional[int] = Field(default=None)
+    title: str = Field(max_length=200)
+    message: str = Field(max_length=1000)
+    notification_type: str = Field(max_length=50)
+    priority: str = Field(default="medium", max_length=20)
+    channels: str = Field(default="in_app", max_length=100)
+    notification_metadata: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))
+    is_read: bool = Field(default=False)
+    is_archived: bool = Field(default=False)
+    sent_at: Optional[datetime] = Field(default=None)
+    read_at: Optional[datetime] = Field(default=None)
+    group_key: Optional[str] = Field(default=None, max_length=200)
+    created_at: datetime
+    updated_at: datetime
+    archived_at: datetime = Field(default_factory=datetime.utcnow, index=True)
 
 
 class NotificationPreferences(SQLModel, table=True):
@@ -39,3 +70,15 @@ class NotificationPreferences(SQLModel, table=True):
     system_notifications: bool = Field(default=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class NotificationCounter(SQLModel, table=True):
+    """Per-user notification counts kept in step with writes, so badges are a PK lookup."""
+    __tablename__ = "notification_counters"
+
+    user_id: int = Field(primary_key=True)
+    # Not archived; archived and moved-to-cold-storage rows drop out
+    total_count: int = Field(default=0)
+    # Unread and not archived
+    unread_count: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 from typing import Optional, Dict, Any
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Column, JSON
 
 from .base import TimestampedModel
@@ -48,6 +49,9 @@ class FraudDetectionRule(TimestampedModel, table=True):
 
 class TrustScoreHistory(TimestampedModel, table=True):
     __tablename__ = "trust_score_history"
+    __table_args__ = (
+        Index("ix_trust_score_history_user_id_created_at", "user_id", "created_at"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(index=True)
@@ -57,4 +61,4 @@ class TrustScoreHistory(TimestampedModel, table=True):
     reason: str = Field(max_length=500)
     factors: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))
     updated_by: int = Field(index=True)
-
+    resolution: str = Field(default="raw", max_length=10, index=True)  # raw, daily, weekly
@@ -5,6 +5,7 @@ from enum import Enum
 from typing import Optional
 
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
 from sqlalchemy.orm import Mapped
 
 from .base import TimestampedModel
@@ -51,12 +52,16 @@ class EmployeeVerification(TimestampedModel, table=True):
 
 class OTPVerification(TimestampedModel, table=True):
     __tablename__ = "otp_verifications"
+    __table_args__ = (
+        # Verify lookup: the active code for a user/company/email
+        Index("ix_otp_verifications_lookup", "user_id", "company_id", "company_email", "verified"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="users.id", index=True, nullable=False)
     company_id: int = Field(foreign_key="verified_companies.id", index=True, nullable=False)
     company_email: str = Field(max_length=255, nullable=False)
-    otp_code: str = Field(max_length=6, nullable=False)
+    otp_hash: str = Field(max_length=128, nullable=False)  # "salt$hmac", see app.services.otp_store
     expires_at: datetime = Field(nullable=False, index=True)
     verified: bool = Field(default=False, nullable=False)
     attempts: int = Field(default=0, nullable=False)  # Track failed attempts
@@ -37,6 +37,11 @@ class TokenRefresh(BaseModel):
     refresh_token: str
 
 
+class LogoutRequest(BaseModel):
+    # Also revoke the refresh token issued with the access token
+    refresh_token: Optional[str] = None
+
+
 class UserResponse(BaseModel):
     id: int
     email: str
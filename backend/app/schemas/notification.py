@@ -43,6 +43,16 @@ class NotificationCreate(NotificationBase):
     sender_id: Optional[int] = None
 
 
+class NotificationBulkCreate(BaseModel):
+    notifications: List[NotificationCreate] = Field(..., min_length=1, max_length=10000)
+
+
+class SystemAnnouncementCreate(BaseModel):
+    title: str = Field(..., min_length=1, max_length=200)
+    message: str = Field(..., min_length=1, max_length=1000)
+    priority: NotificationPriority = NotificationPriority.medium
+
+
 class NotificationUpdate(BaseModel):
     is_read: Optional[bool] = None
     is_archived: Optional[bool] = None
@@ -26,6 +26,12 @@ class SuspiciousActivityType(str, Enum):
     payment_fraud = "payment_fraud"
 
 
+class HistoryResolution(str, Enum):
+    raw = "raw"  # every score change, kept for TRUST_HISTORY_RAW_DAYS
+    daily = "daily"  # last score per day
+    weekly = "weekly"  # last score per ISO week
+
+
 class TrustScore(BaseModel):
     user_id: int
     score: int = Field(..., ge=0, le=100)
@@ -58,6 +64,10 @@ class TrustMetrics(BaseModel):
     fraud_alerts_count: int
     resolved_alerts_count: int
     false_positive_rate: float
+    # level -> count, keyed by user role / company id ("none" for users without one)
+    levels_by_role: Dict[str, Dict[str, int]] = {}
+    levels_by_company: Dict[str, Dict[str, int]] = {}
+    generated_at: Optional[datetime] = None
 
 
 class TrustAnalysis(BaseModel):
@@ -88,3 +98,15 @@ class TrustScoreUpdate(BaseModel):
     factors: List[Dict[str, Any]] = []
     updated_by: int
 
+
+class TrustHistoryPoint(BaseModel):
+    timestamp: datetime
+    score: int
+    score_change: int = 0
+    resolution: HistoryResolution = HistoryResolution.raw
+
+
+class TrustHistory(BaseModel):
+    user_id: int
+    granularity: str = "stored"  # "stored", "daily", "weekly"
+    points: List[TrustHistoryPoint] = []
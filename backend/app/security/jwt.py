@@ -1,3 +1,4 @@
+import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict
 
@@ -13,6 +14,8 @@ def _create_token(subject: str, expires_delta: timedelta, token_type: str) -> st
         "iat": int(now.timestamp()),
         "exp": int((now + expires_delta).timestamp()),
         "type": token_type,
+        # Lets a single token be revoked (app/security/revocation.py)
+        "jti": uuid.uuid4().hex,
     }
     return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
 
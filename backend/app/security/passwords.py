@@ -1,29 +1,133 @@
+"""
+Password hashing with bcrypt.
+
+bcrypt costs hundreds of milliseconds of CPU by design, so request handlers use
+the async password_hasher. It runs the work on a small dedicated thread pool
+(bcrypt releases the GIL), so hashing never blocks the event loop or the shared
+request threadpool. Work beyond PASSWORD_HASH_MAX_QUEUE waiting jobs is refused
+with PasswordHasherBusy instead of piling up.
+
+The cost factor is PASSWORD_BCRYPT_ROUNDS. Hashes made with another cost are
+upgraded (or downgraded) on the user's next successful login; see needs_rehash.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
 import bcrypt
 
+from app.core.config import settings
 
-def hash_password(plain_password: str) -> str:
-    """Hash a password using bcrypt."""
+
+def _password_bytes(plain_password: str) -> bytes:
     # Truncate password to 72 bytes for bcrypt compatibility
     password_bytes = plain_password.encode('utf-8')
     if len(password_bytes) > 72:
         password_bytes = password_bytes[:72]
-    
-    # Generate salt and hash
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt)
+    return password_bytes
+
+
+def hash_password(plain_password: str) -> str:
+    """Hash a password using bcrypt."""
+    salt = bcrypt.gensalt(rounds=settings.PASSWORD_BCRYPT_ROUNDS)
+    hashed = bcrypt.hashpw(_password_bytes(plain_password), salt)
     return hashed.decode('utf-8')
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
-    # Truncate password to 72 bytes for bcrypt compatibility
-    password_bytes = plain_password.encode('utf-8')
-    if len(password_bytes) > 72:
-        password_bytes = password_bytes[:72]
-    
     try:
-        return bcrypt.checkpw(password_bytes, hashed_password.encode('utf-8'))
+        return bcrypt.checkpw(_password_bytes(plain_password), hashed_password.encode('utf-8'))
     except Exception:
         return False
 
 
+def needs_rehash(hashed_password: str) -> bool:
+    """Whether a hash was made with a different cost than PASSWORD_BCRYPT_ROUNDS."""
+    # $2b$12$<salt+hash>
+    try:
+        return int(hashed_password.split("$")[2]) != settings.PASSWORD_BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.total_seconds = 0.0
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def hash(self, plain_password: str) -> str:
+        return await self._run(hash_password, plain_password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "rounds": settings.PASSWORD_BCRYPT_ROUNDS,
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+            "avg_ms": round(self.total_seconds / self.completed * 1000, 1) if self.completed else None,
+        }
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise PasswordHasherBusy(f"{self.queued} password hashes already queued")
+            self.queued += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+            executor = self._executor
+        future = executor.submit(self._timed, func, args)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # True when no thread picked it up, so _timed never uncounted it
+            if future.cancel():
+                with self._lock:
+                    self.queued -= 1
+            raise
+
+    def _timed(self, func: Callable[..., Any], args: tuple) -> Any:
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+                self.total_seconds += elapsed
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
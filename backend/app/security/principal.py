@@ -0,0 +1,74 @@
+"""
+Authenticated-user principals and their cache.
+
+get_current_user resolves a bearer token to a CurrentUser: the few User columns
+that authorization and most endpoints read. Principals are cached per worker,
+keyed by (user_id, token iat), so a request with a known token does not touch
+the database. Endpoints that need the full row depend on get_current_user_row.
+
+Services that change a user's profile, role or active flag call
+invalidate_user(). That only reaches this worker; other workers pick up the
+change when their entry expires (AUTH_USER_CACHE_TTL_SECONDS).
+"""
+import threading
+from typing import Dict, NamedTuple, Optional
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.models.user import UserRole
+
+# Live tokens remembered per user (one per device or session)
+MAX_TOKENS_PER_USER = 8
+
+
+class CurrentUser(NamedTuple):
+    id: int
+    email: str
+    role: UserRole
+    is_active: bool
+    is_email_verified: bool
+    first_name: Optional[str]
+    last_name: Optional[str]
+
+
+class PrincipalCache:
+    """Principals keyed by (user_id, iat), grouped per user so one call drops all of a user's tokens."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._users = LRUCache(maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._invalidations = 0
+
+    def get(self, user_id: int, iat: int) -> Optional[CurrentUser]:
+        tokens: Optional[Dict[int, CurrentUser]] = self._users.get(user_id)
+        return tokens.get(iat) if tokens else None
+
+    def generation(self) -> int:
+        """Take before loading a principal and pass to set(), so a load that raced an invalidation is not cached."""
+        return self._invalidations
+
+    def set(self, user_id: int, iat: int, principal: CurrentUser, generation: int) -> None:
+        with self._lock:
+            if generation != self._invalidations:
+                return
+            tokens = self._users.get(user_id) or {}
+            # The row was just read, so it is the freshest copy for every token
+            fresh = {token_iat: principal for token_iat in list(tokens)[-(MAX_TOKENS_PER_USER - 1):]}
+            fresh[iat] = principal
+            self._users.set(user_id, fresh)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._invalidations += 1
+            self._users.invalidate(user_id)
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+
+user_principals = PrincipalCache(settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL_SECONDS)
+
+
+def invalidate_user(user_id: int) -> None:
+    """Call after changing a user's profile, role or active flag."""
+    user_principals.invalidate(user_id)
@@ -0,0 +1,194 @@
+"""
+JWT revocation: a revoked_tokens table with an in-memory Bloom filter in front.
+
+Tokens carry a random `jti`. Logging out stores that jti until the token would
+expire anyway; "revoke all sessions" stores a row without a jti, which revokes
+every token of the user issued at or before it.
+
+Each worker holds a Bloom filter of the live rows ("jti:<jti>" and "user:<id>"
+keys), rebuilt every TOKEN_REVOCATION_REFRESH_SECONDS. get_current_user checks the
+filter on every request and reads the table only on a filter hit: a revoked token
+or a rare false positive. Lookup answers are cached until the next rebuild, so a
+user who revoked all sessions is not looked up on every request either.
+
+Revocations take effect at once on the worker that made them and after at most
+one refresh interval on the others.
+"""
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from app.core.bloom import BloomFilter
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.db.session import engine
+from app.models.auth import RevokedToken
+
+
+def _jti_key(jti: str) -> str:
+    return f"jti:{jti}"
+
+
+def _user_key(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def _expiry(claims: Dict[str, Any]) -> datetime:
+    return datetime.utcfromtimestamp(claims["exp"])
+
+
+class TokenRevocations:
+    def __init__(self, capacity: int, error_rate: float, cache_size: int, cache_ttl: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.lookups = 0
+        self.false_positives = 0
+        self._bloom: Optional[BloomFilter] = None
+        self._built_at: Optional[datetime] = None
+        # Keys revoked here while a rebuild was reading the table
+        self._added_during_build: Optional[List[str]] = None
+        self._lock = threading.Lock()
+        # jti -> revoked; user_id -> cutoff epoch seconds (0: none)
+        self._jtis = LRUCache(cache_size, ttl=cache_ttl)
+        self._cutoffs = LRUCache(cache_size, ttl=cache_ttl)
+
+    def check(self, user_id: int, jti: Optional[str], iat: int) -> Optional[bool]:
+        """Decide from memory; None means the table has to be read (see lookup)."""
+        bloom = self._bloom
+        undecided = False
+        if bloom is None or _user_key(user_id) in bloom:
+            cutoff = self._cutoffs.get(user_id)
+            if cutoff is None:
+                undecided = True
+            elif iat <= cutoff:
+                return True
+        if jti and (bloom is None or _jti_key(jti) in bloom):
+            revoked = self._jtis.get(jti)
+            if revoked is None:
+                undecided = True
+            elif revoked:
+                return True
+        return None if undecided else False
+
+    def lookup(self, user_id: int, jti: Optional[str], iat: int) -> bool:
+        """Read the table for this token and cache the answer."""
+        self.lookups += 1
+        now = datetime.utcnow()
+        with Session(engine) as session:
+            revoked_at = session.execute(
+                select(func.max(RevokedToken.revoked_at)).where(
+                    RevokedToken.user_id == user_id,
+                    RevokedToken.jti.is_(None),
+                    RevokedToken.expires_at > now,
+                )
+            ).scalar()
+            jti_revoked = bool(jti) and session.execute(
+                select(RevokedToken.id).where(RevokedToken.jti == jti, RevokedToken.expires_at > now)
+            ).first() is not None
+        cutoff = int(revoked_at.replace(tzinfo=timezone.utc).timestamp()) if revoked_at else 0
+        self._cutoffs.set(user_id, cutoff)
+        if jti:
+            self._jtis.set(jti, jti_revoked)
+        revoked = jti_revoked or (cutoff > 0 and iat <= cutoff)
+        if not revoked and self._bloom is not None:
+            self.false_positives += 1
+        return revoked
+
+    def is_revoked(self, user_id: int, jti: Optional[str], iat: int) -> bool:
+        revoked = self.check(user_id, jti, iat)
+        return self.lookup(user_id, jti, iat) if revoked is None else revoked
+
+    def revoke(self, db: Session, user_id: int, claims: Dict[str, Any]) -> None:
+        """Revoke one decoded token. Tokens issued before jti existed can only be revoked with revoke_all."""
+        jti = claims.get("jti")
+        if not jti:
+            return
+        db.add(RevokedToken(jti=jti, user_id=user_id, expires_at=_expiry(claims)))
+        try:
+            db.commit()
+        except IntegrityError:
+            # Already revoked
+            db.rollback()
+        self._jtis.set(jti, True)
+        self._remember(_jti_key(jti))
+
+    def revoke_all(self, db: Session, user_id: int) -> None:
+        """Revoke every token issued to the user so far."""
+        now = datetime.utcnow()
+        lifetime = max(settings.ACCESS_TOKEN_EXPIRE_MINUTES, settings.REFRESH_TOKEN_EXPIRE_MINUTES)
+        db.add(RevokedToken(user_id=user_id, revoked_at=now, expires_at=now + timedelta(minutes=lifetime)))
+        db.commit()
+        self._cutoffs.set(user_id, int(now.replace(tzinfo=timezone.utc).timestamp()))
+        self._remember(_user_key(user_id))
+
+    def refresh(self) -> int:
+        """Rebuild the filter from the live rows; scheduled on every worker."""
+        with self._lock:
+            self._added_during_build = []
+        try:
+            with Session(engine) as session:
+                rows = session.execute(
+                    select(RevokedToken.jti, RevokedToken.user_id)
+                    .where(RevokedToken.expires_at > datetime.utcnow())
+                ).all()
+            keys = [_jti_key(jti) if jti else _user_key(user_id) for jti, user_id in rows]
+            # Headroom so revocations until the next rebuild keep the error rate
+            bloom = BloomFilter.from_keys(keys, max(self.capacity, 2 * len(keys)), self.error_rate)
+            with self._lock:
+                for key in self._added_during_build:
+                    bloom.add(key)
+                self._bloom = bloom
+        finally:
+            with self._lock:
+                self._added_during_build = None
+        self._built_at = datetime.utcnow()
+        # Answers cached from the old filter may predate other workers' revocations
+        self._jtis.invalidate()
+        self._cutoffs.invalidate()
+        return len(keys)
+
+    def purge_expired(self, db: Session) -> int:
+        result = db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
+        db.commit()
+        return result.rowcount or 0
+
+    def stats(self) -> Dict[str, Any]:
+        bloom = self._bloom
+        return {
+            "entries": bloom.count if bloom else None,
+            "filter_bytes": (bloom.bits + 7) // 8 if bloom else None,
+            "built_at": self._built_at.isoformat() if self._built_at else None,
+            "lookups": self.lookups,
+            "false_positives": self.false_positives,
+        }
+
+    def _remember(self, key: str) -> None:
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(key)
+            if self._added_during_build is not None:
+                self._added_during_build.append(key)
+
+
+token_revocations = TokenRevocations(
+    capacity=settings.TOKEN_REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.TOKEN_REVOCATION_BLOOM_ERROR_RATE,
+    cache_size=settings.TOKEN_REVOCATION_CACHE_SIZE,
+    cache_ttl=settings.TOKEN_REVOCATION_REFRESH_SECONDS,
+)
+
+
+def run_token_revocation_refresh() -> int:
+    return token_revocations.refresh()
+
+
+def run_token_revocation_cleanup() -> int:
+    """Scheduled entry point: drop revocations whose tokens have expired."""
+    with Session(engine) as session:
+        purged = token_revocations.purge_expired(session)
+    print(f"✅ Token revocation cleanup: purged {purged} expired entries")
+    return purged
@@ -10,12 +10,14 @@ from app.schemas.analytics import (
     CompanyAnalytics, SystemAnalytics, DashboardData, Leaderboard,
     LeaderboardEntry, TrendData
 )
+from app.db.replicas import read_only
 
 
 class AnalyticsService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    @read_only
     async def get_dashboard_data(self, request: AnalyticsRequest) -> DashboardData:
         """Get comprehensive dashboard analytics."""
         date_filter = self._get_date_filter(request)
@@ -313,6 +315,7 @@ class AnalyticsService:
             params["user_id"] = request.user_id
         return params
 
+    @read_only
     async def get_leaderboard(self, leaderboard_type: str, limit: int = 10) -> Leaderboard:
         """Get leaderboard data."""
         if leaderboard_type == "referrals":
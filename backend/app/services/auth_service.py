@@ -1,9 +1,12 @@
+import asyncio
 from typing import Optional
+from sqlalchemy import update
 from sqlmodel import Session, select
 from fastapi import HTTPException, status
 
 from app.models.user import User, UserRole, Company, Employee, JobSeeker
-from app.security.passwords import hash_password, verify_password
+from app.security.passwords import PasswordHasherBusy, needs_rehash, password_hasher
+from app.security.principal import invalidate_user
 from app.security.email_domain import extract_domain, is_corporate_email, validate_email_format
 from app.schemas.auth import UserRegister, UserLogin
 
@@ -12,7 +15,7 @@ class AuthService:
     def __init__(self, db: Session):
         self.db = db
 
-    def register_user(self, user_data: UserRegister) -> User:
+    async def register_user(self, user_data: UserRegister) -> User:
         """Register a new user with email domain validation."""
         # Validate email format
         if not validate_email_format(user_data.email):
@@ -21,16 +24,24 @@ class AuthService:
                 detail="Invalid email format"
             )
 
-        # Check if user already exists
+        # The session is synchronous: its queries run off the event loop
+        await asyncio.to_thread(self._check_email_available, user_data.email)
+        hashed_password = await self._hash(user_data.password)
+        return await asyncio.to_thread(self._create_user, user_data, hashed_password)
+
+    def _check_email_available(self, email: str) -> None:
         existing_user = self.db.exec(
-            select(User).where(User.email == user_data.email)
+            select(User).where(User.email == email)
         ).first()
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
+        # Don't hold a pooled connection while bcrypt runs
+        self.db.close()
 
+    def _create_user(self, user_data: UserRegister, hashed_password: str) -> User:
         # Extract and validate domain
         domain = extract_domain(user_data.email)
         
@@ -50,7 +61,6 @@ class AuthService:
                 company = self._get_or_create_company(domain)
 
         # Create user
-        hashed_password = hash_password(user_data.password)
         user = User(
             email=user_data.email,
             email_domain=domain,
@@ -81,26 +91,77 @@ class AuthService:
             self.db.add(jobseeker)
 
         self.db.commit()
+        # Loaded here, so the endpoint serializes it without touching the session
+        self.db.refresh(user)
         return user
 
-    def authenticate_user(self, login_data: UserLogin) -> Optional[User]:
+    async def authenticate_user(self, login_data: UserLogin) -> Optional[User]:
         """Authenticate user with email and password."""
-        result = self.db.exec(
-            select(User).where(User.email == login_data.email)
-        )
-        user = result.first()
+        user = await asyncio.to_thread(self._find_user, login_data.email)
         
-        if not user or not verify_password(login_data.password, user.hashed_password):
+        if not user:
+            return None
+        try:
+            valid = await password_hasher.verify(login_data.password, user.hashed_password)
+        except PasswordHasherBusy:
+            raise self._busy()
+        if not valid:
             return None
         
         if not user.is_active:
+            # Drop any principal cached while the account was still active
+            invalidate_user(user.id)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Account is deactivated"
             )
         
+        if needs_rehash(user.hashed_password):
+            await self._rehash(user, login_data.password)
+        
+        return user
+
+    def _find_user(self, email: str) -> Optional[User]:
+        user = self.db.exec(
+            select(User).where(User.email == email)
+        ).first()
+        # Release the connection while bcrypt runs; the loaded attributes stay usable
+        self.db.close()
         return user
 
+    async def _rehash(self, user: User, plain_password: str) -> None:
+        """Re-hash with the current PASSWORD_BCRYPT_ROUNDS; the login succeeds either way."""
+        try:
+            new_hash = await password_hasher.hash(plain_password)
+        except PasswordHasherBusy:
+            # Next login will try again
+            return
+        await asyncio.to_thread(self._store_rehash, user, new_hash)
+        password_hasher.rehashed += 1
+
+    def _store_rehash(self, user: User, new_hash: str) -> None:
+        # Only if the password was not changed meanwhile
+        self.db.exec(
+            update(User)
+            .where(User.id == user.id, User.hashed_password == user.hashed_password)
+            .values(hashed_password=new_hash)
+        )
+        self.db.commit()
+
+    async def _hash(self, plain_password: str) -> str:
+        try:
+            return await password_hasher.hash(plain_password)
+        except PasswordHasherBusy:
+            raise self._busy()
+
+    @staticmethod
+    def _busy() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-ins right now. Please try again.",
+            headers={"Retry-After": "1"}
+        )
+
     def _get_or_create_company(self, domain: str) -> Company:
         """Get existing company or create new one."""
         result = self.db.exec(
@@ -12,11 +12,13 @@ from app.schemas.dashboard import (
     DashboardStatsResponse, JobSeekerDashboardData, EmployeeDashboardData,
     AdminDashboardData
 )
+from app.db.replicas import read_only
 
 class DashboardService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    @read_only
     async def get_job_recommendations(self, user_id: int, limit: int = 10) -> List[JobRecommendationResponse]:
         """Get personalized job recommendations for a user"""
         # Get user's skills and preferences
@@ -87,6 +89,7 @@ class DashboardService:
         
         return min(skill_match + bonus, 100.0)
 
+    @read_only
     async def get_activity_feed(self, user_id: int, limit: int = 20) -> List[ActivityFeedResponse]:
         """Get user's activity feed"""
         result = await self.db.execute(
@@ -128,6 +131,7 @@ class DashboardService:
         await self.db.refresh(activity)
         return activity
 
+    @read_only
     async def get_saved_searches(self, user_id: int) -> List[SavedSearchResponse]:
         """Get user's saved searches"""
         result = await self.db.execute(
@@ -0,0 +1,500 @@
+"""
+Persistent email outbox.
+
+Callers write an email_outbox row in their own transaction and return at once;
+they never wait on an email provider. Every worker runs an EmailDispatcher that
+claims due rows, most urgent lane first, and sends them with a pool of async
+workers. Digests and other bulk mail (priority PRIORITY_DIGEST and up) go through
+a separate lane that claims large batches and hands them to the provider batch
+APIs via email_service.send_bulk. Failed sends are retried with exponential backoff and full jitter. After
+max_attempts a row is dead-lettered (status "dead") and kept for inspection.
+
+OTP rows carry the code in plaintext, so their bodies are blanked as soon as they
+are sent or dead-lettered, and run_otp_cleanup deletes them once the code expires.
+
+Claims take a lease: rows stuck in "sending" after a crash are claimed again once
+the lease runs out. Claimed rows that were never sent go back to "pending" on
+shutdown.
+"""
+import asyncio
+import json
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.db.session import engine
+from app.models.email import EmailOutbox
+from app.services.email_service import BulkEmail, EmailContent, email_service
+
+# Lanes: lower is claimed and sent first
+PRIORITY_OTP = 0
+PRIORITY_TRANSACTIONAL = 10
+PRIORITY_DIGEST = 50
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+DEAD = "dead"
+
+BULK_CHUNK_SIZE = 1000
+
+# Left in place of a sent or dead-lettered OTP email's body
+REDACTED = "[redacted]"
+
+CLAIM_COLUMNS = (
+    EmailOutbox.id,
+    EmailOutbox.to_email,
+    EmailOutbox.subject,
+    EmailOutbox.html_content,
+    EmailOutbox.text_content,
+    EmailOutbox.template,
+    EmailOutbox.template_context,
+    EmailOutbox.priority,
+    EmailOutbox.attempts,
+    EmailOutbox.max_attempts,
+)
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Full jitter: uniform in [0, min(max, base * 2^(attempts - 1))]."""
+    ceiling = min(
+        settings.EMAIL_OUTBOX_BACKOFF_MAX_SECONDS,
+        settings.EMAIL_OUTBOX_BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0),
+    )
+    return random.uniform(0, ceiling)
+
+
+class EmailOutboxService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def enqueue(
+        self,
+        to_email: str,
+        content: EmailContent,
+        priority: int = PRIORITY_TRANSACTIONAL,
+        commit: bool = True
+    ) -> EmailOutbox:
+        """Queue one email. With commit=False it rides on the caller's transaction
+        and the caller should call email_dispatcher.notify() after committing."""
+        email = EmailOutbox(
+            to_email=to_email,
+            subject=content.subject,
+            html_content=content.html,
+            text_content=content.text,
+            priority=priority,
+            max_attempts=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+        )
+        self.db.add(email)
+        if commit:
+            self.db.commit()
+            self.db.refresh(email)
+            email_dispatcher.notify()
+        return email
+
+    def enqueue_many(
+        self,
+        emails: List[Tuple[str, EmailContent]],
+        priority: int = PRIORITY_TRANSACTIONAL,
+        template: Optional[str] = None,
+        contexts: Optional[List[Dict[str, Any]]] = None
+    ) -> int:
+        """Queue many emails with one INSERT per chunk, in the caller's transaction.
+
+        Emails rendered from one template can pass its name and each email's
+        context, so bulk sends can share one body between recipients.
+        """
+        now = datetime.utcnow()
+        if contexts is None:
+            contexts = [None] * len(emails)
+        rows = [
+            {
+                "to_email": to_email,
+                "subject": content.subject,
+                "html_content": content.html,
+                "text_content": content.text,
+                "template": template,
+                "template_context": json.dumps(context) if context is not None else None,
+                "priority": priority,
+                "status": PENDING,
+                "attempts": 0,
+                "max_attempts": settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+                "next_attempt_at": now,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for (to_email, content), context in zip(emails, contexts)
+        ]
+        for start in range(0, len(rows), BULK_CHUNK_SIZE):
+            self.db.execute(insert(EmailOutbox), rows[start:start + BULK_CHUNK_SIZE])
+        return len(rows)
+
+    # Dispatcher side
+
+    def claim(
+        self,
+        limit: int,
+        max_priority: Optional[int] = None,
+        min_priority: Optional[int] = None,
+        now: Optional[datetime] = None
+    ) -> List:
+        """Lease up to `limit` due rows, most urgent first. SKIP LOCKED lets workers claim concurrently on Postgres."""
+        now = now or datetime.utcnow()
+        due = or_(
+            and_(EmailOutbox.status == PENDING, EmailOutbox.next_attempt_at <= now),
+            and_(EmailOutbox.status == SENDING, EmailOutbox.locked_until < now),
+        )
+        if max_priority is not None:
+            due = and_(due, EmailOutbox.priority <= max_priority)
+        if min_priority is not None:
+            due = and_(due, EmailOutbox.priority >= min_priority)
+        candidates = (
+            select(EmailOutbox.id)
+            .where(due)
+            .order_by(EmailOutbox.priority, EmailOutbox.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        rows = self.db.execute(
+            update(EmailOutbox)
+            .where(and_(EmailOutbox.id.in_(candidates.scalar_subquery()), due))
+            .values(
+                status=SENDING,
+                attempts=EmailOutbox.attempts + 1,
+                locked_until=now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS),
+                updated_at=now,
+            )
+            .returning(*CLAIM_COLUMNS)
+        ).all()
+        self.db.commit()
+        return sorted(rows, key=lambda row: (row.priority, row.id))
+
+    def mark_sent(self, email_id: int, provider: str, now: Optional[datetime] = None) -> None:
+        self.mark_sent_many([email_id], provider, now)
+
+    def mark_sent_many(self, email_ids: List[int], provider: str, now: Optional[datetime] = None) -> None:
+        now = now or datetime.utcnow()
+        for start in range(0, len(email_ids), BULK_CHUNK_SIZE):
+            self.db.execute(
+                update(EmailOutbox)
+                .where(EmailOutbox.id.in_(email_ids[start:start + BULK_CHUNK_SIZE]))
+                .values(status=SENT, sent_at=now, provider=provider, locked_until=None, last_error=None, updated_at=now)
+            )
+            self._redact_otp(email_ids[start:start + BULK_CHUNK_SIZE])
+        self.db.commit()
+
+    def mark_failed(self, row, error: str, now: Optional[datetime] = None) -> str:
+        """Schedule a retry, or dead-letter the row once it is out of attempts."""
+        status = self._fail(row, error, now or datetime.utcnow())
+        self.db.commit()
+        return status
+
+    def mark_failed_many(self, rows: List, error: str, now: Optional[datetime] = None) -> List:
+        """mark_failed for a whole batch in one transaction; returns the dead-lettered rows."""
+        now = now or datetime.utcnow()
+        dead = [row for row in rows if self._fail(row, error, now) == DEAD]
+        self.db.commit()
+        return dead
+
+    def _fail(self, row, error: str, now: datetime) -> str:
+        # Each row gets its own jittered retry time, so this is one UPDATE per row
+        if row.attempts >= row.max_attempts:
+            status, next_attempt_at = DEAD, now
+        else:
+            status, next_attempt_at = PENDING, now + timedelta(seconds=backoff_seconds(row.attempts))
+        self.db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id == row.id)
+            .values(
+                status=status,
+                next_attempt_at=next_attempt_at,
+                locked_until=None,
+                last_error=error[:1000],
+                updated_at=now,
+            )
+        )
+        if status == DEAD:
+            self._redact_otp([row.id])
+        return status
+
+    def _redact_otp(self, email_ids: List[int]) -> None:
+        self.db.execute(
+            update(EmailOutbox)
+            .where(and_(EmailOutbox.id.in_(email_ids), EmailOutbox.priority == PRIORITY_OTP))
+            .values(html_content=REDACTED, text_content="")
+        )
+
+    def release(self, email_ids: List[int]) -> None:
+        """Hand claimed but unsent rows back without counting the attempt."""
+        if not email_ids:
+            return
+        self.db.execute(
+            update(EmailOutbox)
+            .where(and_(EmailOutbox.id.in_(email_ids), EmailOutbox.status == SENDING))
+            .values(status=PENDING, attempts=EmailOutbox.attempts - 1, locked_until=None)
+        )
+        self.db.commit()
+
+    def retry_dead(self, email_ids: Optional[List[int]] = None) -> int:
+        """Put dead-lettered rows back in the queue with a fresh set of attempts.
+        OTP rows are left out: their bodies are redacted and the user can ask for a new code."""
+        condition = and_(EmailOutbox.status == DEAD, EmailOutbox.priority != PRIORITY_OTP)
+        if email_ids is not None:
+            condition = and_(condition, EmailOutbox.id.in_(email_ids))
+        result = self.db.execute(
+            update(EmailOutbox)
+            .where(condition)
+            .values(status=PENDING, attempts=0, next_attempt_at=datetime.utcnow(), last_error=None)
+        )
+        self.db.commit()
+        email_dispatcher.notify()
+        return result.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        counts = dict(self.db.execute(
+            select(EmailOutbox.status, func.count()).group_by(EmailOutbox.status)
+        ).all())
+        return {status: counts.get(status, 0) for status in (PENDING, SENDING, SENT, DEAD)}
+
+    def purge_sent(self, now: Optional[datetime] = None) -> int:
+        now = now or datetime.utcnow()
+        cutoff = now - timedelta(days=settings.EMAIL_OUTBOX_SENT_RETENTION_DAYS)
+        result = self.db.execute(
+            delete(EmailOutbox).where(and_(EmailOutbox.status == SENT, EmailOutbox.sent_at < cutoff))
+        )
+        self.db.commit()
+        return result.rowcount
+
+    def purge_otp(self, now: Optional[datetime] = None) -> int:
+        """Delete OTP emails whose code has expired, whatever their status."""
+        now = now or datetime.utcnow()
+        cutoff = now - timedelta(minutes=settings.OTP_EXPIRY_MINUTES)
+        result = self.db.execute(
+            delete(EmailOutbox).where(and_(EmailOutbox.priority == PRIORITY_OTP, EmailOutbox.created_at < cutoff))
+        )
+        self.db.commit()
+        return result.rowcount
+
+
+class EmailDispatcher:
+    """Claims due outbox rows and sends them with `workers` concurrent tasks.
+
+    At most two batches' worth of OTP and transactional rows are leased into
+    memory at a time. When that buffer is full, only OTP and transactional rows
+    are claimed, so urgent mail never waits behind slower sends.
+
+    Bulk rows (priority PRIORITY_DIGEST and up) have their own lane: one task
+    claims EMAIL_BULK_BATCH_SIZE of them at a time and sends them through
+    email_service.send_bulk. A batch interrupted by shutdown is not released,
+    since part of it may have gone out; its lease expires and it is retried.
+    """
+
+    def __init__(self, workers: int, poll_seconds: float):
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.sent = 0
+        self.failed = 0
+        self.dead = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._bulk_wakeup: Optional[asyncio.Event] = None
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._bulk_wakeup = asyncio.Event()
+        self._queue = asyncio.PriorityQueue()
+        self._tasks.append(asyncio.create_task(self._claim_loop(), name="email:claim"))
+        self._tasks.append(asyncio.create_task(self._bulk_loop(), name="email:bulk"))
+        for i in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker(), name=f"email:worker-{i}"))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        unsent = []
+        while self._queue is not None and not self._queue.empty():
+            unsent.append(self._queue.get_nowait()[1])
+        await asyncio.to_thread(_with_outbox, lambda outbox: outbox.release(unsent))
+        self._loop = None
+
+    def notify(self) -> None:
+        """Wake the claim loops; safe to call from any thread, a no-op when not running."""
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._wakeup.set)
+            loop.call_soon_threadsafe(self._bulk_wakeup.set)
+        except RuntimeError:
+            # Loop already closed during shutdown
+            pass
+
+    async def drain(self) -> Dict[str, int]:
+        """Send everything that is due now and return; for use without a running server."""
+        while True:
+            rows = await asyncio.to_thread(
+                _with_outbox, lambda outbox: outbox.claim(self.workers * 2, max_priority=PRIORITY_DIGEST - 1)
+            )
+            if rows:
+                await asyncio.gather(*(self._send(row) for row in rows))
+                continue
+            rows = await asyncio.to_thread(
+                _with_outbox, lambda outbox: outbox.claim(settings.EMAIL_BULK_BATCH_SIZE, min_priority=PRIORITY_DIGEST)
+            )
+            if not rows:
+                return self.stats()
+            await self._send_batch(rows)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "sent": self.sent,
+            "failed": self.failed,
+            "dead": self.dead,
+        }
+
+    async def _claim_loop(self) -> None:
+        capacity = self.workers * 2
+        while True:
+            # Cleared before claiming so a wakeup during the claim is not lost
+            self._wakeup.clear()
+            try:
+                free = capacity - self._queue.qsize()
+                if free > 0:
+                    rows = await asyncio.to_thread(
+                        _with_outbox, lambda outbox: outbox.claim(free, max_priority=PRIORITY_DIGEST - 1)
+                    )
+                else:
+                    rows = await asyncio.to_thread(
+                        _with_outbox, lambda outbox: outbox.claim(self.workers, max_priority=PRIORITY_TRANSACTIONAL)
+                    )
+                for row in rows:
+                    self._queue.put_nowait(((row.priority, row.id), row.id, row))
+            except Exception as e:
+                print(f"❌ Email outbox claim failed: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _bulk_loop(self) -> None:
+        batch_size = settings.EMAIL_BULK_BATCH_SIZE
+        while True:
+            self._bulk_wakeup.clear()
+            rows = []
+            try:
+                rows = await asyncio.to_thread(
+                    _with_outbox, lambda outbox: outbox.claim(batch_size, min_priority=PRIORITY_DIGEST)
+                )
+                if rows:
+                    await self._send_batch(rows)
+            except Exception as e:
+                print(f"❌ Email outbox bulk send failed: {e}")
+            if len(rows) == batch_size:
+                # Probably more waiting
+                continue
+            try:
+                await asyncio.wait_for(self._bulk_wakeup.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _worker(self) -> None:
+        while True:
+            _, _, row = await self._queue.get()
+            if self._queue.qsize() < self.workers:
+                # Running low; top the buffer up while this one sends
+                self._wakeup.set()
+            try:
+                await self._send(row)
+            except Exception as e:
+                print(f"❌ Email outbox worker error for #{row.id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _send(self, row) -> None:
+        provider = None
+        try:
+            provider = await email_service.deliver(row.to_email, row.subject, row.html_content, row.text_content)
+            error = None if provider else "no email provider accepted the message"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+
+        if error is None:
+            self.sent += 1
+            await asyncio.to_thread(_with_outbox, lambda outbox: outbox.mark_sent(row.id, provider))
+            return
+        self.failed += 1
+        status = await asyncio.to_thread(_with_outbox, lambda outbox: outbox.mark_failed(row, error))
+        if status == DEAD:
+            self.dead += 1
+            print(f"❌ Email #{row.id} to {row.to_email} dead-lettered after {row.attempts} attempts: {error}")
+
+    async def _send_batch(self, rows: List) -> None:
+        emails = [
+            BulkEmail(
+                row.id,
+                row.to_email,
+                EmailContent(row.subject, row.html_content, row.text_content or ""),
+                row.template,
+                json.loads(row.template_context) if row.template_context else None,
+            )
+            for row in rows
+        ]
+        error = "no email provider accepted the message"
+        try:
+            results = await email_service.send_bulk(emails)
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            results = {}
+
+        sent_by_provider: Dict[str, List[int]] = {}
+        failed = []
+        for row in rows:
+            provider = results.get(row.id)
+            if provider:
+                sent_by_provider.setdefault(provider, []).append(row.id)
+            else:
+                failed.append(row)
+
+        def record(outbox: EmailOutboxService) -> List:
+            for provider, email_ids in sent_by_provider.items():
+                outbox.mark_sent_many(email_ids, provider)
+            return outbox.mark_failed_many(failed, error) if failed else []
+
+        dead = await asyncio.to_thread(_with_outbox, record)
+        self.sent += len(rows) - len(failed)
+        self.failed += len(failed)
+        self.dead += len(dead)
+        for row in dead:
+            print(f"❌ Email #{row.id} to {row.to_email} dead-lettered after {row.attempts} attempts: {error}")
+
+
+def _with_outbox(action):
+    with Session(engine) as session:
+        return action(EmailOutboxService(session))
+
+
+email_dispatcher = EmailDispatcher(
+    workers=settings.EMAIL_OUTBOX_WORKERS,
+    poll_seconds=settings.EMAIL_OUTBOX_POLL_SECONDS,
+)
+
+
+def run_email_outbox_cleanup() -> int:
+    """Scheduled entry point: delete sent emails past EMAIL_OUTBOX_SENT_RETENTION_DAYS."""
+    with Session(engine) as session:
+        purged = EmailOutboxService(session).purge_sent()
+    print(f"✅ Email outbox cleanup: purged {purged} sent emails")
+    return purged
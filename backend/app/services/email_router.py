@@ -0,0 +1,211 @@
+"""
+Health-weighted routing across the configured email providers.
+
+Each provider keeps a rolling window of send outcomes and an EWMA of successful
+send latency. Sends go to the fastest healthy provider first and fail over down
+the list. A circuit breaker takes a provider out of rotation after
+EMAIL_CIRCUIT_FAILURE_THRESHOLD consecutive failures, or when its windowed
+failure rate gets too high. A background task probes open circuits once their
+cooldown passes and closes them again on success. Providers that cannot be probed,
+and all providers without the task (CLI runs), get the first send after the
+cooldown as the trial.
+
+A provider that answers but refuses one email (bad address, invalid request) is
+healthy; such rejections are counted apart and never trip the breaker.
+"""
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from app.core.config import settings
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Weight of the newest sample in the latency average
+LATENCY_EWMA_ALPHA = 0.2
+
+# True/False for healthy/unhealthy; None when the provider has no probe
+Probe = Callable[[str], Awaitable[Optional[bool]]]
+
+
+class ProviderHealth:
+    def __init__(self, name: str, order: int):
+        self.name = name
+        self.order = order
+        self.outcomes: Deque[bool] = deque(maxlen=settings.EMAIL_ROUTER_WINDOW)
+        self.latency: Optional[float] = None
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.cooldown = settings.EMAIL_CIRCUIT_OPEN_SECONDS
+        self.retry_at = 0.0
+        self.trial_inflight = False
+        self.sent = 0
+        self.failed = 0
+        self.rejected = 0
+
+    @property
+    def success_rate(self) -> float:
+        if not self.outcomes:
+            return 1.0
+        return sum(self.outcomes) / len(self.outcomes)
+
+    def record(self, ok: bool, latency: Optional[float] = None) -> None:
+        """Count one outcome; latency is left out for batch requests, which are not comparable."""
+        self.trial_inflight = False
+        if ok:
+            self.sent += 1
+            self.consecutive_failures = 0
+            if latency is not None:
+                self.latency = latency if self.latency is None else (
+                    LATENCY_EWMA_ALPHA * latency + (1 - LATENCY_EWMA_ALPHA) * self.latency
+                )
+            self._close()
+            self.outcomes.append(True)
+            return
+
+        self.outcomes.append(False)
+        self.failed += 1
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN:
+            # Trial failed: back off harder
+            self.cooldown = min(self.cooldown * 2, settings.EMAIL_CIRCUIT_MAX_OPEN_SECONDS)
+            self._open()
+        elif self.state == CLOSED and self._should_trip():
+            self._open()
+
+    def record_rejected(self) -> None:
+        """The provider refused this one email: it is up, and the email is at fault."""
+        self.trial_inflight = False
+        self.rejected += 1
+        self._close()
+
+    def _close(self) -> None:
+        if self.state == CLOSED:
+            return
+        # Start the window over so the outage does not count against it
+        self.state = CLOSED
+        self.cooldown = settings.EMAIL_CIRCUIT_OPEN_SECONDS
+        self.outcomes.clear()
+        print(f"✅ Email provider {self.name} recovered")
+
+    def _should_trip(self) -> bool:
+        if self.consecutive_failures >= settings.EMAIL_CIRCUIT_FAILURE_THRESHOLD:
+            return True
+        return (
+            len(self.outcomes) >= settings.EMAIL_ROUTER_MIN_SAMPLES
+            and self.success_rate < settings.EMAIL_ROUTER_MIN_SUCCESS_RATE
+        )
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.retry_at = time.monotonic() + self.cooldown
+        print(f"⚠️ Email provider {self.name} circuit open for {self.cooldown:.0f}s")
+
+    def trial_due(self, now: float) -> bool:
+        return self.state in (OPEN, HALF_OPEN) and now >= self.retry_at and not self.trial_inflight
+
+    def begin_trial(self) -> None:
+        self.state = HALF_OPEN
+        self.trial_inflight = True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "success_rate": round(self.success_rate, 3),
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "consecutive_failures": self.consecutive_failures,
+            "sent": self.sent,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+
+class EmailProviderRouter:
+    def __init__(self, providers: List[str], probe: Optional[Probe] = None):
+        self.health: Dict[str, ProviderHealth] = {
+            name: ProviderHealth(name, order) for order, name in enumerate(providers)
+        }
+        self.probe = probe
+        self._task: Optional[asyncio.Task] = None
+
+    def candidates(self) -> List[str]:
+        """Providers to try for one send, best first.
+
+        Closed circuits are ranked by success-rate band, then latency. Unmeasured
+        providers rank first so each gets measured. A small share of sends
+        (EMAIL_ROUTER_EXPLORE_RATE) goes to a random runner-up to keep its
+        latency current. Open circuits whose cooldown has passed go last, as a
+        single trial.
+        """
+        now = time.monotonic()
+        closed = [h for h in self.health.values() if h.state == CLOSED]
+        closed.sort(key=lambda h: (
+            h.success_rate < settings.EMAIL_ROUTER_MIN_SUCCESS_RATE,
+            h.latency if h.latency is not None else 0.0,
+            h.order,
+        ))
+        if len(closed) > 1 and random.random() < settings.EMAIL_ROUTER_EXPLORE_RATE:
+            closed.insert(0, closed.pop(random.randrange(1, len(closed))))
+        trials = [h for h in self.health.values() if h.trial_due(now)]
+        trials.sort(key=lambda h: h.order)
+        return [h.name for h in closed] + [h.name for h in trials]
+
+    def preferred(self) -> Optional[str]:
+        candidates = self.candidates()
+        return candidates[0] if candidates else None
+
+    def allows(self, name: str) -> bool:
+        """Whether a send may go to `name` now: its circuit is closed or its trial is due."""
+        health = self.health[name]
+        return health.state == CLOSED or health.trial_due(time.monotonic())
+
+    def before_send(self, name: str) -> None:
+        health = self.health[name]
+        if health.state != CLOSED:
+            health.begin_trial()
+
+    def record(self, name: str, ok: bool, latency: Optional[float] = None) -> None:
+        self.health[name].record(ok, latency)
+
+    def record_rejected(self, name: str) -> None:
+        self.health[name].record_rejected()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: health.stats() for name, health in self.health.items()}
+
+    # Background recovery probes
+
+    def start(self) -> None:
+        if self.probe is not None and self._task is None:
+            self._task = asyncio.create_task(self._probe_loop(), name="email:probe")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _probe_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.EMAIL_ROUTER_PROBE_SECONDS)
+            now = time.monotonic()
+            due = [h for h in self.health.values() if h.trial_due(now)]
+            await asyncio.gather(*(self._probe(h) for h in due))
+
+    async def _probe(self, health: ProviderHealth) -> None:
+        health.begin_trial()
+        started = time.monotonic()
+        try:
+            ok = await asyncio.wait_for(self.probe(health.name), settings.EMAIL_HTTP_TIMEOUT_SECONDS)
+        except Exception as e:
+            print(f"⚠️ Email provider {health.name} probe failed: {e}")
+            ok = False
+        if ok is None:
+            # Nothing to probe with; the next real send is the trial
+            health.trial_inflight = False
+            return
+        health.record(ok, time.monotonic() - started)
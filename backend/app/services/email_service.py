@@ -3,15 +3,20 @@ Email service supporting multiple free email providers
 """
 import os
 import smtplib
-import ssl
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Hashable, List, NamedTuple, Tuple
 import httpx
 import asyncio
+import time
 from datetime import datetime
 from dotenv import load_dotenv
 
+from app.core.config import settings
+from app.core.email_templates import TemplateError, email_templates
+from app.core.smtp_pool import SMTPConnectionPool
+from app.services.email_router import EmailProviderRouter
+
 # Load environment variables
 import os
 from pathlib import Path
@@ -24,6 +29,51 @@ print(f".env exists: {env_path.exists()}")
 
 load_dotenv(env_path)
 
+
+OTP_EXPIRY_MINUTES = 10
+
+# Provider request limits for bulk sends
+RESEND_BATCH_LIMIT = 100
+SENDGRID_PERSONALIZATIONS_LIMIT = 1000
+# Total size of one personalization's substitutions
+SENDGRID_SUBSTITUTIONS_LIMIT = 10000
+# Stands in for the plain-text body in a shared SendGrid body
+SENDGRID_TEXT_TAG = "-text-"
+
+DIGEST_TEMPLATE = "notification_digest"
+
+
+# HTTP statuses that blame the provider or our account rather than the email
+PROVIDER_FAULT_STATUSES = {401, 403, 429}
+
+
+class EmailRejected(Exception):
+    """The provider refused this email (bad address, invalid request).
+
+    The provider itself is up, so this does not count against its circuit, and
+    retrying or failing over will not help.
+    """
+
+
+def _is_rejection(status_code: int) -> bool:
+    return 400 <= status_code < 500 and status_code not in PROVIDER_FAULT_STATUSES
+
+
+class EmailContent(NamedTuple):
+    subject: str
+    html: str
+    text: str = ""
+
+
+class BulkEmail(NamedTuple):
+    key: Hashable
+    to_email: str
+    content: EmailContent
+    # Template and context content.html was rendered from, when there is one
+    template: Optional[str] = None
+    context: Optional[Dict[str, Any]] = None
+
+
 class EmailService:
     def __init__(self):
         print(f"EmailService Initialization Debug")
@@ -32,251 +82,515 @@ class EmailService:
         
         self.providers = {
             'gmail': {
-                'smtp_server': 'smtp.gmail.com',
-                'smtp_port': 587,
+                'smtp_server': os.getenv('GMAIL_SMTP_SERVER', 'smtp.gmail.com'),
+                'smtp_port': int(os.getenv('GMAIL_SMTP_PORT', '587')),
                 'email': os.getenv('GMAIL_EMAIL'),
                 'password': os.getenv('GMAIL_APP_PASSWORD')
             },
             'outlook': {
-                'smtp_server': 'smtp-mail.outlook.com',
-                'smtp_port': 587,
+                'smtp_server': os.getenv('OUTLOOK_SMTP_SERVER', 'smtp-mail.outlook.com'),
+                'smtp_port': int(os.getenv('OUTLOOK_SMTP_PORT', '587')),
                 'email': os.getenv('OUTLOOK_EMAIL'),
                 'password': os.getenv('OUTLOOK_PASSWORD')
             },
             'yahoo': {
-                'smtp_server': 'smtp.mail.yahoo.com',
-                'smtp_port': 587,
+                'smtp_server': os.getenv('YAHOO_SMTP_SERVER', 'smtp.mail.yahoo.com'),
+                'smtp_port': int(os.getenv('YAHOO_SMTP_PORT', '587')),
                 'email': os.getenv('YAHOO_EMAIL'),
                 'password': os.getenv('YAHOO_APP_PASSWORD')
             },
             'resend': {
                 'api_key': os.getenv('RESEND_API_KEY'),
+                'api_url': os.getenv('RESEND_API_URL', 'https://api.resend.com'),
                 'from_email': os.getenv('RESEND_FROM_EMAIL', 'onboarding@resend.dev')
             },
             'sendgrid': {
                 'api_key': os.getenv('SENDGRID_API_KEY'),
+                'api_url': os.getenv('SENDGRID_API_URL', 'https://api.sendgrid.com'),
                 'from_email': os.getenv('SENDGRID_FROM_EMAIL')
             }
         }
         
         print(f"SendGrid config: api_key={'Set' if self.providers['sendgrid']['api_key'] else 'Not set'}, from_email={'Set' if self.providers['sendgrid']['from_email'] else 'Not set'}")
         
-        # Determine which service to use (priority order)
-        self.active_service = self._get_active_service()
-        print(f"Active service determined: {self.active_service}")
-        
-    def _get_active_service(self) -> str:
-        """Determine which email service to use based on available credentials"""
-        # Check Resend first (most reliable for free tier)
-        if self.providers['resend']['api_key']:
-            return 'resend'
+        # Every configured provider, best first; the router reorders by health
+        self.router = EmailProviderRouter(self._configured_providers(), probe=self._probe)
+        print(f"Email providers: {', '.join(self.router.health)}")
+
+        # Pooled connections, created on first use
+        self._http_clients: Dict[str, Tuple[httpx.AsyncClient, asyncio.AbstractEventLoop]] = {}
+        self._smtp_pools: Dict[str, SMTPConnectionPool] = {}
         
-        # Check SendGrid
-        if self.providers['sendgrid']['api_key']:
-            return 'sendgrid'
-            
-        # Check SMTP providers
+    def _configured_providers(self) -> List[str]:
+        """Providers with credentials, in default preference order"""
+        providers = []
+        # Resend first (most reliable for free tier), then SendGrid
+        for provider in ['resend', 'sendgrid']:
+            if self.providers[provider]['api_key']:
+                providers.append(provider)
         for provider in ['gmail', 'outlook', 'yahoo']:
             if (self.providers[provider]['email'] and 
                 self.providers[provider]['password']):
-                return provider
-                
-        # Fallback to console logging
-        return 'console'
+                providers.append(provider)
+        # Console logging only when nothing real is configured
+        return providers or ['console']
+
+    @property
+    def active_service(self) -> str:
+        """Provider the next email would go to"""
+        return self.router.preferred() or 'console'
     
+    def otp_email(self, otp_code: str, company_name: str) -> EmailContent:
+        """Build the OTP verification email"""
+        return EmailContent(
+            f"Your ReferConnect Verification Code for {company_name}",
+            email_templates.render("otp", {
+                "otp_code": otp_code,
+                "company_name": company_name,
+                "expiry_minutes": OTP_EXPIRY_MINUTES,
+            }),
+            f"Code: {otp_code}\nCompany: {company_name}\nExpires: {OTP_EXPIRY_MINUTES} minutes",
+        )
+
+    def notification_digest_email(self, first_name: Optional[str], items: List[Dict[str, str]]) -> EmailContent:
+        """Build one email summarizing a user's pending notifications"""
+        return self.notification_digest_emails([(first_name, items)])[0]
+
+    def notification_digest_emails(
+        self, digests: List[Tuple[Optional[str], List[Dict[str, str]]]]
+    ) -> List[EmailContent]:
+        """Build digest emails for a batch of recipients in one pass over the compiled template"""
+        html = email_templates.render_batch(DIGEST_TEMPLATE, [
+            self.notification_digest_context(first_name, items) for first_name, items in digests
+        ])
+        return [
+            EmailContent(
+                f"You have {len(items)} new update{'s' if len(items) != 1 else ''} on ReferConnect",
+                body,
+                "\n".join(f"- {item['title']}: {item['message']}" for item in items),
+            )
+            for (_, items), body in zip(digests, html)
+        ]
+
+    def notification_digest_context(self, first_name: Optional[str], items: List[Dict[str, str]]) -> Dict[str, Any]:
+        """Template context of one digest email"""
+        return {"greeting": f"Hello {first_name}" if first_name else "Hello", "items": items}
+
     async def send_otp_email(self, to_email: str, otp_code: str, company_name: str) -> bool:
         """Send OTP email using the active service"""
-        
-        if self.active_service == 'console':
-            return await self._send_console_email(to_email, otp_code, company_name)
-        elif self.active_service == 'resend':
-            return await self._send_resend_email(to_email, otp_code, company_name)
-        elif self.active_service == 'sendgrid':
-            return await self._send_sendgrid_email(to_email, otp_code, company_name)
-        else:
-            return await self._send_smtp_email(to_email, otp_code, company_name)
+        subject, html_content, text_content = self.otp_email(otp_code, company_name)
+        return await self.send_email(to_email, subject, html_content, text_content=text_content)
+
+    async def send_notification_digest(self, to_email: str, first_name: Optional[str], items: List[Dict[str, str]]) -> bool:
+        """Send one email summarizing a user's pending notifications"""
+        subject, html_content, text_content = self.notification_digest_email(first_name, items)
+        return await self.send_email(to_email, subject, html_content, text_content=text_content)
+
+    async def send_email(
+        self,
+        to_email: str,
+        subject: str,
+        html_content: str,
+        text_content: str = "",
+        console_fallback: bool = True
+    ) -> bool:
+        """Send an email via the best available provider, falling back to the console unless told not to"""
+        try:
+            if await self.deliver(to_email, subject, html_content, text_content):
+                return True
+        except EmailRejected as e:
+            print(f"❌ Email to {to_email} rejected: {e}")
+            return False
+        if not console_fallback:
+            return False
+        return await self._send_console_email(to_email, subject, text_content)
+
+    async def deliver(self, to_email: str, subject: str, html_content: str, text_content: str = "") -> Optional[str]:
+        """Try providers in health order; returns the one that accepted the email, or None.
+
+        Raises EmailRejected when a provider refuses the email itself.
+        """
+        for provider in self.router.candidates():
+            self.router.before_send(provider)
+            started = time.monotonic()
+            try:
+                sent = await self._send_via(provider, to_email, subject, html_content, text_content)
+            except EmailRejected:
+                self.router.record_rejected(provider)
+                raise
+            except Exception as e:
+                print(f"❌ {provider} error: {e}")
+                sent = False
+            self.router.record(provider, sent, time.monotonic() - started)
+            if sent:
+                return provider
+        return None
+
+    async def _send_via(self, provider: str, to_email: str, subject: str, html_content: str, text_content: str) -> bool:
+        if provider == 'console':
+            return await self._send_console_email(to_email, subject, text_content)
+        elif provider == 'resend':
+            return await self._send_resend_email(to_email, subject, html_content)
+        elif provider == 'sendgrid':
+            return await self._send_sendgrid_email(to_email, subject, html_content)
+        return await self._send_smtp_email(provider, to_email, subject, html_content)
+
+    async def _probe(self, provider: str) -> Optional[bool]:
+        """Cheap authenticated call used to check whether a tripped provider is back.
+
+        None for Resend: sending-only API keys can call nothing but the send
+        endpoints, so its trial is the next real send.
+        """
+        if provider == 'console':
+            return True
+        if provider == 'resend':
+            return None
+        if provider == 'sendgrid':
+            # Lists the key's own scopes; any key may call it
+            config = self.providers[provider]
+            response = await self._http_client(provider).get(
+                f"{config['api_url']}/v3/scopes",
+                headers={"Authorization": f"Bearer {config['api_key']}"}
+            )
+            return response.status_code == 200
+        await self._smtp_pool(provider).check()
+        return True
     
-    async def _send_console_email(self, to_email: str, otp_code: str, company_name: str) -> bool:
-        """Send OTP to console (fallback)"""
+    async def send_bulk(self, emails: List[BulkEmail]) -> Dict[Hashable, Optional[str]]:
+        """Send many emails with as few provider requests as possible.
+
+        Resend takes up to 100 different emails per batch request. SendGrid takes
+        up to 1000 recipients per request: emails rendered from the same template
+        share one body with per-recipient substitutions, other emails are grouped
+        by identical content. SMTP and console send one by one. Requests run concurrently, bounded by
+        EMAIL_BULK_CONCURRENCY. A failed request fails over to the next provider.
+        Returns each email's key mapped to the provider that accepted it, or None.
+        """
+        results: Dict[Hashable, Optional[str]] = {email.key: None for email in emails}
+        semaphore = asyncio.Semaphore(settings.EMAIL_BULK_CONCURRENCY)
+        await self._send_bulk_via(self.router.candidates(), emails, results, semaphore)
+        return results
+
+    async def _send_bulk_via(
+        self,
+        providers: List[str],
+        emails: List[BulkEmail],
+        results: Dict[Hashable, Optional[str]],
+        semaphore: asyncio.Semaphore
+    ) -> None:
+        if not providers or not emails:
+            return
+        provider, fallbacks = providers[0], providers[1:]
+
+        async def send_chunk(chunk: List[BulkEmail]) -> None:
+            async with semaphore:
+                # Concurrent chunks must not pile onto a circuit that just opened
+                # or is running its one trial
+                sent = rejected = False
+                if self.router.allows(provider):
+                    self.router.before_send(provider)
+                    try:
+                        sent = await self._send_bulk_chunk(provider, chunk)
+                    except EmailRejected as e:
+                        print(f"❌ {provider} rejected a batch of {len(chunk)}: {e}")
+                        rejected = True
+                    except Exception as e:
+                        print(f"❌ {provider} bulk error: {e}")
+                    if rejected:
+                        self.router.record_rejected(provider)
+                    else:
+                        self.router.record(provider, sent)
+            if sent:
+                for email in chunk:
+                    results[email.key] = provider
+            elif rejected:
+                # One bad address fails a whole batch request; send the others on their own.
+                # A single rejected email stays unsent.
+                if len(chunk) > 1:
+                    await asyncio.gather(*(
+                        self._send_bulk_via(providers, [email], results, semaphore) for email in chunk
+                    ))
+            else:
+                # Re-chunked for whatever the next provider accepts
+                await self._send_bulk_via(fallbacks, chunk, results, semaphore)
+
+        await asyncio.gather(*(send_chunk(chunk) for chunk in self._bulk_chunks(provider, emails)))
+
+    def _bulk_chunks(self, provider: str, emails: List[BulkEmail]) -> List[List[BulkEmail]]:
+        if provider == 'resend':
+            return _chunk(emails, RESEND_BATCH_LIMIT, settings.EMAIL_BULK_MAX_REQUEST_BYTES)
+        if provider == 'sendgrid':
+            groups: Dict[Hashable, List[BulkEmail]] = {}
+            for email in emails:
+                key = ('template', email.template) if self._fits_substitutions(email) else email.content
+                groups.setdefault(key, []).append(email)
+            return [
+                group[start:start + SENDGRID_PERSONALIZATIONS_LIMIT]
+                for group in groups.values()
+                for start in range(0, len(group), SENDGRID_PERSONALIZATIONS_LIMIT)
+            ]
+        return [[email] for email in emails]
+
+    async def _send_bulk_chunk(self, provider: str, chunk: List[BulkEmail]) -> bool:
+        if provider == 'resend':
+            config = self.providers['resend']
+            response = await self._http_client('resend').post(
+                f"{config['api_url']}/emails/batch",
+                headers={"Authorization": f"Bearer {config['api_key']}"},
+                json=[
+                    {
+                        "from": config['from_email'],
+                        "to": [email.to_email],
+                        "subject": email.content.subject,
+                        "html": email.content.html,
+                        "text": email.content.text,
+                    }
+                    for email in chunk
+                ]
+            )
+            if response.status_code != 200:
+                if _is_rejection(response.status_code):
+                    raise EmailRejected(f"Resend status {response.status_code}: {response.text}")
+                print(f"❌ Resend batch of {len(chunk)} failed: Status {response.status_code} {response.text}")
+                return False
+        elif provider == 'sendgrid':
+            config = self.providers['sendgrid']
+            response = await self._http_client('sendgrid').post(
+                f"{config['api_url']}/v3/mail/send",
+                headers={"Authorization": f"Bearer {config['api_key']}"},
+                json=self._sendgrid_bulk_payload(chunk)
+            )
+            if response.status_code != 202:
+                if _is_rejection(response.status_code):
+                    raise EmailRejected(f"SendGrid status {response.status_code}: {response.text}")
+                print(f"❌ SendGrid batch of {len(chunk)} failed: Status {response.status_code} {response.text}")
+                return False
+        else:
+            email = chunk[0]
+            return await self._send_via(
+                provider, email.to_email, email.content.subject, email.content.html, email.content.text
+            )
+        print(f"✅ Sent {len(chunk)} emails via {provider} batch")
+        return True
+
+    def _fits_substitutions(self, email: BulkEmail) -> bool:
+        """Whether a templated email can go out as substitutions into its template's
+        shared body, estimated from the size of its rendered body"""
+        if email.template is None or email.context is None:
+            return False
+        try:
+            template = email_templates.get(email.template)
+        except TemplateError:
+            return False
+        size = len(email.content.html.encode()) - template.static_bytes + len(email.content.text.encode())
+        return size + 256 <= SENDGRID_SUBSTITUTIONS_LIMIT
+
+    def _sendgrid_bulk_payload(self, chunk: List[BulkEmail]) -> Dict[str, Any]:
+        config = self.providers['sendgrid']
+        first = chunk[0]
+        if first.template is not None and self._fits_substitutions(first):
+            # One shared body; each personalization fills in its own pieces
+            template = email_templates.get(first.template)
+            return {
+                "personalizations": [
+                    {
+                        "to": [{"email": email.to_email}],
+                        "subject": email.content.subject,
+                        "substitutions": {
+                            **template.render_parts(email.context),
+                            SENDGRID_TEXT_TAG: email.content.text,
+                        },
+                    }
+                    for email in chunk
+                ],
+                "from": {"email": config['from_email']},
+                "content": [
+                    {"type": "text/plain", "value": SENDGRID_TEXT_TAG},
+                    {"type": "text/html", "value": template.shared_body},
+                ]
+            }
+        content = first.content
+        return {
+            # One personalization per recipient so nobody sees the others
+            "personalizations": [{"to": [{"email": email.to_email}]} for email in chunk],
+            "from": {"email": config['from_email']},
+            "subject": content.subject,
+            "content": ([{"type": "text/plain", "value": content.text}] if content.text else []) + [
+                {"type": "text/html", "value": content.html}
+            ]
+        }
+
+    async def _send_console_email(self, to_email: str, subject: str, text_content: str) -> bool:
+        """Print email to console (fallback)"""
         print(f"\n{'='*50}")
-        print(f"📧 OTP EMAIL")
+        print(f"📧 EMAIL")
         print(f"{'='*50}")
         print(f"To: {to_email}")
-        print(f"Subject: Your ReferConnect Verification Code for {company_name}")
-        print(f"Code: {otp_code}")
-        print(f"Company: {company_name}")
-        print(f"Expires: 10 minutes")
+        print(f"Subject: {subject}")
+        if text_content:
+            print(text_content)
         print(f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"{'='*50}\n")
         return True
     
-    async def _send_resend_email(self, to_email: str, otp_code: str, company_name: str) -> bool:
-        """Send OTP using Resend API"""
+    async def _send_resend_email(self, to_email: str, subject: str, html_content: str) -> bool:
+        """Send email using Resend API"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    "https://api.resend.com/emails",
-                    headers={
-                        "Authorization": f"Bearer {self.providers['resend']['api_key']}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "from": self.providers['resend']['from_email'],
-                        "to": [to_email],
-                        "subject": f"Your ReferConnect Verification Code for {company_name}",
-                        "html": self._get_otp_email_template(otp_code, company_name)
-                    }
-                )
-                
-                if response.status_code == 200:
-                    print(f"✅ OTP sent via Resend to {to_email}")
-                    return True
-                else:
-                    print(f"❌ Resend failed: {response.text}")
-                    return await self._send_console_email(to_email, otp_code, company_name)
+            response = await self._http_client('resend').post(
+                f"{self.providers['resend']['api_url']}/emails",
+                headers={
+                    "Authorization": f"Bearer {self.providers['resend']['api_key']}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "from": self.providers['resend']['from_email'],
+                    "to": [to_email],
+                    "subject": subject,
+                    "html": html_content
+                }
+            )
+            
+            if response.status_code == 200:
+                print(f"✅ Email sent via Resend to {to_email}")
+                return True
+            elif _is_rejection(response.status_code):
+                raise EmailRejected(f"Resend status {response.status_code}: {response.text}")
+            else:
+                print(f"❌ Resend failed: {response.text}")
+                return False
                     
+        except EmailRejected:
+            raise
         except Exception as e:
             print(f"❌ Resend error: {e}")
-            return await self._send_console_email(to_email, otp_code, company_name)
+            return False
     
-    async def _send_sendgrid_email(self, to_email: str, otp_code: str, company_name: str) -> bool:
-        """Send OTP using SendGrid API"""
+    async def _send_sendgrid_email(self, to_email: str, subject: str, html_content: str) -> bool:
+        """Send email using SendGrid API"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    "https://api.sendgrid.com/v3/mail/send",
-                    headers={
-                        "Authorization": f"Bearer {self.providers['sendgrid']['api_key']}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "personalizations": [{
-                            "to": [{"email": to_email}]
-                        }],
-                        "from": {"email": self.providers['sendgrid']['from_email']},
-                        "subject": f"Your ReferConnect Verification Code for {company_name}",
-                        "content": [{
-                            "type": "text/html",
-                            "value": self._get_otp_email_template(otp_code, company_name)
-                        }]
-                    }
-                )
-                
-                print(f"SendGrid Response: Status {response.status_code}")
-                print(f"SendGrid Response Body: {response.text}")
-                
-                if response.status_code == 202:
-                    print(f"✅ OTP sent via SendGrid to {to_email}")
-                    return True
-                else:
-                    print(f"❌ SendGrid failed: {response.text}")
-                    return await self._send_console_email(to_email, otp_code, company_name)
+            response = await self._http_client('sendgrid').post(
+                f"{self.providers['sendgrid']['api_url']}/v3/mail/send",
+                headers={
+                    "Authorization": f"Bearer {self.providers['sendgrid']['api_key']}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "personalizations": [{
+                        "to": [{"email": to_email}]
+                    }],
+                    "from": {"email": self.providers['sendgrid']['from_email']},
+                    "subject": subject,
+                    "content": [{
+                        "type": "text/html",
+                        "value": html_content
+                    }]
+                }
+            )
+            
+            if response.status_code == 202:
+                print(f"✅ Email sent via SendGrid to {to_email}")
+                return True
+            elif _is_rejection(response.status_code):
+                raise EmailRejected(f"SendGrid status {response.status_code}: {response.text}")
+            else:
+                print(f"❌ SendGrid failed: Status {response.status_code} {response.text}")
+                return False
                     
+        except EmailRejected:
+            raise
         except Exception as e:
             print(f"❌ SendGrid error: {e}")
-            return await self._send_console_email(to_email, otp_code, company_name)
+            return False
     
-    async def _send_smtp_email(self, to_email: str, otp_code: str, company_name: str) -> bool:
-        """Send OTP using SMTP"""
-        provider = self.providers[self.active_service]
+    async def _send_smtp_email(self, provider_name: str, to_email: str, subject: str, html_content: str) -> bool:
+        """Send email using SMTP"""
+        provider = self.providers[provider_name]
         
         try:
             # Create message
             message = MIMEMultipart("alternative")
-            message["Subject"] = f"Your ReferConnect Verification Code for {company_name}"
+            message["Subject"] = subject
             message["From"] = f"ReferConnect <{provider['email']}>"
             message["To"] = to_email
             
-            # Create HTML content
-            html_content = self._get_otp_email_template(otp_code, company_name)
             html_part = MIMEText(html_content, "html")
             message.attach(html_part)
             
-            # Create secure connection and send email
-            context = ssl.create_default_context()
-            with smtplib.SMTP(provider['smtp_server'], provider['smtp_port']) as server:
-                server.starttls(context=context)
-                server.login(provider['email'], provider['password'])
-                server.sendmail(provider['email'], to_email, message.as_string())
+            # Reuses an authenticated session; the blocking I/O runs off the event loop
+            await self._smtp_pool(provider_name).send(provider['email'], [to_email], message.as_string())
             
-            print(f"✅ OTP sent via {self.active_service.upper()} to {to_email}")
+            print(f"✅ Email sent via {provider_name.upper()} to {to_email}")
             return True
             
+        except smtplib.SMTPRecipientsRefused as e:
+            raise EmailRejected(f"{provider_name.upper()} refused {to_email}: {e.recipients}")
         except Exception as e:
-            print(f"❌ {self.active_service.upper()} SMTP error: {e}")
-            return await self._send_console_email(to_email, otp_code, company_name)
-    
-    def _get_otp_email_template(self, otp_code: str, company_name: str) -> str:
-        """Generate beautiful HTML email template for OTP"""
-        return f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Your ReferConnect Verification Code</title>
-        </head>
-        <body style="margin: 0; padding: 0; font-family: Arial, sans-serif; background-color: #f4f4f4;">
-            <div style="max-width: 600px; margin: 0 auto; background-color: #ffffff; padding: 0;">
-                <!-- Header -->
-                <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 40px 20px; text-align: center;">
-                    <h1 style="color: #ffffff; margin: 0; font-size: 28px; font-weight: bold;">
-                        ReferConnect
-                    </h1>
-                    <p style="color: #ffffff; margin: 10px 0 0 0; font-size: 16px; opacity: 0.9;">
-                        Professional Referral Network
-                    </p>
-                </div>
-                
-                <!-- Content -->
-                <div style="padding: 40px 30px;">
-                    <h2 style="color: #333333; margin: 0 0 20px 0; font-size: 24px; text-align: center;">
-                        Email Verification
-                    </h2>
-                    
-                    <p style="color: #666666; font-size: 16px; line-height: 1.6; margin: 0 0 30px 0;">
-                        Hello! You're verifying your email for <strong>{company_name}</strong> on ReferConnect.
-                    </p>
-                    
-                    <div style="background-color: #f8f9fa; border: 2px dashed #667eea; border-radius: 8px; padding: 30px; text-align: center; margin: 30px 0;">
-                        <p style="color: #333333; font-size: 14px; margin: 0 0 10px 0; font-weight: bold;">
-                            Your Verification Code
-                        </p>
-                        <div style="background-color: #667eea; color: #ffffff; font-size: 32px; font-weight: bold; letter-spacing: 8px; padding: 20px; border-radius: 8px; margin: 10px 0; font-family: 'Courier New', monospace;">
-                            {otp_code}
-                        </div>
-                        <p style="color: #666666; font-size: 12px; margin: 10px 0 0 0;">
-                            This code expires in 10 minutes
-                        </p>
-                    </div>
-                    
-                    <div style="background-color: #fff3cd; border: 1px solid #ffeaa7; border-radius: 6px; padding: 15px; margin: 20px 0;">
-                        <p style="color: #856404; font-size: 14px; margin: 0; font-weight: bold;">
-                            ⚠️ Security Notice
-                        </p>
-                        <p style="color: #856404; font-size: 13px; margin: 5px 0 0 0;">
-                            Never share this code with anyone. ReferConnect will never ask for your verification code via phone or email.
-                        </p>
-                    </div>
-                    
-                    <p style="color: #666666; font-size: 14px; line-height: 1.6; margin: 30px 0 0 0;">
-                        If you didn't request this verification, please ignore this email or contact our support team.
-                    </p>
-                </div>
-                
-                <!-- Footer -->
-                <div style="background-color: #f8f9fa; padding: 20px 30px; text-align: center; border-top: 1px solid #e9ecef;">
-                    <p style="color: #666666; font-size: 12px; margin: 0 0 10px 0;">
-                        This email was sent by ReferConnect
-                    </p>
-                    <p style="color: #999999; font-size: 11px; margin: 0;">
-                        © 2024 ReferConnect. All rights reserved.
-                    </p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
+            print(f"❌ {provider_name.upper()} SMTP error: {e}")
+            return False
+
+    def _http_client(self, provider: str) -> httpx.AsyncClient:
+        """Long-lived keep-alive client per HTTP provider, bound to the running event loop"""
+        loop = asyncio.get_running_loop()
+        entry = self._http_clients.get(provider)
+        if entry is not None and entry[1] is loop and not entry[0].is_closed:
+            return entry[0]
+        client = httpx.AsyncClient(
+            timeout=settings.EMAIL_HTTP_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=settings.EMAIL_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.EMAIL_HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=settings.EMAIL_HTTP_KEEPALIVE_SECONDS,
+            ),
+        )
+        # A client from an earlier event loop (CLI runs) cannot be reused or closed here
+        self._http_clients[provider] = (client, loop)
+        return client
+
+    def _smtp_pool(self, provider: str) -> SMTPConnectionPool:
+        pool = self._smtp_pools.get(provider)
+        if pool is None:
+            config = self.providers[provider]
+            pool = SMTPConnectionPool(
+                config['smtp_server'],
+                config['smtp_port'],
+                config['email'],
+                config['password'],
+                size=settings.EMAIL_SMTP_POOL_SIZE,
+                idle_seconds=settings.EMAIL_SMTP_IDLE_SECONDS,
+                timeout=settings.EMAIL_SMTP_TIMEOUT_SECONDS,
+            )
+            self._smtp_pools[provider] = pool
+        return pool
+
+    async def aclose(self) -> None:
+        """Stop health probes and close pooled provider connections (app shutdown)"""
+        await self.router.stop()
+        loop = asyncio.get_running_loop()
+        clients, self._http_clients = self._http_clients, {}
+        for client, client_loop in clients.values():
+            if client_loop is loop:
+                await client.aclose()
+        pools, self._smtp_pools = self._smtp_pools, {}
+        for pool in pools.values():
+            await asyncio.to_thread(pool.close)
+
+
+def _chunk(emails: List[BulkEmail], max_count: int, max_bytes: int) -> List[List[BulkEmail]]:
+    """Split into requests of at most max_count emails and roughly max_bytes of content"""
+    chunks: List[List[BulkEmail]] = []
+    current: List[BulkEmail] = []
+    size = 0
+    for email in emails:
+        email_size = len(email.content.html) + len(email.content.text) + len(email.content.subject) + 256
+        if current and (len(current) >= max_count or size + email_size > max_bytes):
+            chunks.append(current)
+            current, size = [], 0
+        current.append(email)
+        size += email_size
+    if current:
+        chunks.append(current)
+    return chunks
+
 
 # Global email service instance
 email_service = EmailService()
@@ -0,0 +1,372 @@
+"""
+Streaming fraud detection.
+
+Subscribes to referral and referral-request creation events, keeps sliding-window
+counters per rule and group key in memory, and raises FraudAlert rows in batches.
+Rules come from fraud_detection_rules; conditions look like:
+
+    {
+        "event": "referral_request.created",
+        "group_by": ["actor_id", "company_id"],
+        "window_seconds": 3600,
+        "threshold": 10,
+        "activity_type": "spam_behavior"
+    }
+
+An alert fires when the windowed count exceeds the threshold, then the key is
+muted for one window. Counters are per process and are checkpointed to disk so a
+restart does not reset them.
+
+Each worker writes its own checkpoint, FRAUD_STREAM_CHECKPOINT_PATH with its pid
+inserted before the extension. On start a worker claims the checkpoints of
+processes that are no longer running (rename, so only one worker gets each) and
+merges them into its counters, so no state is lost or counted twice however the
+worker count changes between runs.
+"""
+import glob
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, select
+from sqlmodel import Session
+
+from app.core import events
+from app.core.config import settings
+from app.db.session import engine
+from app.models.trust import FraudAlert, FraudDetectionRule
+from app.schemas.trust import FraudRiskLevel, SuspiciousActivityType
+
+# Used only when no active rules exist in fraud_detection_rules
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {
+        "id": -1,
+        "name": "Repeated referrals to the same job",
+        "risk_score": 50,
+        "conditions": {
+            "event": events.REFERRAL_CREATED,
+            "group_by": ["actor_id", "job_id"],
+            "window_seconds": 7 * 24 * 3600,
+            "threshold": 3,
+            "activity_type": SuspiciousActivityType.fake_referrals.value,
+        },
+    },
+    {
+        "id": -2,
+        "name": "Referral request burst",
+        "risk_score": 60,
+        "conditions": {
+            "event": events.REFERRAL_REQUEST_CREATED,
+            "group_by": ["actor_id"],
+            "window_seconds": 3600,
+            "threshold": 20,
+            "activity_type": SuspiciousActivityType.spam_behavior.value,
+        },
+    },
+    {
+        "id": -3,
+        "name": "Requests sprayed across one company",
+        "risk_score": 50,
+        "conditions": {
+            "event": events.REFERRAL_REQUEST_CREATED,
+            "group_by": ["actor_id", "company_id"],
+            "window_seconds": 24 * 3600,
+            "threshold": 8,
+            "activity_type": SuspiciousActivityType.spam_behavior.value,
+        },
+    },
+]
+
+
+class SlidingWindowCounter:
+    """Event count over the trailing window, bucketed so add() is amortized O(1)."""
+
+    __slots__ = ("window", "bucket_seconds", "buckets", "total")
+
+    def __init__(self, window_seconds: int, resolution: int = 60):
+        self.window = window_seconds
+        self.bucket_seconds = max(1, window_seconds // resolution)
+        self.buckets: Deque[List[int]] = deque()
+        self.total = 0
+
+    def add(self, now: float, amount: int = 1) -> int:
+        bucket = int(now) - int(now) % self.bucket_seconds
+        self.expire(now)
+        if self.buckets and self.buckets[-1][0] == bucket:
+            self.buckets[-1][1] += amount
+        else:
+            self.buckets.append([bucket, amount])
+        self.total += amount
+        return self.total
+
+    def expire(self, now: float) -> None:
+        horizon = now - self.window
+        while self.buckets and self.buckets[0][0] + self.bucket_seconds <= horizon:
+            self.total -= self.buckets.popleft()[1]
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    id: int
+    name: str
+    event: str
+    group_by: Tuple[str, ...]
+    window_seconds: int
+    threshold: int
+    activity_type: str
+    risk_level: str
+
+    @classmethod
+    def from_row(cls, rule_id: int, name: str, risk_score: int, conditions: Dict[str, Any]) -> Optional["CompiledRule"]:
+        event = conditions.get("event")
+        if event not in (events.REFERRAL_CREATED, events.REFERRAL_REQUEST_CREATED):
+            return None
+        return cls(
+            id=rule_id,
+            name=name,
+            event=event,
+            group_by=tuple(conditions.get("group_by") or ["actor_id"]),
+            window_seconds=int(conditions.get("window_seconds", 3600)),
+            threshold=int(conditions.get("threshold", 10)),
+            activity_type=conditions.get("activity_type", SuspiciousActivityType.unusual_patterns.value),
+            risk_level=risk_level_for(risk_score),
+        )
+
+
+def risk_level_for(risk_score: int) -> str:
+    if risk_score >= 80:
+        return FraudRiskLevel.critical.value
+    if risk_score >= 60:
+        return FraudRiskLevel.high.value
+    if risk_score >= 30:
+        return FraudRiskLevel.medium.value
+    return FraudRiskLevel.low.value
+
+
+def _process_running(pid: int) -> bool:
+    if pid == os.getpid():
+        # A checkpoint under our own pid was left by an earlier process
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class FraudStreamEngine:
+    def __init__(self, checkpoint_path: Optional[str] = None):
+        self.checkpoint_path = checkpoint_path or settings.FRAUD_STREAM_CHECKPOINT_PATH
+        self.rules_by_event: Dict[str, List[CompiledRule]] = {}
+        self.counters: Dict[Tuple[Any, ...], SlidingWindowCounter] = {}
+        self.muted_until: Dict[Tuple[Any, ...], float] = {}
+        self.pending_alerts: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    # Rules
+
+    def set_rules(self, rules: List[CompiledRule]) -> None:
+        by_event: Dict[str, List[CompiledRule]] = {}
+        for rule in rules:
+            by_event.setdefault(rule.event, []).append(rule)
+        live = {(rule.id, rule.window_seconds) for rule in rules}
+        with self._lock:
+            self.rules_by_event = by_event
+            # Drop state for removed rules or rules whose window changed
+            self.counters = {k: c for k, c in self.counters.items() if (k[0], c.window) in live}
+            self.muted_until = {k: t for k, t in self.muted_until.items() if any(k[0] == r.id for r in rules)}
+
+    def load_rules(self, db: Session) -> int:
+        rows = db.execute(
+            select(FraudDetectionRule.id, FraudDetectionRule.name, FraudDetectionRule.risk_score, FraudDetectionRule.conditions)
+            .where(FraudDetectionRule.is_active == True)
+        ).all()
+        source = [
+            {"id": r.id, "name": r.name, "risk_score": r.risk_score, "conditions": r.conditions or {}}
+            for r in rows
+        ] or DEFAULT_RULES
+        return self._apply_rules(source)
+
+    def _apply_rules(self, source: List[Dict[str, Any]]) -> int:
+        compiled = [
+            rule for rule in (
+                CompiledRule.from_row(r["id"], r["name"], r["risk_score"], r["conditions"]) for r in source
+            ) if rule
+        ]
+        self.set_rules(compiled)
+        return len(compiled)
+
+    # Event path
+
+    def handle_event(self, event: str, payload: Dict[str, Any], now: Optional[float] = None) -> None:
+        now = now if now is not None else time.time()
+        rules = self.rules_by_event.get(event)
+        if not rules or payload.get("actor_id") is None:
+            return
+        with self._lock:
+            for rule in rules:
+                group = tuple(payload.get(field) for field in rule.group_by)
+                if None in group:
+                    continue
+                key = (rule.id, *group)
+                counter = self.counters.get(key)
+                if counter is None:
+                    counter = self.counters[key] = SlidingWindowCounter(rule.window_seconds)
+                count = counter.add(now)
+                if count > rule.threshold and self.muted_until.get(key, 0) <= now:
+                    self.muted_until[key] = now + rule.window_seconds
+                    self.pending_alerts.append(self._alert(rule, group, count, payload))
+
+    def _alert(self, rule: CompiledRule, group: Tuple[Any, ...], count: int, payload: Dict[str, Any]) -> Dict[str, Any]:
+        now = datetime.utcnow()
+        return {
+            "user_id": payload["actor_id"],
+            "activity_type": rule.activity_type,
+            "risk_level": rule.risk_level,
+            "description": f"{rule.name}: {count} events in {rule.window_seconds // 60} minutes",
+            "evidence": {
+                "rule_id": rule.id,
+                "event": rule.event,
+                "count": count,
+                "threshold": rule.threshold,
+                "window_seconds": rule.window_seconds,
+                "group": dict(zip(rule.group_by, group)),
+            },
+            "status": "open",
+            "created_at": now,
+            "updated_at": now,
+        }
+
+    # Batched persistence
+
+    def flush_alerts(self, db: Session) -> int:
+        with self._lock:
+            alerts, self.pending_alerts = self.pending_alerts, []
+        if not alerts:
+            return 0
+        try:
+            db.execute(insert(FraudAlert), alerts)
+            db.commit()
+        except Exception:
+            with self._lock:
+                self.pending_alerts[:0] = alerts
+            raise
+        return len(alerts)
+
+    def compact(self, now: Optional[float] = None) -> None:
+        """Forget idle counters and expired mutes so memory tracks active users only."""
+        now = now if now is not None else time.time()
+        with self._lock:
+            for key in list(self.counters):
+                counter = self.counters[key]
+                counter.expire(now)
+                if not counter.total:
+                    del self.counters[key]
+            self.muted_until = {k: t for k, t in self.muted_until.items() if t > now}
+
+    # Checkpointing
+
+    def worker_checkpoint_path(self, pid: Optional[int] = None) -> str:
+        root, ext = os.path.splitext(self.checkpoint_path)
+        return f"{root}.{pid or os.getpid()}{ext}"
+
+    def checkpoint(self) -> None:
+        self.compact()
+        with self._lock:
+            state = {
+                "counters": [
+                    [list(key), c.window, [list(b) for b in c.buckets]] for key, c in self.counters.items()
+                ],
+                "muted_until": [[list(key), until] for key, until in self.muted_until.items()],
+            }
+        path = self.worker_checkpoint_path()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    def restore(self) -> int:
+        """Merge in the checkpoints of exited workers; returns how many were claimed."""
+        claimed = 0
+        for path in self._orphaned_checkpoints():
+            claim_path = f"{path}.{os.getpid()}.claimed"
+            try:
+                os.rename(path, claim_path)
+            except OSError:
+                # Gone, or claimed by another worker first
+                continue
+            try:
+                with open(claim_path) as f:
+                    self._merge(json.load(f))
+                claimed += 1
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"⚠️ Ignoring unreadable fraud checkpoint {path}: {e}")
+            finally:
+                os.remove(claim_path)
+        return claimed
+
+    def _orphaned_checkpoints(self) -> List[str]:
+        root, ext = os.path.splitext(self.checkpoint_path)
+        # The unsuffixed path is where checkpoints went before they were per worker
+        paths = [self.checkpoint_path] if os.path.exists(self.checkpoint_path) else []
+        for path in glob.glob(f"{glob.escape(root)}.*{ext}"):
+            pid = path[len(root) + 1:len(path) - len(ext)]
+            if pid.isdigit() and not _process_running(int(pid)):
+                paths.append(path)
+        return paths
+
+    def _merge(self, state: Dict[str, Any]) -> None:
+        with self._lock:
+            for key, window, buckets in state.get("counters", []):
+                key = tuple(key)
+                counter = self.counters.get(key)
+                if counter is None or counter.window != window:
+                    counter = self.counters[key] = SlidingWindowCounter(window)
+                merged: Dict[int, int] = {start: count for start, count in counter.buckets}
+                for start, count in buckets:
+                    merged[start] = merged.get(start, 0) + count
+                counter.buckets = deque([start, count] for start, count in sorted(merged.items()))
+                counter.total = sum(merged.values())
+            for key, until in state.get("muted_until", []):
+                key = tuple(key)
+                self.muted_until[key] = max(until, self.muted_until.get(key, 0))
+
+    # Lifecycle
+
+    def start(self) -> None:
+        self.restore()
+        try:
+            with Session(engine) as session:
+                count = self.load_rules(session)
+        except Exception as e:
+            print(f"⚠️ Could not load fraud rules, using defaults: {e}")
+            count = self._apply_rules(DEFAULT_RULES)
+        events.subscribe(events.REFERRAL_CREATED, self.handle_event)
+        events.subscribe(events.REFERRAL_REQUEST_CREATED, self.handle_event)
+        print(f"Fraud stream engine started with {count} rules")
+
+    def stop(self) -> None:
+        events.unsubscribe(events.REFERRAL_CREATED, self.handle_event)
+        events.unsubscribe(events.REFERRAL_REQUEST_CREATED, self.handle_event)
+        run_fraud_alert_flush()
+        self.checkpoint()
+
+
+fraud_engine = FraudStreamEngine()
+
+
+def run_fraud_alert_flush() -> int:
+    with Session(engine) as session:
+        return fraud_engine.flush_alerts(session)
+
+
+def run_fraud_rules_reload() -> int:
+    with Session(engine) as session:
+        return fraud_engine.load_rules(session)
@@ -5,6 +5,7 @@ from fastapi import HTTPException, status
 
 from app.models.user import Job, Employee, Company, User
 from app.schemas.job import JobCreate, JobUpdate, JobSearchParams
+from app.db.replicas import read_only
 
 
 class JobService:
@@ -106,6 +107,7 @@ class JobService:
         await self.db.commit()
         return True
 
+    @read_only
     async def search_jobs(self, search_params: JobSearchParams) -> Tuple[List[Job], int]:
         """Search jobs with filters."""
         query = select(Job)
@@ -159,6 +161,7 @@ class JobService:
         
         return jobs, total
 
+    @read_only
     async def get_job_with_details(self, job_id: int) -> Optional[Job]:
         """Get job with company and employee details."""
         job = await self.get_job_by_id(job_id)
@@ -168,6 +171,7 @@ class JobService:
         # Return job as-is for now - we'll handle details in the response model
         return job
 
+    @read_only
     async def get_company_jobs(self, company_id: int, skip: int = 0, limit: int = 100) -> List[Job]:
         """Get jobs for a specific company."""
         query = select(Job).where(
@@ -177,6 +181,7 @@ class JobService:
         result = await self.db.execute(query)
         return result.scalars().all()
 
+    @read_only
     async def get_employee_jobs(self, employee_id: int, skip: int = 0, limit: int = 100) -> List[Job]:
         """Get jobs posted by a specific employee."""
         query = select(Job).where(Job.employee_id == employee_id).offset(skip).limit(limit).order_by(Job.created_at.desc())
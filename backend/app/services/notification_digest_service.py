@@ -0,0 +1,108 @@
+"""
+Scheduled email digest of pending notifications.
+
+Instead of one email per notification, every notification with the email channel
+waits until the next digest run; each recipient then gets at most one email listing
+what they have not already read in-app. Digests go through the email outbox in
+the lowest-priority lane. Processed notifications are stamped with
+sent_at so they are never emailed twice and stop absorbing coalesced updates.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, select, update
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.db.session import engine
+from app.models.notification import Notification
+from app.models.user import User
+from app.services.email_outbox_service import EmailOutboxService, PRIORITY_DIGEST, email_dispatcher
+from app.services.email_service import DIGEST_TEMPLATE, email_service
+from app.services.notification_service import NotificationService
+
+EMAIL_CHANNEL = '%"email"%'
+
+
+class NotificationDigestService:
+    def __init__(self, db: Session, batch_users: Optional[int] = None):
+        self.db = db
+        self.batch_users = batch_users or settings.NOTIFICATION_EMAIL_DIGEST_BATCH_USERS
+
+    def send_email_digests(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        now = now or datetime.utcnow()
+        stats = {"users": 0, "emails": 0, "notifications": 0}
+        last_user_id = 0
+        while True:
+            user_ids = self.db.execute(
+                select(Notification.recipient_id)
+                .where(and_(self._pending(now), Notification.recipient_id > last_user_id))
+                .group_by(Notification.recipient_id)
+                .order_by(Notification.recipient_id)
+                .limit(self.batch_users)
+            ).scalars().all()
+            if not user_ids:
+                return stats
+            last_user_id = user_ids[-1]
+            batch = self._process_batch(user_ids, now)
+            for key in stats:
+                stats[key] += batch[key]
+
+    def _pending(self, now: datetime):
+        return and_(
+            Notification.sent_at == None,
+            Notification.channels.like(EMAIL_CHANNEL),
+            Notification.created_at <= now,
+        )
+
+    def _process_batch(self, user_ids: List[int], now: datetime) -> Dict[str, int]:
+        rows = self.db.execute(
+            select(Notification.id, Notification.recipient_id, Notification.title, Notification.message, Notification.is_read)
+            .where(and_(self._pending(now), Notification.recipient_id.in_(user_ids)))
+            .order_by(Notification.recipient_id, Notification.created_at)
+        ).all()
+        users = {
+            u.id: u for u in self.db.execute(
+                select(User.id, User.email, User.first_name).where(User.id.in_(user_ids))
+            ).all()
+        }
+        preferences = NotificationService(self.db).get_preferences_bulk(user_ids)
+        opted_out = {user_id for user_id, prefs in preferences.items() if not prefs.email_notifications}
+
+        # Already-read notifications are consumed without emailing them
+        digests: Dict[int, List[Dict[str, str]]] = {}
+        for row in rows:
+            if not row.is_read and row.recipient_id not in opted_out and row.recipient_id in users:
+                digests.setdefault(row.recipient_id, []).append({"title": row.title, "message": row.message})
+
+        # Queued in the same transaction that stamps sent_at, so a digest is never lost or doubled
+        recipients = list(digests)
+        batch = [(users[user_id].first_name, digests[user_id]) for user_id in recipients]
+        emails = email_service.notification_digest_emails(batch)
+        queued = EmailOutboxService(self.db).enqueue_many(
+            [(users[user_id].email, email) for user_id, email in zip(recipients, emails)],
+            priority=PRIORITY_DIGEST,
+            template=DIGEST_TEMPLATE,
+            contexts=[email_service.notification_digest_context(*digest) for digest in batch],
+        )
+
+        ids = [row.id for row in rows]
+        for start in range(0, len(ids), 1000):
+            self.db.execute(
+                update(Notification)
+                .where(Notification.id.in_(ids[start:start + 1000]))
+                .values(sent_at=now)
+            )
+        self.db.commit()
+        email_dispatcher.notify()
+        return {"users": len(user_ids), "emails": queued, "notifications": len(ids)}
+
+
+def run_notification_email_digest() -> Dict[str, int]:
+    """Scheduled entry point: one digest email per user with pending notifications."""
+    started = datetime.utcnow()
+    with Session(engine) as session:
+        stats = NotificationDigestService(session).send_email_digests()
+    elapsed = (datetime.utcnow() - started).total_seconds()
+    print(f"✅ Notification digest: {stats['emails']} emails queued covering {stats['notifications']} notifications in {elapsed:.1f}s")
+    return stats
@@ -0,0 +1,211 @@
+"""
+Notification retention: keep the hot notifications table small.
+
+Notifications older than NOTIFICATION_RETENTION_DAYS, and archived ones older than
+NOTIFICATION_ARCHIVED_RETENTION_DAYS, are moved to notifications_archive in
+batches, with the per-user counters adjusted in the same transaction.
+
+On Postgres, notifications is range-partitioned by month on created_at. The
+notification_partitions migration converts an existing table; a table created
+from the models afterwards (fresh installs) starts plain and is converted the same
+way by `python archive_notifications.py --partition`, a one-off that locks the
+table while it copies the rows. The job only warns about a plain table. It creates
+partitions ahead of time and drops the monthly partitions that the move has emptied. SQLite has no
+partitions; the batch move alone keeps the window.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, insert, literal, or_, select, text
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.db.session import engine
+from app.models.notification import Notification, NotificationArchive
+from app.services.notification_service import bump_counters
+
+PARTITION_PREFIX = "notifications_p"
+
+
+def month_start(ts: datetime, offset: int = 0) -> datetime:
+    month = ts.year * 12 + ts.month - 1 + offset
+    return datetime(month // 12, month % 12 + 1, 1)
+
+
+def partition_name(start: datetime) -> str:
+    return f"{PARTITION_PREFIX}{start:%Y%m}"
+
+
+class NotificationRetentionService:
+    def __init__(self, db: Session, batch_size: Optional[int] = None):
+        self.db = db
+        self.batch_size = batch_size or settings.NOTIFICATION_RETENTION_BATCH_SIZE
+        self.is_postgres = db.get_bind().dialect.name == "postgresql"
+
+    def run(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        now = now or datetime.utcnow()
+        created = self.ensure_partitions(now) if self.is_postgres else 0
+        moved = self.move_to_archive(now)
+        dropped = self.drop_empty_partitions(now) if self.is_postgres else 0
+        return {"moved": moved, "partitions_created": created, "partitions_dropped": dropped}
+
+    # Hot -> cold
+
+    def move_to_archive(self, now: datetime) -> int:
+        old_cutoff = now - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
+        archived_cutoff = now - timedelta(days=settings.NOTIFICATION_ARCHIVED_RETENTION_DAYS)
+        expired = or_(
+            Notification.created_at < old_cutoff,
+            and_(Notification.is_archived == True, Notification.updated_at < archived_cutoff),
+        )
+        columns = [c.name for c in NotificationArchive.__table__.columns if c.name != "archived_at"]
+        source = Notification.__table__.c
+
+        moved = 0
+        while True:
+            rows = self.db.execute(
+                select(Notification.id, Notification.recipient_id, Notification.is_read, Notification.is_archived)
+                .where(expired)
+                .order_by(Notification.id)
+                .limit(self.batch_size)
+            ).all()
+            if not rows:
+                return moved
+            ids = [row.id for row in rows]
+            self.db.execute(
+                insert(NotificationArchive).from_select(
+                    columns + ["archived_at"],
+                    select(*[source[name] for name in columns], literal(now)).where(source.id.in_(ids)),
+                )
+            )
+            self.db.execute(delete(Notification).where(Notification.id.in_(ids)))
+            bump_counters(self.db, self._counter_deltas(rows))
+            self.db.commit()
+            moved += len(ids)
+
+    @staticmethod
+    def _counter_deltas(rows) -> Dict[int, Tuple[int, int]]:
+        # Archived rows already left both counters when they were archived
+        deltas: Dict[int, Tuple[int, int]] = {}
+        for row in rows:
+            if row.is_archived:
+                continue
+            total, unread = deltas.get(row.recipient_id, (0, 0))
+            deltas[row.recipient_id] = (total - 1, unread - (0 if row.is_read else 1))
+        return deltas
+
+    # Postgres partition maintenance
+
+    def partitions(self) -> List[str]:
+        return self.db.execute(text(
+            """
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            WHERE p.relname = 'notifications'
+            """
+        )).scalars().all()
+
+    def ensure_partitions(self, now: datetime) -> int:
+        existing = set(self.partitions())
+        if not existing and self.table_kind() == "r":
+            print("⚠️ notifications is not partitioned; run `python archive_notifications.py --partition` once")
+            return 0
+        created = 0
+        for offset in range(settings.NOTIFICATION_PARTITION_MONTHS_AHEAD + 1):
+            start = month_start(now, offset)
+            name = partition_name(start)
+            if name in existing:
+                continue
+            try:
+                self.db.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF notifications "
+                    f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{month_start(start, 1):%Y-%m-%d}')"
+                ))
+                self.db.commit()
+                created += 1
+            except Exception as e:
+                # Usually rows for this month already sit in the default partition
+                self.db.rollback()
+                print(f"⚠️ Could not create partition {name}: {e}")
+        return created
+
+    def table_kind(self) -> Optional[str]:
+        """pg_class.relkind of notifications: "r" plain, "p" partitioned."""
+        return self.db.execute(text(
+            "SELECT relkind FROM pg_class WHERE oid = to_regclass('notifications')"
+        )).scalar()
+
+    def partition_table(self, now: Optional[datetime] = None) -> int:
+        """Rebuild a plain notifications table as a monthly-partitioned one.
+
+        Runs in one transaction with all readers and writers locked out, so run it
+        from archive_notifications.py --partition, not from a worker. The primary
+        key must include the partition key. Returns the number of partitions created.
+        """
+        now = now or datetime.utcnow()
+        if self.table_kind() != "r":
+            return 0
+        print("⚠️ notifications is not partitioned; converting it")
+        try:
+            self.db.execute(text("LOCK TABLE notifications IN ACCESS EXCLUSIVE MODE"))
+            self.db.execute(text(
+                "CREATE TABLE notifications_partitioned (LIKE notifications INCLUDING DEFAULTS) "
+                "PARTITION BY RANGE (created_at)"
+            ))
+            self.db.execute(text("ALTER TABLE notifications_partitioned ADD PRIMARY KEY (id, created_at)"))
+
+            oldest = self.db.execute(text("SELECT MIN(created_at) FROM notifications")).scalar() or now
+            start, end = month_start(oldest), month_start(now, settings.NOTIFICATION_PARTITION_MONTHS_AHEAD + 1)
+            created = 0
+            while start < end:
+                self.db.execute(text(
+                    f"CREATE TABLE {partition_name(start)} PARTITION OF notifications_partitioned "
+                    f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{month_start(start, 1):%Y-%m-%d}')"
+                ))
+                start = month_start(start, 1)
+                created += 1
+            self.db.execute(text("CREATE TABLE notifications_default PARTITION OF notifications_partitioned DEFAULT"))
+
+            self.db.execute(text("INSERT INTO notifications_partitioned SELECT * FROM notifications"))
+            # Keep the id sequence alive when the old table is dropped
+            self.db.execute(text(
+                "DO $$ BEGIN EXECUTE format('ALTER SEQUENCE %s OWNED BY notifications_partitioned.id', "
+                "pg_get_serial_sequence('notifications', 'id')); END $$"
+            ))
+            self.db.execute(text("DROP TABLE notifications"))
+            self.db.execute(text("ALTER TABLE notifications_partitioned RENAME TO notifications"))
+            for index in Notification.__table__.indexes:
+                index.create(self.db.connection())
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return created
+
+    def drop_empty_partitions(self, now: datetime) -> int:
+        cutoff = month_start(now - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS))
+        dropped = 0
+        for name in self.partitions():
+            suffix = name[len(PARTITION_PREFIX):]
+            if not name.startswith(PARTITION_PREFIX) or not suffix.isdigit():
+                continue
+            start = datetime(int(suffix[:4]), int(suffix[4:]), 1)
+            if month_start(start, 1) > cutoff:
+                continue
+            if self.db.execute(text(f"SELECT 1 FROM {name} LIMIT 1")).first() is None:
+                self.db.execute(text(f"DROP TABLE {name}"))
+                self.db.commit()
+                dropped += 1
+        return dropped
+
+
+def run_notification_retention() -> Dict[str, int]:
+    """Scheduled entry point: move expired notifications to cold storage."""
+    started = datetime.utcnow()
+    with Session(engine) as session:
+        stats = NotificationRetentionService(session).run()
+    elapsed = (datetime.utcnow() - started).total_seconds()
+    print(f"✅ Notification retention: moved {stats['moved']} notifications in {elapsed:.1f}s")
+    return stats
@@ -1,23 +1,114 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Tuple, NamedTuple
 from sqlmodel import select, and_, or_, func
 from sqlmodel import Session
+from sqlalchemy import insert, update
+from sqlalchemy.dialects import postgresql, sqlite
 from fastapi import HTTPException, status
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from app.models.notification import Notification, NotificationPreferences
+from app.core import realtime
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.models.notification import Notification, NotificationPreferences, NotificationCounter
+from app.models.user import User
 from app.schemas.notification import (
     NotificationCreate, NotificationUpdate, NotificationResponse,
     NotificationListResponse, NotificationPreferences as NotificationPreferencesSchema,
     NotificationType, NotificationChannel, NotificationPriority
 )
 
+# Preference flag that gates each notification type
+TYPE_PREFERENCE = {
+    NotificationType.referral_received: "referral_notifications",
+    NotificationType.referral_status_update: "referral_notifications",
+    NotificationType.referral_accepted: "referral_notifications",
+    NotificationType.referral_rejected: "referral_notifications",
+    NotificationType.job_posted: "job_notifications",
+    NotificationType.job_application: "job_notifications",
+    NotificationType.system_announcement: "system_notifications",
+    NotificationType.profile_update: "system_notifications",
+}
+
+CHANNEL_PREFERENCE = {
+    NotificationChannel.email: "email_notifications",
+    NotificationChannel.in_app: "in_app_notifications",
+    NotificationChannel.sms: "sms_notifications",
+    NotificationChannel.push: "push_notifications",
+}
+
+BULK_CHUNK_SIZE = 1000
+
+
+class CoalesceRule(NamedTuple):
+    group_field: str  # metadata id that identifies the digest
+    label_field: str  # metadata field naming the group in the digest message
+    id_field: str  # metadata field collected from each merged notification
+    title: str
+    message: str  # formatted with count and label
+
+
+# Notification types that merge into an open digest instead of adding a row
+COALESCE_RULES = {
+    NotificationType.referral_received: CoalesceRule(
+        "job_id", "job_title", "referral_id", "New Referral Requests", "{count} new referral requests for {label}"
+    ),
+}
+
+MAX_DIGEST_IDS = 50
+
+# Shared by every NotificationService in this process; entries are treated as read-only
+preferences_cache = LRUCache(
+    maxsize=settings.NOTIFICATION_PREFERENCES_CACHE_SIZE,
+    ttl=settings.NOTIFICATION_PREFERENCES_CACHE_TTL_SECONDS,
+)
+
+
+def _preferences_schema(preferences: NotificationPreferences) -> NotificationPreferencesSchema:
+    return NotificationPreferencesSchema(
+        user_id=preferences.user_id,
+        email_notifications=preferences.email_notifications,
+        in_app_notifications=preferences.in_app_notifications,
+        sms_notifications=preferences.sms_notifications,
+        push_notifications=preferences.push_notifications,
+        referral_notifications=preferences.referral_notifications,
+        job_notifications=preferences.job_notifications,
+        system_notifications=preferences.system_notifications
+    )
+
+
+def bump_counters(db: Session, deltas: Dict[int, Tuple[int, int]]) -> None:
+    """Add (total, unread) deltas to users' counters inside the caller's transaction."""
+    if not deltas:
+        return
+    now = datetime.utcnow()
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(NotificationCounter)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[NotificationCounter.user_id],
+        set_={
+            "total_count": NotificationCounter.total_count + stmt.excluded.total_count,
+            "unread_count": NotificationCounter.unread_count + stmt.excluded.unread_count,
+            "updated_at": stmt.excluded.updated_at,
+        }
+    )
+    rows = [
+        {"user_id": user_id, "total_count": total, "unread_count": unread, "updated_at": now}
+        for user_id, (total, unread) in deltas.items()
+    ]
+    for start in range(0, len(rows), BULK_CHUNK_SIZE):
+        db.execute(stmt, rows[start:start + BULK_CHUNK_SIZE])
+
 
 class NotificationService:
     def __init__(self, db: Session):
         self.db = db
 
-    def create_notification(self, notification_data: NotificationCreate) -> NotificationResponse:
+    def create_notification(
+        self,
+        notification_data: NotificationCreate,
+        group_key: Optional[str] = None
+    ) -> NotificationResponse:
         """Create a new notification."""
         # Convert channels list to JSON string
         channels_json = json.dumps(notification_data.channels)
@@ -30,14 +121,194 @@ class NotificationService:
             notification_type=notification_data.notification_type,
             priority=notification_data.priority,
             channels=channels_json,
-            notification_metadata=notification_data.metadata or {}
+            notification_metadata=notification_data.metadata or {},
+            group_key=group_key
         )
 
         self.db.add(notification)
+        self._bump_counters({notification.recipient_id: (1, 1)})
         self.db.commit()
         self.db.refresh(notification)
 
-        return self._convert_to_response(notification)
+        response = self._convert_to_response(notification)
+        realtime.publish_to_user(response.recipient_id, realtime.NOTIFICATION, response)
+        return response
+
+    def create_or_coalesce(self, notification_data: NotificationCreate) -> NotificationResponse:
+        """Merge into the recipient's open digest for this type and key, or start one.
+
+        A digest stays open while it is unread, not archived, not yet emailed and
+        younger than NOTIFICATION_COALESCE_WINDOW_MINUTES.
+        """
+        rule = COALESCE_RULES.get(notification_data.notification_type)
+        key = rule and (notification_data.metadata or {}).get(rule.group_field)
+        if key is None:
+            return self.create_notification(notification_data)
+
+        group_key = f"{notification_data.notification_type.value}:{key}"[:200]
+        since = datetime.utcnow() - timedelta(minutes=settings.NOTIFICATION_COALESCE_WINDOW_MINUTES)
+        digest = self.db.execute(
+            select(Notification)
+            .where(
+                and_(
+                    Notification.recipient_id == notification_data.recipient_id,
+                    Notification.group_key == group_key,
+                    Notification.is_read == False,
+                    Notification.is_archived == False,
+                    Notification.sent_at == None,
+                    Notification.created_at >= since
+                )
+            )
+            .order_by(Notification.created_at.desc())
+            .limit(1)
+            .with_for_update()
+        ).scalar_one_or_none()
+        if digest is None:
+            return self.create_notification(notification_data, group_key=group_key)
+
+        metadata = dict(digest.notification_metadata or {})
+        count = int(metadata.get("count", 1)) + 1
+        ids = list(metadata.get("grouped_ids") or [metadata.get(rule.id_field)])
+        ids.append(notification_data.metadata.get(rule.id_field))
+        metadata.update(notification_data.metadata)
+        metadata["count"] = count
+        metadata["grouped_ids"] = ids[-MAX_DIGEST_IDS:]
+
+        digest.title = rule.title
+        label = metadata.get(rule.label_field) or key
+        digest.message = rule.message.format(count=count, label=label)[:1000]
+        digest.sender_id = notification_data.sender_id
+        digest.notification_metadata = metadata
+        digest.updated_at = datetime.utcnow()
+        self.db.add(digest)
+        self.db.commit()
+        self.db.refresh(digest)
+
+        response = self._convert_to_response(digest)
+        realtime.publish_to_user(response.recipient_id, realtime.NOTIFICATION, response)
+        return response
+
+    def create_notifications_bulk(
+        self,
+        notifications: List[NotificationCreate],
+        respect_preferences: bool = True
+    ) -> List[NotificationResponse]:
+        """Create many notifications in one transaction and push them afterwards.
+
+        Recipients who opted out of the notification type are skipped, and channels
+        they disabled are dropped; a notification left without channels is skipped.
+        """
+        if respect_preferences:
+            notifications = self._apply_preferences(notifications)
+        if not notifications:
+            return []
+
+        now = datetime.utcnow()
+        rows = [
+            {
+                "recipient_id": n.recipient_id,
+                "sender_id": n.sender_id,
+                "title": n.title,
+                "message": n.message,
+                "notification_type": n.notification_type.value,
+                "priority": n.priority.value,
+                "channels": json.dumps([c.value for c in n.channels]),
+                "notification_metadata": n.metadata or {},
+                "is_read": False,
+                "is_archived": False,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for n in notifications
+        ]
+
+        ids: List[int] = []
+        try:
+            for start in range(0, len(rows), BULK_CHUNK_SIZE):
+                result = self.db.execute(
+                    insert(Notification).returning(Notification.id, sort_by_parameter_order=True),
+                    rows[start:start + BULK_CHUNK_SIZE]
+                )
+                ids.extend(result.scalars().all())
+            deltas: Dict[int, Tuple[int, int]] = {}
+            for n in notifications:
+                total, unread = deltas.get(n.recipient_id, (0, 0))
+                deltas[n.recipient_id] = (total + 1, unread + 1)
+            self._bump_counters(deltas)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        responses = [
+            NotificationResponse(
+                id=notification_id,
+                recipient_id=n.recipient_id,
+                sender_id=n.sender_id,
+                title=n.title,
+                message=n.message,
+                notification_type=n.notification_type,
+                priority=n.priority,
+                channels=n.channels,
+                metadata=n.metadata or {},
+                created_at=now,
+                updated_at=now
+            )
+            for notification_id, n in zip(ids, notifications)
+        ]
+        realtime.publish_to_users(
+            (r.recipient_id, realtime.NOTIFICATION, r)
+            for r in responses if NotificationChannel.in_app in r.channels
+        )
+        return responses
+
+    def send_system_announcement(
+        self,
+        title: str,
+        message: str,
+        sender_id: Optional[int] = None,
+        priority: NotificationPriority = NotificationPriority.medium
+    ) -> int:
+        """Notify every active user, one bulk transaction per batch of users."""
+        total = 0
+        last_id = 0
+        while True:
+            user_ids = self.db.execute(
+                select(User.id)
+                .where(and_(User.is_active == True, User.id > last_id))
+                .order_by(User.id)
+                .limit(BULK_CHUNK_SIZE * 10)
+            ).scalars().all()
+            if not user_ids:
+                return total
+            last_id = user_ids[-1]
+            created = self.create_notifications_bulk([
+                NotificationCreate(
+                    recipient_id=user_id,
+                    sender_id=sender_id,
+                    title=title,
+                    message=message,
+                    notification_type=NotificationType.system_announcement,
+                    priority=priority,
+                    channels=[NotificationChannel.in_app]
+                )
+                for user_id in user_ids
+            ])
+            total += len(created)
+
+    def _apply_preferences(self, notifications: List[NotificationCreate]) -> List[NotificationCreate]:
+        preferences = self.get_preferences_bulk(n.recipient_id for n in notifications)
+        allowed = []
+        for n in notifications:
+            prefs = preferences[n.recipient_id]
+            type_flag = TYPE_PREFERENCE.get(n.notification_type)
+            if type_flag and not getattr(prefs, type_flag):
+                continue
+            channels = [c for c in n.channels if getattr(prefs, CHANNEL_PREFERENCE[c])]
+            if not channels:
+                continue
+            allowed.append(n if channels == n.channels else n.model_copy(update={"channels": channels}))
+        return allowed
 
     def get_notifications(
         self, 
@@ -45,31 +316,28 @@ class NotificationService:
         skip: int = 0, 
         limit: int = 100,
         unread_only: bool = False,
-        notification_type: Optional[str] = None
+        notification_type: Optional[str] = None,
+        include_archived: bool = False
     ) -> NotificationListResponse:
         """Get notifications for a user."""
         query = select(Notification).where(Notification.recipient_id == user_id)
         
+        if not include_archived:
+            query = query.where(Notification.is_archived == False)
+        
         if unread_only:
             query = query.where(Notification.is_read == False)
         
         if notification_type:
             query = query.where(Notification.notification_type == notification_type)
         
-        # Get total count
-        count_query = select(func.count()).select_from(query.subquery())
-        total_result = self.db.execute(count_query)
-        total = total_result.scalar()
-        
-        # Get unread count
-        unread_query = select(func.count()).where(
-            and_(
-                Notification.recipient_id == user_id,
-                Notification.is_read == False
-            )
-        )
-        unread_result = self.db.execute(unread_query)
-        unread_count = unread_result.scalar()
+        counters = self.get_counters(user_id)
+        unread_count = counters.unread_count
+        if unread_only or notification_type or include_archived:
+            count_query = select(func.count()).select_from(query.subquery())
+            total = self.db.execute(count_query).scalar()
+        else:
+            total = counters.total_count
         
         # Apply pagination and ordering
         query = query.order_by(Notification.created_at.desc()).offset(skip).limit(limit)
@@ -91,57 +359,100 @@ class NotificationService:
             pages=pages
         )
 
-    def mark_as_read(self, notification_id: int, user_id: int) -> NotificationResponse:
-        """Mark a notification as read."""
+    def get_notifications_after(self, user_id: int, after_id: int, limit: int = 100) -> List[NotificationResponse]:
+        """Notifications newer than a given id, oldest first (stream resume)."""
         result = self.db.execute(
-            select(Notification).where(
+            select(Notification)
+            .where(
                 and_(
-                    Notification.id == notification_id,
-                    Notification.recipient_id == user_id
+                    Notification.recipient_id == user_id,
+                    Notification.id > after_id,
+                    Notification.is_archived == False
                 )
             )
+            .order_by(Notification.id)
+            .limit(limit)
         )
-        notification = result.scalar_one_or_none()
-        
-        if not notification:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Notification not found"
+        return [self._convert_to_response(n) for n in result.scalars().all()]
+
+    def get_latest_notification_id(self, user_id: int) -> int:
+        """Id of the user's newest notification, 0 if none (stream position)."""
+        return self.db.execute(
+            select(func.max(Notification.id)).where(Notification.recipient_id == user_id)
+        ).scalar() or 0
+
+    def mark_as_read(self, notification_id: int, user_id: int) -> NotificationResponse:
+        """Mark a notification as read."""
+        # Conditional update so concurrent reads decrement the counter only once
+        was_unread = self.db.execute(
+            update(Notification)
+            .where(
+                and_(
+                    Notification.id == notification_id,
+                    Notification.recipient_id == user_id,
+                    Notification.is_read == False
+                )
             )
-        
-        notification.is_read = True
-        notification.read_at = datetime.utcnow()
-        
-        self.db.add(notification)
+            .values(is_read=True, read_at=datetime.utcnow())
+            .returning(Notification.is_archived)
+        ).first()
+        if was_unread is not None and not was_unread.is_archived:
+            self._bump_counters({user_id: (0, -1)})
         self.db.commit()
-        self.db.refresh(notification)
-        
+
+        notification = self._get_owned(notification_id, user_id)
         return self._convert_to_response(notification)
 
     def mark_all_as_read(self, user_id: int) -> int:
         """Mark all notifications as read for a user."""
         result = self.db.execute(
-            select(Notification).where(
+            update(Notification)
+            .where(
                 and_(
                     Notification.recipient_id == user_id,
                     Notification.is_read == False
                 )
             )
+            .values(is_read=True, read_at=datetime.utcnow())
+        )
+        self.db.execute(
+            update(NotificationCounter)
+            .where(NotificationCounter.user_id == user_id)
+            .values(unread_count=0, updated_at=datetime.utcnow())
         )
-        notifications = result.scalars().all()
-        
-        count = 0
-        for notification in notifications:
-            notification.is_read = True
-            notification.read_at = datetime.utcnow()
-            self.db.add(notification)
-            count += 1
-        
         self.db.commit()
-        return count
+        return result.rowcount
 
     def archive_notification(self, notification_id: int, user_id: int) -> NotificationResponse:
         """Archive a notification."""
+        archived = self.db.execute(
+            update(Notification)
+            .where(
+                and_(
+                    Notification.id == notification_id,
+                    Notification.recipient_id == user_id,
+                    Notification.is_archived == False
+                )
+            )
+            .values(is_archived=True, updated_at=datetime.utcnow())
+            .returning(Notification.is_read)
+        ).first()
+        if archived is not None:
+            self._bump_counters({user_id: (-1, 0 if archived.is_read else -1)})
+        self.db.commit()
+
+        notification = self._get_owned(notification_id, user_id)
+        return self._convert_to_response(notification)
+
+    def get_unread_count(self, user_id: int) -> int:
+        return self.get_counters(user_id).unread_count
+
+    def get_counters(self, user_id: int) -> NotificationCounter:
+        counters = self.db.get(NotificationCounter, user_id)
+        # No row yet means the user has never received a notification
+        return counters or NotificationCounter(user_id=user_id)
+
+    def _get_owned(self, notification_id: int, user_id: int) -> Notification:
         result = self.db.execute(
             select(Notification).where(
                 and_(
@@ -157,39 +468,54 @@ class NotificationService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Notification not found"
             )
-        
-        notification.is_archived = True
-        
-        self.db.add(notification)
-        self.db.commit()
-        self.db.refresh(notification)
-        
-        return self._convert_to_response(notification)
+        return notification
+
+    def _bump_counters(self, deltas: Dict[int, Tuple[int, int]]) -> None:
+        bump_counters(self.db, deltas)
 
     def get_notification_preferences(self, user_id: int) -> NotificationPreferencesSchema:
-        """Get notification preferences for a user."""
-        result = self.db.execute(
-            select(NotificationPreferences).where(NotificationPreferences.user_id == user_id)
-        )
-        preferences = result.scalar_one_or_none()
-        
-        if not preferences:
-            # Create default preferences
-            preferences = NotificationPreferences(user_id=user_id)
-            self.db.add(preferences)
-            self.db.commit()
-            self.db.refresh(preferences)
-        
-        return NotificationPreferencesSchema(
-            user_id=preferences.user_id,
-            email_notifications=preferences.email_notifications,
-            in_app_notifications=preferences.in_app_notifications,
-            sms_notifications=preferences.sms_notifications,
-            push_notifications=preferences.push_notifications,
-            referral_notifications=preferences.referral_notifications,
-            job_notifications=preferences.job_notifications,
-            system_notifications=preferences.system_notifications
+        """Get notification preferences for a user, creating the default row if needed."""
+        preferences = self.get_preferences_bulk([user_id])[user_id]
+        self.db.commit()
+        return preferences
+
+    def get_preferences_bulk(self, user_ids: Iterable[int]) -> Dict[int, NotificationPreferencesSchema]:
+        """Preferences for many users: cache first, one IN query per chunk for the rest,
+        and one bulk insert of default rows for users who have none yet.
+
+        The default rows are left in the caller's transaction for it to commit.
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        found = preferences_cache.get_many(user_ids)
+        missing = [user_id for user_id in user_ids if user_id not in found]
+
+        loaded: Dict[int, NotificationPreferencesSchema] = {}
+        for start in range(0, len(missing), BULK_CHUNK_SIZE):
+            chunk = missing[start:start + BULK_CHUNK_SIZE]
+            result = self.db.execute(
+                select(NotificationPreferences).where(NotificationPreferences.user_id.in_(chunk))
+            )
+            loaded.update((p.user_id, _preferences_schema(p)) for p in result.scalars().all())
+
+        defaults = [user_id for user_id in missing if user_id not in loaded]
+        if defaults:
+            self._insert_default_preferences(defaults)
+            loaded.update((user_id, NotificationPreferencesSchema(user_id=user_id)) for user_id in defaults)
+
+        preferences_cache.set_many(loaded)
+        found.update(loaded)
+        return found
+
+    def _insert_default_preferences(self, user_ids: List[int]) -> None:
+        now = datetime.utcnow()
+        dialect = postgresql if self.db.get_bind().dialect.name == "postgresql" else sqlite
+        # Another request may create the same row first; keep whichever landed
+        stmt = dialect.insert(NotificationPreferences).on_conflict_do_nothing(
+            index_elements=[NotificationPreferences.user_id]
         )
+        rows = [{"user_id": user_id, "created_at": now, "updated_at": now} for user_id in user_ids]
+        for start in range(0, len(rows), BULK_CHUNK_SIZE):
+            self.db.execute(stmt, rows[start:start + BULK_CHUNK_SIZE])
 
     def update_notification_preferences(
         self, 
@@ -219,26 +545,21 @@ class NotificationService:
         self.db.add(preferences)
         self.db.commit()
         self.db.refresh(preferences)
-        
-        return NotificationPreferencesSchema(
-            user_id=preferences.user_id,
-            email_notifications=preferences.email_notifications,
-            in_app_notifications=preferences.in_app_notifications,
-            sms_notifications=preferences.sms_notifications,
-            push_notifications=preferences.push_notifications,
-            referral_notifications=preferences.referral_notifications,
-            job_notifications=preferences.job_notifications,
-            system_notifications=preferences.system_notifications
-        )
+
+        # Write through so this worker never serves the old value
+        response = _preferences_schema(preferences)
+        preferences_cache.set(user_id, response)
+        return response
 
     def send_referral_notification(
         self, 
         recipient_id: int, 
         sender_id: int, 
         job_title: str,
-        referral_id: int
+        referral_id: int,
+        job_id: Optional[int] = None
     ) -> NotificationResponse:
-        """Send notification for new referral."""
+        """Send notification for new referral; requests for the same job coalesce."""
         notification_data = NotificationCreate(
             recipient_id=recipient_id,
             sender_id=sender_id,
@@ -247,10 +568,10 @@ class NotificationService:
             notification_type=NotificationType.referral_received,
             priority=NotificationPriority.medium,
             channels=[NotificationChannel.in_app, NotificationChannel.email],
-            metadata={"referral_id": referral_id, "job_title": job_title}
+            metadata={"referral_id": referral_id, "job_id": job_id, "job_title": job_title}
         )
         
-        return self.create_notification(notification_data)
+        return self.create_or_coalesce(notification_data)
 
     def send_referral_status_notification(
         self, 
@@ -8,15 +8,18 @@ from typing import Optional, Dict, Any
 from sqlmodel import Session, select
 from fastapi import HTTPException
 
-from app.models.verification import OTPVerification, VerifiedCompany, EmployeeVerification, VerificationMethod, VerificationStatus
+from app.core.config import settings
+from app.models.verification import VerifiedCompany, EmployeeVerification, VerificationMethod, VerificationStatus
 from app.schemas.verification import SendOTPRequest, VerifyOTPRequest
 from app.services.email_service import email_service
+from app.services.email_outbox_service import EmailOutboxService, PRIORITY_OTP
+from app.services.otp_store import OTPStore, VERIFIED, INVALID, EXPIRED, NOT_FOUND
 
 class OTPService:
     def __init__(self, db: Session):
         self.db = db
         self.otp_length = 6
-        self.otp_expiry_minutes = 10
+        self.otp_expiry_minutes = settings.OTP_EXPIRY_MINUTES
         self.max_attempts = 3
         
     def generate_otp(self) -> str:
@@ -31,65 +34,22 @@ class OTPService:
             if not company:
                 raise HTTPException(status_code=404, detail="Company not found")
             
-            # Check for recent OTP (rate limiting)
-            recent_otp = self.db.exec(
-                select(OTPVerification).where(
-                    OTPVerification.user_id == user_id,
-                    OTPVerification.company_id == request.company_id,
-                    OTPVerification.company_email == request.company_email,
-                    OTPVerification.created_at > datetime.utcnow() - timedelta(minutes=1)
-                )
-            ).first()
-            
-            if recent_otp:
-                raise HTTPException(
-                    status_code=429, 
-                    detail="Please wait before requesting another OTP code"
-                )
-            
+            # Rate limited by the endpoint dependency (app.dependencies.rate_limit)
+
             # Generate new OTP
             otp_code = self.generate_otp()
             expires_at = datetime.utcnow() + timedelta(minutes=self.otp_expiry_minutes)
             
-            # Invalidate any existing unverified OTPs for this user/company/email
-            existing_otps = self.db.exec(
-                select(OTPVerification).where(
-                    OTPVerification.user_id == user_id,
-                    OTPVerification.company_id == request.company_id,
-                    OTPVerification.company_email == request.company_email,
-                    OTPVerification.verified == False
-                )
-            ).all()
-            
-            for otp in existing_otps:
-                self.db.delete(otp)
-            
-            # Create new OTP record
-            otp_verification = OTPVerification(
-                user_id=user_id,
-                company_id=request.company_id,
-                company_email=request.company_email,
-                otp_code=otp_code,
-                expires_at=expires_at,
-                verified=False,
-                attempts=0
-            )
-            
-            self.db.add(otp_verification)
-            self.db.commit()
-            self.db.refresh(otp_verification)
-            
-            # Send OTP email
-            email_sent = await email_service.send_otp_email(
-                to_email=request.company_email,
-                otp_code=otp_code,
-                company_name=company.name
+            # Replaces any pending OTP for this user/company/email; only the hash is stored
+            OTPStore(self.db).issue(user_id, request.company_id, request.company_email, otp_code, expires_at)
+
+            # Queued in the same transaction; the outbox dispatcher sends it
+            EmailOutboxService(self.db).enqueue(
+                request.company_email,
+                email_service.otp_email(otp_code, company.name),
+                priority=PRIORITY_OTP,
             )
             
-            if not email_sent:
-                # If email fails, still return success but log the issue
-                print(f"⚠️ Email sending failed for {request.company_email}, but OTP is stored")
-            
             return {
                 "success": True,
                 "message": "OTP sent successfully",
@@ -109,57 +69,34 @@ class OTPService:
     def verify_otp(self, request: VerifyOTPRequest, user_id: int) -> Dict[str, Any]:
         """Verify OTP code"""
         try:
-            # Find the most recent unverified OTP for this user/company/email
-            otp_record = self.db.exec(
-                select(OTPVerification).where(
-                    OTPVerification.user_id == user_id,
-                    OTPVerification.company_id == request.company_id,
-                    OTPVerification.company_email == request.company_email,
-                    OTPVerification.verified == False
-                ).order_by(OTPVerification.created_at.desc())
-            ).first()
+            # Checks the hash, counts the attempt and marks the OTP verified
+            check = OTPStore(self.db).verify(
+                user_id, request.company_id, request.company_email, request.otp_code, self.max_attempts
+            )
             
-            if not otp_record:
+            if check.result == NOT_FOUND:
                 raise HTTPException(
                     status_code=404, 
                     detail="No OTP found. Please request a new OTP code."
                 )
             
-            # Check if OTP has expired
-            if datetime.utcnow() > otp_record.expires_at:
+            if check.result == EXPIRED:
                 raise HTTPException(
                     status_code=400, 
                     detail="OTP has expired. Please request a new code."
                 )
             
-            # Check attempt limit
-            if otp_record.attempts >= self.max_attempts:
+            if check.result == INVALID:
                 raise HTTPException(
                     status_code=400, 
-                    detail="Maximum attempts exceeded. Please request a new OTP code."
+                    detail=f"Invalid OTP code. {check.remaining_attempts} attempts remaining."
                 )
             
-            # Verify OTP code
-            if otp_record.otp_code != request.otp_code:
-                # Increment attempt counter
-                otp_record.attempts += 1
-                self.db.commit()
-                
-                remaining_attempts = self.max_attempts - otp_record.attempts
-                if remaining_attempts > 0:
-                    raise HTTPException(
-                        status_code=400, 
-                        detail=f"Invalid OTP code. {remaining_attempts} attempts remaining."
-                    )
-                else:
-                    raise HTTPException(
-                        status_code=400, 
-                        detail="Maximum attempts exceeded. Please request a new OTP code."
-                    )
-            
-            # Mark OTP as verified
-            otp_record.verified = True
-            self.db.commit()
+            if check.result != VERIFIED:
+                raise HTTPException(
+                    status_code=400, 
+                    detail="Maximum attempts exceeded. Please request a new OTP code."
+                )
             
             # Create or update employee verification
             verification = self.db.exec(
@@ -204,20 +141,9 @@ class OTPService:
             )
     
     def cleanup_expired_otps(self) -> int:
-        """Clean up expired OTPs (can be called periodically)"""
+        """Clean up expired OTPs (also runs on a schedule, see run_otp_cleanup)"""
         try:
-            expired_otps = self.db.exec(
-                select(OTPVerification).where(
-                    OTPVerification.expires_at < datetime.utcnow()
-                )
-            ).all()
-            
-            count = len(expired_otps)
-            for otp in expired_otps:
-                self.db.delete(otp)
-            
-            self.db.commit()
-            return count
+            return OTPStore(self.db).purge_expired()
             
         except Exception as e:
             print(f"❌ Error cleaning up expired OTPs: {e}")
@@ -0,0 +1,212 @@
+"""
+OTP store: salted hashes, O(1) verification and a background expiry sweeper.
+
+Codes are stored as "salt$hmac" (HMAC-SHA256 keyed with SECRET_KEY over a random
+per-code salt and the code), never in plaintext.
+
+Verification looks up the active code through ix_otp_verifications_lookup, or
+through a small per-worker TTL cache of that lookup. Every check then writes by
+primary key with a conditional UPDATE, so attempt counting stays correct across
+workers. A cached entry that another worker replaced fails that UPDATE (it
+matches on id and hash) and is reloaded once.
+
+Issuing a code deletes the previous unverified ones for the same user, company
+and email. Codes that expire unused are removed in batches by run_otp_cleanup()
+through the expires_at index, together with the outbox emails that carried them.
+Verified rows are kept; /verification/status reads them.
+"""
+import hashlib
+import hmac
+import secrets
+from datetime import datetime
+from typing import NamedTuple, Optional, Tuple
+
+from sqlalchemy import and_, delete, select, update
+from sqlmodel import Session
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.db.session import engine
+from app.models.verification import OTPVerification
+from app.services.email_outbox_service import EmailOutboxService
+
+VERIFIED = "verified"
+INVALID = "invalid"
+EXPIRED = "expired"
+NOT_FOUND = "not_found"
+LOCKED = "locked"
+
+SALT_BYTES = 16
+
+
+class ActiveOTP(NamedTuple):
+    id: int
+    otp_hash: str
+    expires_at: datetime
+    attempts: int
+
+
+class OTPCheck(NamedTuple):
+    result: str
+    otp_id: Optional[int] = None
+    remaining_attempts: int = 0
+
+
+def hash_otp(otp_code: str, salt: Optional[str] = None) -> str:
+    salt = salt or secrets.token_hex(SALT_BYTES)
+    digest = hmac.new(settings.SECRET_KEY.encode(), f"{salt}${otp_code}".encode(), hashlib.sha256).hexdigest()
+    return f"{salt}${digest}"
+
+
+def otp_matches(otp_code: str, otp_hash: str) -> bool:
+    salt, _, _ = otp_hash.partition("$")
+    return hmac.compare_digest(hash_otp(otp_code, salt), otp_hash)
+
+
+# (user_id, company_id, company_email) -> ActiveOTP
+active_otp_cache: Optional[LRUCache] = (
+    LRUCache(settings.OTP_VERIFY_CACHE_SIZE, ttl=settings.OTP_VERIFY_CACHE_TTL_SECONDS)
+    if settings.OTP_VERIFY_CACHE_SIZE > 0 else None
+)
+
+
+class OTPStore:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def issue(self, user_id: int, company_id: int, company_email: str, otp_code: str, expires_at: datetime) -> None:
+        """Replace any pending code for this user/company/email; the caller commits."""
+        self.db.execute(
+            delete(OTPVerification).where(self._pending(user_id, company_id, company_email))
+        )
+        self.db.add(OTPVerification(
+            user_id=user_id,
+            company_id=company_id,
+            company_email=company_email,
+            otp_hash=hash_otp(otp_code),
+            expires_at=expires_at,
+            verified=False,
+            attempts=0,
+        ))
+        if active_otp_cache is not None:
+            active_otp_cache.invalidate((user_id, company_id, company_email))
+
+    def verify(
+        self,
+        user_id: int,
+        company_id: int,
+        company_email: str,
+        otp_code: str,
+        max_attempts: int,
+        now: Optional[datetime] = None
+    ) -> OTPCheck:
+        now = now or datetime.utcnow()
+        key = (user_id, company_id, company_email)
+        cached = active_otp_cache.get(key) if active_otp_cache is not None else None
+        for entry in (cached, None):
+            fresh = entry is None
+            if fresh:
+                entry = self._load(user_id, company_id, company_email)
+                if entry is None:
+                    return OTPCheck(NOT_FOUND)
+            if now > entry.expires_at or entry.attempts >= max_attempts:
+                if not fresh:
+                    # Another worker may have issued a new code since this was cached
+                    continue
+                return OTPCheck(EXPIRED if now > entry.expires_at else LOCKED, entry.id)
+
+            matched = otp_matches(otp_code, entry.otp_hash)
+            attempts = self._record_attempt(entry, matched, max_attempts, now)
+            if attempts is None:
+                # Replaced, verified or locked by another request
+                self._forget(key)
+                if not fresh:
+                    continue
+                return OTPCheck(LOCKED, entry.id)
+            if matched:
+                self._forget(key)
+                return OTPCheck(VERIFIED, entry.id)
+            remaining = max_attempts - attempts
+            if active_otp_cache is not None:
+                active_otp_cache.set(key, entry._replace(attempts=attempts))
+            return OTPCheck(INVALID if remaining > 0 else LOCKED, entry.id, remaining)
+        return OTPCheck(NOT_FOUND)
+
+    def purge_expired(self, batch_size: Optional[int] = None, now: Optional[datetime] = None) -> int:
+        """Delete unverified codes past expiry, `batch_size` rows per transaction."""
+        batch_size = batch_size or settings.OTP_CLEANUP_BATCH_SIZE
+        now = now or datetime.utcnow()
+        purged = 0
+        while True:
+            ids = self.db.execute(
+                select(OTPVerification.id)
+                .where(and_(OTPVerification.expires_at < now, OTPVerification.verified == False))
+                .limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                return purged
+            self.db.execute(delete(OTPVerification).where(OTPVerification.id.in_(ids)))
+            self.db.commit()
+            purged += len(ids)
+            if len(ids) < batch_size:
+                return purged
+
+    def _load(self, user_id: int, company_id: int, company_email: str) -> Optional[ActiveOTP]:
+        row = self.db.execute(
+            select(
+                OTPVerification.id,
+                OTPVerification.otp_hash,
+                OTPVerification.expires_at,
+                OTPVerification.attempts,
+            )
+            .where(self._pending(user_id, company_id, company_email))
+            .order_by(OTPVerification.id.desc())
+            .limit(1)
+        ).first()
+        if row is None:
+            return None
+        entry = ActiveOTP(*row)
+        if active_otp_cache is not None:
+            active_otp_cache.set((user_id, company_id, company_email), entry)
+        return entry
+
+    def _record_attempt(self, entry: ActiveOTP, matched: bool, max_attempts: int, now: datetime) -> Optional[int]:
+        """Mark verified or count a failed attempt; None if the code is no longer pending."""
+        values = {"verified": True} if matched else {"attempts": OTPVerification.attempts + 1}
+        attempts = self.db.execute(
+            update(OTPVerification)
+            .where(and_(
+                OTPVerification.id == entry.id,
+                # Ids can be reused (SQLite); the hash pins the exact code
+                OTPVerification.otp_hash == entry.otp_hash,
+                OTPVerification.verified == False,
+                OTPVerification.attempts < max_attempts,
+            ))
+            .values(updated_at=now, **values)
+            .returning(OTPVerification.attempts)
+        ).scalar()
+        self.db.commit()
+        return attempts
+
+    @staticmethod
+    def _forget(key: Tuple[int, int, str]) -> None:
+        if active_otp_cache is not None:
+            active_otp_cache.invalidate(key)
+
+    @staticmethod
+    def _pending(user_id: int, company_id: int, company_email: str):
+        return and_(
+            OTPVerification.user_id == user_id,
+            OTPVerification.company_id == company_id,
+            OTPVerification.company_email == company_email,
+            OTPVerification.verified == False,
+        )
+
+
+def run_otp_cleanup() -> int:
+    """Scheduled entry point: purge expired, unverified OTP codes and their emails."""
+    with Session(engine) as session:
+        purged = OTPStore(session).purge_expired()
+        emails = EmailOutboxService(session).purge_otp()
+    print(f"✅ OTP cleanup: purged {purged} expired codes and {emails} OTP emails")
+    return purged
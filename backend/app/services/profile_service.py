@@ -8,6 +8,7 @@ from pathlib import Path
 from datetime import datetime
 
 from app.models.user import User, JobSeeker, Employee, Company
+from app.security.principal import invalidate_user
 from app.schemas.profile import (
     ProfileUpdateRequest, JobSeekerProfileUpdateRequest, EmployeeProfileUpdateRequest,
     ProfileResponse, JobSeekerProfileResponse, EmployeeProfileResponse, ProfileCompletionResponse,
@@ -63,6 +64,7 @@ class ProfileService:
             for key, value in update_data.items():
                 setattr(user, key, value)
             self.db.commit()
+            invalidate_user(user_id)
         
         # Return updated profile
         return self.get_profile(user_id)
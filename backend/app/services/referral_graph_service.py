@@ -0,0 +1,319 @@
+"""
+Referral-graph collusion detection.
+
+Builds an undirected user graph from referrals (employee -> seeker) and referral
+requests (seeker -> employee), stored as compact CSR arrays, finds connected
+components with union-find and scores the small ones on how densely several
+employees and several seekers are cross-linked, the minimum degree, triangles and
+repeated pairs. A request answered by a referral is the normal flow and is not
+evidence by itself, and neither is one employee serving many seekers (a star).
+Separately flags seekers spraying requests across many employees of one company.
+Runs as a single streaming pass over the edges.
+"""
+from array import array
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, func, insert, select
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.db.session import engine
+from app.models.referral_request import ReferralRequest
+from app.models.trust import FraudAlert
+from app.models.user import Employee, Job, JobSeeker, Referral
+from app.schemas.trust import FraudRiskLevel, SuspiciousActivityType
+from app.services.fraud_stream_service import risk_level_for
+
+RING_DESCRIPTION = "Referral ring"
+SPRAY_DESCRIPTION = "Requests sprayed across one company"
+EDGE_FETCH_SIZE = 50_000
+
+
+class ReferralGraph:
+    """Directed edge list plus an undirected CSR view over dense node indices."""
+
+    def __init__(self):
+        self.index: Dict[int, int] = {}
+        self.user_ids = array("q")
+        self.src = array("i")
+        self.dst = array("i")
+        self.offsets = array("q")
+        self.neighbors = array("i")
+        self.employees: Set[int] = set()
+
+    @property
+    def node_count(self) -> int:
+        return len(self.user_ids)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.src)
+
+    def node(self, user_id: int) -> int:
+        idx = self.index.get(user_id)
+        if idx is None:
+            idx = self.index[user_id] = len(self.user_ids)
+            self.user_ids.append(user_id)
+        return idx
+
+    def add_edge(self, from_user: int, to_user: int, employee: Optional[int] = None) -> None:
+        """`employee` names whichever end acts as the employee in this edge."""
+        if from_user == to_user:
+            return
+        if employee is not None:
+            self.employees.add(self.node(employee))
+        self.src.append(self.node(from_user))
+        self.dst.append(self.node(to_user))
+
+    def build_csr(self) -> None:
+        n = self.node_count
+        degree = array("q", bytes(8 * (n + 1)))
+        for a, b in zip(self.src, self.dst):
+            degree[a + 1] += 1
+            degree[b + 1] += 1
+        for i in range(n):
+            degree[i + 1] += degree[i]
+        self.offsets = degree
+        cursor = array("q", degree[:n])
+        self.neighbors = array("i", bytes(4 * degree[n]))
+        for a, b in zip(self.src, self.dst):
+            self.neighbors[cursor[a]] = b
+            cursor[a] += 1
+            self.neighbors[cursor[b]] = a
+            cursor[b] += 1
+
+    def neighbor_set(self, node: int) -> Set[int]:
+        return set(self.neighbors[self.offsets[node]:self.offsets[node + 1]])
+
+    def components(self) -> array:
+        """Union-find over all edges; returns the root of every node."""
+        parent = array("i", range(self.node_count))
+        size = array("i", [1]) * self.node_count
+
+        def find(x: int) -> int:
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for a, b in zip(self.src, self.dst):
+            ra, rb = find(a), find(b)
+            if ra == rb:
+                continue
+            if size[ra] < size[rb]:
+                ra, rb = rb, ra
+            parent[rb] = ra
+            size[ra] += size[rb]
+        return array("i", (find(x) for x in range(self.node_count)))
+
+
+class CollusionDetectionService:
+    def __init__(self, db: Session):
+        self.db = db
+        self.min_size = settings.COLLUSION_MIN_COMPONENT_SIZE
+        self.max_size = settings.COLLUSION_MAX_COMPONENT_SIZE
+        self.min_score = settings.COLLUSION_MIN_SCORE
+
+    def run(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        since = (now or datetime.utcnow()) - timedelta(days=settings.COLLUSION_LOOKBACK_DAYS)
+        graph = self.load_graph(since)
+        graph.build_csr()
+        rings = self.find_rings(graph)
+        sprays = self.find_request_sprays(since)
+
+        alerts = self._ring_alerts(rings) + self._spray_alerts(sprays)
+        inserted = self._save_alerts(alerts)
+        return {
+            "nodes": graph.node_count,
+            "edges": graph.edge_count,
+            "rings": len(rings),
+            "sprays": len(sprays),
+            "alerts": inserted,
+        }
+
+    def load_graph(self, since: datetime) -> ReferralGraph:
+        graph = ReferralGraph()
+        referral_edges = (
+            select(Employee.user_id, JobSeeker.user_id)
+            .select_from(Referral)
+            .join(Employee, Employee.id == Referral.employee_id)
+            .join(JobSeeker, JobSeeker.id == Referral.seeker_id)
+            .where(Referral.created_at >= since)
+        )
+        request_edges = (
+            select(ReferralRequest.jobseeker_id, ReferralRequest.employee_id)
+            .where(ReferralRequest.created_at >= since)
+        )
+        for query, employee_end in ((referral_edges, 0), (request_edges, 1)):
+            result = self.db.execute(query.execution_options(yield_per=EDGE_FETCH_SIZE))
+            for edge in result:
+                graph.add_edge(edge[0], edge[1], employee=edge[employee_end])
+        return graph
+
+    def find_rings(self, graph: ReferralGraph) -> List[Dict[str, Any]]:
+        roots = graph.components()
+        sizes: Dict[int, int] = defaultdict(int)
+        for root in roots:
+            sizes[root] += 1
+        candidates = {root for root, size in sizes.items() if self.min_size <= size <= self.max_size}
+        if not candidates:
+            return []
+
+        members: Dict[int, List[int]] = defaultdict(list)
+        for node, root in enumerate(roots):
+            if root in candidates:
+                members[root].append(node)
+        edges: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+        for a, b in zip(graph.src, graph.dst):
+            root = roots[a]
+            if root in candidates:
+                edges[root].append((a, b))
+
+        rings = []
+        for root, nodes in members.items():
+            stats = self._component_stats(graph, nodes, edges[root])
+            if stats["score"] >= self.min_score:
+                stats["user_ids"] = [graph.user_ids[n] for n in nodes]
+                rings.append(stats)
+        return rings
+
+    @staticmethod
+    def _component_stats(graph: ReferralGraph, nodes: List[int], edges: List[Tuple[int, int]]) -> Dict[str, Any]:
+        n = len(nodes)
+        directed = set(edges)
+        pairs = {(a, b) if a < b else (b, a) for a, b in directed}
+
+        adjacency = {node: graph.neighbor_set(node) for node in nodes}
+        triangles = sum(
+            len(adjacency[a] & adjacency[b]) for a, b in pairs
+        ) // 3
+        degrees = [len(adjacency[node]) for node in nodes]
+
+        # Density between the two sides of the referral relation. A component with a
+        # single employee (or seeker) is a star and always "complete", so it gets none.
+        employees = sum(1 for node in nodes if node in graph.employees)
+        seekers = n - employees
+        cross_pairs = sum(1 for a, b in pairs if (a in graph.employees) != (b in graph.employees))
+        if employees >= 2 and seekers >= 2:
+            bipartite_density = min(1.0, cross_pairs / (employees * seekers))
+        else:
+            bipartite_density = 0.0
+        # Every member tied to at least three others: no leaves hanging off a hub
+        cohesion = min(1.0, max(0, min(degrees) - 1) / 2)
+        density = (2 * len(pairs)) / (n * (n - 1))
+        repeat_ratio = 1 - len(directed) / len(edges) if edges else 0.0
+
+        score = round(
+            45 * bipartite_density
+            + 25 * cohesion
+            + 10 * min(1.0, triangles / n)
+            + 20 * repeat_ratio
+        )
+        return {
+            "size": n,
+            "employees": employees,
+            "seekers": seekers,
+            "edges": len(edges),
+            "unique_pairs": len(pairs),
+            "density": round(density, 3),
+            "bipartite_density": round(bipartite_density, 3),
+            "triangles": triangles,
+            "repeat_ratio": round(repeat_ratio, 3),
+            "min_degree": min(degrees),
+            "max_degree": max(degrees),
+            "avg_degree": round(sum(degrees) / n, 2),
+            "score": min(100, score),
+        }
+
+    def find_request_sprays(self, since: datetime) -> List[Dict[str, Any]]:
+        distinct_employees = func.count(func.distinct(ReferralRequest.employee_id))
+        rows = self.db.execute(
+            select(ReferralRequest.jobseeker_id, Job.company_id, distinct_employees, func.count(ReferralRequest.id))
+            .join(Job, Job.id == ReferralRequest.job_id)
+            .where(ReferralRequest.created_at >= since)
+            .group_by(ReferralRequest.jobseeker_id, Job.company_id)
+            .having(distinct_employees >= settings.COLLUSION_SPRAY_MIN_EMPLOYEES)
+        ).all()
+        return [
+            {"user_id": seeker_id, "company_id": company_id, "employees": employees, "requests": requests}
+            for seeker_id, company_id, employees, requests in rows
+        ]
+
+    def _ring_alerts(self, rings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        alerts = []
+        for ring in rings:
+            evidence = {k: v for k, v in ring.items() if k != "user_ids"}
+            evidence["members"] = ring["user_ids"][:50]
+            for user_id in ring["user_ids"]:
+                alerts.append(self._alert(
+                    user_id,
+                    SuspiciousActivityType.fake_referrals.value,
+                    risk_level_for(ring["score"]),
+                    f"{RING_DESCRIPTION}: {ring['size']} users, score {ring['score']}",
+                    evidence,
+                ))
+        return alerts
+
+    def _spray_alerts(self, sprays: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [
+            self._alert(
+                spray["user_id"],
+                SuspiciousActivityType.spam_behavior.value,
+                FraudRiskLevel.medium.value,
+                f"{SPRAY_DESCRIPTION}: {spray['employees']} employees at company {spray['company_id']}",
+                spray,
+            )
+            for spray in sprays
+        ]
+
+    @staticmethod
+    def _alert(user_id: int, activity_type: str, risk_level: str, description: str, evidence: Dict[str, Any]) -> Dict[str, Any]:
+        now = datetime.utcnow()
+        return {
+            "user_id": user_id,
+            "activity_type": activity_type,
+            "risk_level": risk_level,
+            "description": description,
+            "evidence": evidence,
+            "status": "open",
+            "created_at": now,
+            "updated_at": now,
+        }
+
+    def _save_alerts(self, alerts: List[Dict[str, Any]]) -> int:
+        """Insert alerts, skipping users that already have an open alert from this job."""
+        if not alerts:
+            return 0
+        user_ids = list({a["user_id"] for a in alerts})
+        existing: Set[Tuple[int, str]] = set()
+        for start in range(0, len(user_ids), 1000):
+            chunk = user_ids[start:start + 1000]
+            rows = self.db.execute(
+                select(FraudAlert.user_id, FraudAlert.description).where(and_(
+                    FraudAlert.user_id.in_(chunk),
+                    FraudAlert.status == "open",
+                ))
+            ).all()
+            existing.update((user_id, _alert_kind(description)) for user_id, description in rows)
+
+        fresh = [a for a in alerts if (a["user_id"], _alert_kind(a["description"])) not in existing]
+        for start in range(0, len(fresh), 1000):
+            self.db.execute(insert(FraudAlert), fresh[start:start + 1000])
+        self.db.commit()
+        return len(fresh)
+
+
+def _alert_kind(description: str) -> str:
+    return description.split(":", 1)[0]
+
+
+def run_collusion_detection() -> Dict[str, int]:
+    """Scheduled entry point: batch referral-graph analysis."""
+    started = datetime.utcnow()
+    with Session(engine) as session:
+        stats = CollusionDetectionService(session).run()
+    elapsed = (datetime.utcnow() - started).total_seconds()
+    print(f"✅ Collusion detection: {stats['edges']} edges, {stats['rings']} rings, {stats['alerts']} alerts in {elapsed:.1f}s")
+    return stats
@@ -14,6 +14,7 @@ from app.schemas.referral_request import (
     ReferralRequestStatus, ReferralRequestPriority
 )
 from app.services.notification_service import NotificationService
+from app.core import events
 
 
 class ReferralRequestService:
@@ -92,6 +93,14 @@ class ReferralRequestService:
         self.db.commit()
         self.db.refresh(referral_request)
 
+        events.publish(events.REFERRAL_REQUEST_CREATED, {
+            "actor_id": jobseeker_id,
+            "target_id": employee.user_id,
+            "job_id": job.id,
+            "company_id": job.company_id,
+            "referral_request_id": referral_request.id,
+        })
+
         # Send in-app notification to the employee (non-blocking)
         try:
             notification_service = NotificationService(self.db)
@@ -99,7 +108,8 @@ class ReferralRequestService:
                 recipient_id=employee.user_id,
                 sender_id=jobseeker_id,
                 job_title=job.title,
-                referral_id=referral_request.id
+                referral_id=referral_request.id,
+                job_id=job.id
             )
         except Exception as e:
             print(f"Notification send failed: {e}")
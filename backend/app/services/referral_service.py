@@ -5,13 +5,16 @@ from fastapi import HTTPException, status
 
 from app.models.user import Referral, Job, Employee, JobSeeker, User, Company
 from app.schemas.referral import ReferralCreate, ReferralUpdate, ReferralSearchParams
+from app.core import events
 
 
 class ReferralService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def create_referral(self, referral_data: ReferralCreate, employee_id: int) -> Referral:
+    async def create_referral(
+        self, referral_data: ReferralCreate, employee_id: int, actor_user_id: Optional[int] = None
+    ) -> Referral:
         """Create a new referral."""
         # Get job
         job_result = await self.db.execute(select(Job).where(Job.id == referral_data.job_id))
@@ -88,6 +91,14 @@ class ReferralService:
         self.db.add(referral)
         await self.db.commit()
         await self.db.refresh(referral)
+
+        events.publish(events.REFERRAL_CREATED, {
+            "actor_id": actor_user_id,
+            "target_id": seeker_user.id,
+            "job_id": job.id,
+            "company_id": job.company_id,
+            "referral_id": referral.id,
+        })
         return referral
 
     async def get_referral_by_id(self, referral_id: int) -> Optional[Referral]:
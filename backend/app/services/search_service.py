@@ -7,12 +7,14 @@ from datetime import datetime, timedelta
 
 from app.models.user import Job, User, Employee, JobSeeker, Company, Referral
 from app.schemas.search import SearchRequest, SearchResponse, SearchResultItem, SearchFilters
+from app.db.replicas import read_only
 
 
 class SearchService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    @read_only
     async def search(self, search_request: SearchRequest) -> SearchResponse:
         """Perform comprehensive search across all entities."""
         query = search_request.query.lower().strip()
@@ -369,6 +371,7 @@ class SearchService:
 
         return facets
 
+    @read_only
     async def get_search_analytics(self) -> Dict[str, Any]:
         """Get search analytics and statistics."""
         # This would typically be stored in a separate analytics table
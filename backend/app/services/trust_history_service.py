@@ -0,0 +1,123 @@
+"""
+Trust score history retention.
+
+History keeps full resolution for TRUST_HISTORY_RAW_DAYS, one point per day up to
+TRUST_HISTORY_DAILY_DAYS, and one point per ISO week beyond that. Compaction keeps the
+last row of each bucket (carrying the bucket's net change) and deletes the rest,
+a batch of users at a time.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, delete, select, update
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.db.session import engine
+from app.models.trust import TrustScoreHistory
+from app.schemas.trust import HistoryResolution
+from app.services.trust_service import history_bucket
+
+
+class TrustHistoryService:
+    def __init__(self, db: Session, batch_users: Optional[int] = None):
+        self.db = db
+        self.batch_users = batch_users or settings.TRUST_HISTORY_COMPACTION_BATCH_USERS
+
+    def compact(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Downsample raw rows to daily and daily rows to weekly."""
+        now = now or datetime.utcnow()
+        # Align cutoffs to bucket starts so a bucket is only ever compacted once it is complete
+        daily_cutoff = history_bucket(now - timedelta(days=settings.TRUST_HISTORY_RAW_DAYS), HistoryResolution.daily)
+        weekly_cutoff = history_bucket(now - timedelta(days=settings.TRUST_HISTORY_DAILY_DAYS), HistoryResolution.weekly)
+
+        daily = self._downsample(HistoryResolution.raw, HistoryResolution.daily, daily_cutoff)
+        weekly = self._downsample(HistoryResolution.daily, HistoryResolution.weekly, weekly_cutoff)
+        return {
+            "daily_kept": daily["kept"],
+            "weekly_kept": weekly["kept"],
+            "deleted": daily["deleted"] + weekly["deleted"],
+        }
+
+    def _downsample(self, source: str, target: str, cutoff: datetime) -> Dict[str, int]:
+        stats = {"kept": 0, "deleted": 0}
+        last_user_id = 0
+        while True:
+            user_ids = self.db.execute(
+                select(TrustScoreHistory.user_id)
+                .where(and_(
+                    TrustScoreHistory.user_id > last_user_id,
+                    TrustScoreHistory.resolution == source,
+                    TrustScoreHistory.created_at < cutoff,
+                ))
+                .group_by(TrustScoreHistory.user_id)
+                .order_by(TrustScoreHistory.user_id)
+                .limit(self.batch_users)
+            ).scalars().all()
+            if not user_ids:
+                break
+
+            rows = self.db.execute(
+                select(
+                    TrustScoreHistory.id,
+                    TrustScoreHistory.user_id,
+                    TrustScoreHistory.created_at,
+                    TrustScoreHistory.score,
+                    TrustScoreHistory.previous_score,
+                )
+                .where(and_(
+                    TrustScoreHistory.user_id.in_(user_ids),
+                    TrustScoreHistory.resolution == source,
+                    TrustScoreHistory.created_at < cutoff,
+                ))
+                .order_by(TrustScoreHistory.user_id, TrustScoreHistory.created_at, TrustScoreHistory.id)
+            ).all()
+
+            kept, doomed = self._plan(rows, target)
+            if kept:
+                self.db.execute(update(TrustScoreHistory), kept)
+            if doomed:
+                self.db.execute(
+                    delete(TrustScoreHistory).where(TrustScoreHistory.id.in_(doomed)),
+                    execution_options={"synchronize_session": False},
+                )
+            self.db.commit()
+
+            stats["kept"] += len(kept)
+            stats["deleted"] += len(doomed)
+            last_user_id = user_ids[-1]
+        return stats
+
+    @staticmethod
+    def _plan(rows: List[Any], target: str):
+        """Pick the surviving row per (user, bucket) and the ids to delete."""
+        buckets: Dict[tuple, Dict[str, Any]] = {}
+        doomed: List[int] = []
+        for row in rows:
+            key = (row.user_id, history_bucket(row.created_at, target))
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = {"first_previous": row.previous_score, "last": row}
+                continue
+            doomed.append(bucket["last"].id)
+            bucket["last"] = row
+
+        kept = []
+        for bucket in buckets.values():
+            last = bucket["last"]
+            first_previous = bucket["first_previous"]
+            kept.append({
+                "id": last.id,
+                "resolution": target.value if hasattr(target, "value") else target,
+                "previous_score": first_previous,
+                "score_change": last.score - (first_previous or 0),
+            })
+        return kept, doomed
+
+
+def run_trust_history_compaction() -> Dict[str, int]:
+    """Scheduled entry point: apply the history retention policy."""
+    with Session(engine) as session:
+        stats = TrustHistoryService(session).compact()
+    print(f"✅ Trust history compaction: kept {stats['daily_kept']} daily / {stats['weekly_kept']} weekly, deleted {stats['deleted']}")
+    return stats
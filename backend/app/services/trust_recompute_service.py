@@ -0,0 +1,198 @@
+"""
+Bulk trust score recomputation.
+
+Computes every trust factor for a batch of users with a handful of set-based
+aggregates, applies the shared scoring rules from trust_service, and upserts
+TrustScore rows in bulk. Used by the nightly scheduled refresh and by
+recompute_trust_scores.py.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, case, func, insert, select, update
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.db.session import engine
+from app.models.trust import FraudAlert, TrustScore, TrustScoreHistory
+from app.models.user import Employee, JobSeeker, Referral, User
+from app.services.trust_service import build_trust_factors, trend_for, trust_level_for
+
+
+def _filled(column):
+    """1 when a text column holds a non-empty value, else 0 (mirrors Python truthiness)."""
+    return case((and_(column.isnot(None), column != ""), 1), else_=0)
+
+
+def _nonzero(column):
+    return case((and_(column.isnot(None), column != 0), 1), else_=0)
+
+
+class TrustRecomputeService:
+    def __init__(self, db: Session, batch_size: Optional[int] = None):
+        self.db = db
+        self.batch_size = batch_size or settings.TRUST_RECOMPUTE_BATCH_SIZE
+
+    def recompute_all(self) -> Dict[str, int]:
+        """Recompute trust scores for every user, one keyset-paginated batch at a time."""
+        stats = {"users": 0, "inserted": 0, "updated": 0, "changed": 0}
+        last_id = 0
+        while True:
+            users = self.db.execute(
+                select(User.id, User.role, User.created_at, User.is_email_verified)
+                .where(User.id > last_id)
+                .order_by(User.id)
+                .limit(self.batch_size)
+            ).all()
+            if not users:
+                break
+            batch_stats = self.recompute_batch(users)
+            for key, value in batch_stats.items():
+                stats[key] += value
+            last_id = users[-1].id
+        return stats
+
+    def recompute_users(self, user_ids: Iterable[int]) -> Dict[str, int]:
+        """Recompute trust scores for an explicit set of users."""
+        users = self.db.execute(
+            select(User.id, User.role, User.created_at, User.is_email_verified)
+            .where(User.id.in_(list(user_ids)))
+        ).all()
+        return self.recompute_batch(users) if users else {"users": 0, "inserted": 0, "updated": 0, "changed": 0}
+
+    def recompute_batch(self, users: List[Any]) -> Dict[str, int]:
+        now = datetime.utcnow()
+        user_ids = [u.id for u in users]
+        employee_ids = [u.id for u in users if u.role == "employee"]
+        jobseeker_ids = [u.id for u in users if u.role == "jobseeker"]
+
+        employee_profiles = self._employee_profile_scores(employee_ids)
+        jobseeker_profiles = self._jobseeker_profile_scores(jobseeker_ids)
+        referral_stats = self._referral_stats(user_ids, now - timedelta(days=30))
+        open_alerts = self._open_fraud_alerts(user_ids)
+        existing = {
+            row.user_id: row
+            for row in self.db.execute(
+                select(TrustScore.id, TrustScore.user_id, TrustScore.score).where(TrustScore.user_id.in_(user_ids))
+            ).all()
+        }
+
+        inserts: List[Dict[str, Any]] = []
+        updates: List[Dict[str, Any]] = []
+        history: List[Dict[str, Any]] = []
+        for user in users:
+            is_employee = user.role == "employee"
+            total, hired, recent = referral_stats.get(user.id, (0, 0, 0))
+            profile_score = (
+                employee_profiles.get(user.id, 0) if is_employee else jobseeker_profiles.get(user.id, 0)
+            )
+            score, factors = build_trust_factors(
+                account_age_days=(now - user.created_at).days,
+                email_verified=user.is_email_verified,
+                profile_score=profile_score,
+                is_employee=is_employee,
+                total_referrals=total,
+                successful_referrals=hired,
+                recent_referrals=recent,
+                open_fraud_alerts=open_alerts.get(user.id, 0),
+            )
+            current = existing.get(user.id)
+            previous_score = current.score if current else None
+            values = {
+                "score": score,
+                "level": trust_level_for(score).value,
+                "factors": factors,
+                "previous_score": previous_score,
+                "trend": trend_for(score, previous_score),
+                "last_updated": now,
+                "updated_at": now,
+            }
+            if current:
+                updates.append({"id": current.id, **values})
+            else:
+                inserts.append({"user_id": user.id, "created_at": now, **values})
+
+            if previous_score != score:
+                history.append({
+                    "user_id": user.id,
+                    "score": score,
+                    "previous_score": previous_score,
+                    "score_change": score - (previous_score or 0),
+                    "reason": "Bulk recalculation",
+                    "factors": factors,
+                    "updated_by": user.id,  # System update
+                    "created_at": now,
+                    "updated_at": now,
+                })
+
+        if inserts:
+            self.db.execute(insert(TrustScore), inserts)
+        if updates:
+            self.db.execute(update(TrustScore), updates)
+        if history:
+            self.db.execute(insert(TrustScoreHistory), history)
+        self.db.commit()
+
+        return {"users": len(users), "inserted": len(inserts), "updated": len(updates), "changed": len(history)}
+
+    def _employee_profile_scores(self, user_ids: List[int]) -> Dict[int, int]:
+        if not user_ids:
+            return {}
+        rows = self.db.execute(
+            select(
+                Employee.user_id,
+                func.max(_filled(Employee.title)),
+                func.max(_filled(Employee.badges)),
+                func.max(_nonzero(Employee.company_id)),
+            )
+            .where(Employee.user_id.in_(user_ids))
+            .group_by(Employee.user_id)
+        ).all()
+        return {user_id: 5 * (title + badges + company) for user_id, title, badges, company in rows}
+
+    def _jobseeker_profile_scores(self, user_ids: List[int]) -> Dict[int, int]:
+        if not user_ids:
+            return {}
+        rows = self.db.execute(
+            select(
+                JobSeeker.user_id,
+                func.max(_filled(JobSeeker.skills)),
+                func.max(_nonzero(JobSeeker.years_experience)),
+                func.max(_filled(JobSeeker.current_company)),
+            )
+            .where(JobSeeker.user_id.in_(user_ids))
+            .group_by(JobSeeker.user_id)
+        ).all()
+        return {user_id: 5 * (skills + years + company) for user_id, skills, years, company in rows}
+
+    def _referral_stats(self, user_ids: List[int], since: datetime) -> Dict[int, tuple]:
+        # Referral.employee_id is matched against the user id, as in TrustService.calculate_trust_score
+        rows = self.db.execute(
+            select(
+                Referral.employee_id,
+                func.count(Referral.id),
+                func.sum(case((Referral.status == "hired", 1), else_=0)),
+                func.sum(case((Referral.created_at >= since, 1), else_=0)),
+            )
+            .where(Referral.employee_id.in_(user_ids))
+            .group_by(Referral.employee_id)
+        ).all()
+        return {employee_id: (total, hired or 0, recent or 0) for employee_id, total, hired, recent in rows}
+
+    def _open_fraud_alerts(self, user_ids: List[int]) -> Dict[int, int]:
+        rows = self.db.execute(
+            select(FraudAlert.user_id, func.count(FraudAlert.id))
+            .where(and_(FraudAlert.user_id.in_(user_ids), FraudAlert.status == "open"))
+            .group_by(FraudAlert.user_id)
+        ).all()
+        return {user_id: count for user_id, count in rows}
+
+
+def run_bulk_trust_recompute() -> Dict[str, int]:
+    """Scheduled entry point: full refresh of all trust scores."""
+    started = datetime.utcnow()
+    with Session(engine) as session:
+        stats = TrustRecomputeService(session).recompute_all()
+    elapsed = (datetime.utcnow() - started).total_seconds()
+    print(f"✅ Trust recompute: {stats['users']} users, {stats['changed']} changed in {elapsed:.1f}s")
+    return stats
@@ -1,16 +1,246 @@
 from typing import List, Optional, Dict, Any, Tuple
 from sqlmodel import select, and_, or_, func, text
+from sqlalchemy import case, cast, literal, null, union_all, Integer, String
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import Session
 from fastapi import HTTPException, status
 from datetime import datetime, timedelta
+import asyncio
 import json
 
+from app.core.cache import StaleWhileRevalidateCache
+from app.core.config import settings
+from app.db.session import engine
 from app.models.trust import TrustScore, FraudAlert, FraudDetectionRule, TrustScoreHistory
 from app.models.user import User, Referral, Job, Employee, JobSeeker
 from app.schemas.trust import (
     TrustScore as TrustScoreSchema, FraudAlert as FraudAlertSchema,
     TrustMetrics, TrustAnalysis, FraudDetectionRule as FraudDetectionRuleSchema,
-    TrustScoreUpdate, TrustScoreLevel, FraudRiskLevel, SuspiciousActivityType
+    TrustScoreUpdate, TrustScoreLevel, FraudRiskLevel, SuspiciousActivityType,
+    TrustHistory, TrustHistoryPoint, HistoryResolution
+)
+
+
+# Scoring rules shared by the per-user path and the bulk recompute engine.
+# Keep them pure so both paths always agree on a user's score.
+
+def account_age_score(account_age_days: int) -> int:
+    """Account age contributes 0-20 points."""
+    if account_age_days >= 365:
+        return 20
+    if account_age_days >= 180:
+        return 15
+    if account_age_days >= 90:
+        return 10
+    if account_age_days >= 30:
+        return 5
+    return 0
+
+
+def employee_profile_score(title: Optional[str], badges: Optional[str], company_id: Optional[int]) -> int:
+    """Employee profile completeness contributes 0-15 points."""
+    return 5 * sum(1 for value in (title, badges, company_id) if value)
+
+
+def jobseeker_profile_score(skills: Optional[str], years_experience: Optional[int], current_company: Optional[str]) -> int:
+    """Job seeker profile completeness contributes 0-15 points."""
+    return 5 * sum(1 for value in (skills, years_experience, current_company) if value)
+
+
+def success_rate_score(success_rate: float) -> int:
+    """Referral success rate contributes 5-25 points."""
+    if success_rate >= 50:
+        return 25
+    if success_rate >= 25:
+        return 15
+    if success_rate >= 10:
+        return 10
+    return 5
+
+
+def recent_activity_score(recent_referrals: int) -> int:
+    """Referrals in the last 30 days contribute 0-10 points."""
+    if recent_referrals >= 5:
+        return 10
+    if recent_referrals >= 2:
+        return 5
+    return 0
+
+
+def trust_level_for(score: int) -> TrustScoreLevel:
+    if score >= 71:
+        return TrustScoreLevel.high
+    if score >= 31:
+        return TrustScoreLevel.medium
+    return TrustScoreLevel.low
+
+
+def trend_for(score: int, previous_score: Optional[int]) -> str:
+    if previous_score is not None:
+        if score > previous_score + 5:
+            return "up"
+        if score < previous_score - 5:
+            return "down"
+    return "stable"
+
+
+def build_trust_factors(
+    account_age_days: int,
+    email_verified: bool,
+    profile_score: int,
+    is_employee: bool,
+    total_referrals: int,
+    successful_referrals: int,
+    recent_referrals: int,
+    open_fraud_alerts: int,
+) -> Tuple[int, List[Dict[str, Any]]]:
+    """Apply the trust scoring rules to precomputed inputs.
+
+    Returns the bounded score (0-100) and the factor breakdown stored on TrustScore.
+    """
+    score = 50
+    factors: List[Dict[str, Any]] = []
+
+    age_score = account_age_score(account_age_days)
+    score += age_score
+    factors.append({"factor": "account_age", "value": account_age_days, "score": age_score, "max_score": 20})
+
+    email_score = 10 if email_verified else 0
+    score += email_score
+    factors.append({"factor": "email_verified", "value": bool(email_verified), "score": email_score, "max_score": 10})
+
+    score += profile_score
+    factors.append({"factor": "profile_completeness", "value": profile_score, "score": profile_score, "max_score": 15})
+
+    if is_employee and total_referrals:
+        success_rate = (successful_referrals / total_referrals) * 100
+        rate_score = success_rate_score(success_rate)
+        score += rate_score
+        factors.append({"factor": "referral_success_rate", "value": success_rate, "score": rate_score, "max_score": 25})
+
+    activity_score = recent_activity_score(recent_referrals)
+    score += activity_score
+    factors.append({"factor": "recent_activity", "value": recent_referrals, "score": activity_score, "max_score": 10})
+
+    if open_fraud_alerts > 0:
+        penalty = open_fraud_alerts * 10
+        score -= penalty
+        factors.append({"factor": "fraud_alerts", "value": open_fraud_alerts, "score": -penalty, "max_score": 0})
+
+    return max(0, min(100, score)), factors
+
+
+def history_bucket(timestamp: datetime, resolution: str) -> datetime:
+    """Start of the day (or ISO week, Monday) a history point falls into."""
+    day = timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    if resolution == HistoryResolution.weekly:
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def resample_history(points: List[TrustHistoryPoint], resolution: str) -> List[TrustHistoryPoint]:
+    """Collapse ordered points to the last score per bucket, summing the changes."""
+    buckets: Dict[datetime, TrustHistoryPoint] = {}
+    for point in points:
+        bucket = history_bucket(point.timestamp, resolution)
+        current = buckets.get(bucket)
+        change = point.score_change + (current.score_change if current else 0)
+        buckets[bucket] = TrustHistoryPoint(
+            timestamp=bucket, score=point.score, score_change=change, resolution=resolution
+        )
+    return list(buckets.values())
+
+
+def trust_metrics_query():
+    """Every admin metric in one round trip.
+
+    Rows are tagged by kind: "level" rows group trust scores by (role, company,
+    level) with count and score sum, "users" carries the user count and "alerts"
+    groups fraud alerts by status.
+    """
+    employee_company = (
+        select(Employee.user_id, func.min(Employee.company_id).label("company_id"))
+        .group_by(Employee.user_id)
+        .subquery()
+    )
+    levels = (
+        select(
+            literal("level").label("kind"),
+            cast(User.role, String).label("role"),
+            employee_company.c.company_id,
+            TrustScore.level.label("bucket"),
+            func.count(TrustScore.id).label("n"),
+            func.sum(TrustScore.score).label("total"),
+        )
+        .select_from(TrustScore)
+        .join(User, User.id == TrustScore.user_id)
+        .outerjoin(employee_company, employee_company.c.user_id == TrustScore.user_id)
+        .group_by(User.role, employee_company.c.company_id, TrustScore.level)
+    )
+    users = select(
+        literal("users"), cast(null(), String), cast(null(), Integer), cast(null(), String),
+        func.count(User.id), cast(null(), Integer),
+    )
+    alerts = (
+        select(
+            literal("alerts"), cast(null(), String), cast(null(), Integer), FraudAlert.status,
+            func.count(FraudAlert.id), cast(null(), Integer),
+        )
+        .group_by(FraudAlert.status)
+    )
+    return union_all(levels, users, alerts)
+
+
+def load_trust_metrics(db: Session) -> TrustMetrics:
+    total_users = 0
+    level_counts: Dict[str, int] = {}
+    by_role: Dict[str, Dict[str, int]] = {}
+    by_company: Dict[str, Dict[str, int]] = {}
+    alert_counts: Dict[str, int] = {}
+    scored_users = score_sum = 0
+
+    for kind, role, company_id, bucket, n, total in db.execute(trust_metrics_query()):
+        if kind == "users":
+            total_users = n
+        elif kind == "alerts":
+            alert_counts[bucket] = n
+        else:
+            level_counts[bucket] = level_counts.get(bucket, 0) + n
+            role_levels = by_role.setdefault(role or "none", {})
+            role_levels[bucket] = role_levels.get(bucket, 0) + n
+            company_levels = by_company.setdefault(str(company_id) if company_id is not None else "none", {})
+            company_levels[bucket] = company_levels.get(bucket, 0) + n
+            scored_users += n
+            score_sum += total or 0
+
+    resolved = alert_counts.get("resolved", 0)
+    false_positives = alert_counts.get("false_positive", 0)
+    closed = resolved + false_positives
+    return TrustMetrics(
+        total_users=total_users,
+        high_trust_users=level_counts.get("high", 0),
+        medium_trust_users=level_counts.get("medium", 0),
+        low_trust_users=level_counts.get("low", 0),
+        average_trust_score=score_sum / scored_users if scored_users else 0.0,
+        fraud_alerts_count=sum(alert_counts.values()),
+        resolved_alerts_count=resolved,
+        false_positive_rate=false_positives / closed if closed else 0.0,
+        levels_by_role=by_role,
+        levels_by_company=by_company,
+        generated_at=datetime.utcnow(),
+    )
+
+
+def _load_trust_metrics_snapshot() -> TrustMetrics:
+    # Own session: a background revalidation outlives the request that triggered it
+    with Session(engine) as session:
+        return load_trust_metrics(session)
+
+
+# Per-process; concurrent admin requests share one in-flight recomputation
+trust_metrics_cache = StaleWhileRevalidateCache(
+    ttl=settings.TRUST_METRICS_TTL_SECONDS,
+    stale_ttl=settings.TRUST_METRICS_STALE_SECONDS,
 )
 
 
@@ -30,51 +260,7 @@ class TrustService:
                 detail="User not found"
             )
 
-        # Start with base score
-        score = 50
-        factors = []
-        
-        # Factor 1: Account age (0-20 points)
-        account_age_days = (datetime.utcnow() - user.created_at).days
-        if account_age_days >= 365:
-            age_score = 20
-        elif account_age_days >= 180:
-            age_score = 15
-        elif account_age_days >= 90:
-            age_score = 10
-        elif account_age_days >= 30:
-            age_score = 5
-        else:
-            age_score = 0
-        
-        score += age_score
-        factors.append({
-            "factor": "account_age",
-            "value": account_age_days,
-            "score": age_score,
-            "max_score": 20
-        })
-
-        # Factor 2: Email verification (0-10 points)
-        if user.is_email_verified:
-            email_score = 10
-            factors.append({
-                "factor": "email_verified",
-                "value": True,
-                "score": email_score,
-                "max_score": 10
-            })
-        else:
-            email_score = 0
-            factors.append({
-                "factor": "email_verified",
-                "value": False,
-                "score": email_score,
-                "max_score": 10
-            })
-        score += email_score
-
-        # Factor 3: Profile completeness (0-15 points)
+        # Profile completeness inputs
         profile_score = 0
         if user.role == "employee":
             emp_result = await self.db.execute(
@@ -82,67 +268,31 @@ class TrustService:
             )
             employee = emp_result.scalar_one_or_none()
             if employee:
-                if employee.title:
-                    profile_score += 5
-                if employee.badges:
-                    profile_score += 5
-                if employee.company_id:
-                    profile_score += 5
+                profile_score = employee_profile_score(employee.title, employee.badges, employee.company_id)
         elif user.role == "jobseeker":
             seeker_result = await self.db.execute(
                 select(JobSeeker).where(JobSeeker.user_id == user_id)
             )
             job_seeker = seeker_result.scalar_one_or_none()
             if job_seeker:
-                if job_seeker.skills:
-                    profile_score += 5
-                if job_seeker.years_experience:
-                    profile_score += 5
-                if job_seeker.current_company:
-                    profile_score += 5
-
-        score += profile_score
-        factors.append({
-            "factor": "profile_completeness",
-            "value": profile_score,
-            "score": profile_score,
-            "max_score": 15
-        })
-
-        # Factor 4: Referral success rate (0-25 points)
+                profile_score = jobseeker_profile_score(
+                    job_seeker.skills, job_seeker.years_experience, job_seeker.current_company
+                )
+
+        # Referral success inputs
+        total_referrals = 0
+        successful_referrals = 0
         if user.role == "employee":
             referrals_result = await self.db.execute(
-                select(Referral).where(Referral.employee_id == user_id)
+                select(
+                    func.count(Referral.id),
+                    func.coalesce(func.sum(case((Referral.status == "hired", 1), else_=0)), 0)
+                ).where(Referral.employee_id == user_id)
             )
-            referrals = referrals_result.scalars().all()
-            
-            if referrals:
-                total_referrals = len(referrals)
-                successful_referrals = len([r for r in referrals if r.status == "hired"])
-                success_rate = (successful_referrals / total_referrals) * 100
-                
-                if success_rate >= 50:
-                    success_score = 25
-                elif success_rate >= 25:
-                    success_score = 15
-                elif success_rate >= 10:
-                    success_score = 10
-                else:
-                    success_score = 5
-                
-                score += success_score
-                factors.append({
-                    "factor": "referral_success_rate",
-                    "value": success_rate,
-                    "score": success_score,
-                    "max_score": 25
-                })
-
-        # Factor 5: Activity consistency (0-10 points)
-        # Check for regular activity over the last 30 days
+            total_referrals, successful_referrals = referrals_result.one()
+
+        # Activity consistency: referrals made in the last 30 days
         thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        
-        # Count referrals made in last 30 days
         recent_referrals_result = await self.db.execute(
             select(func.count(Referral.id)).where(
                 and_(
@@ -152,24 +302,8 @@ class TrustService:
             )
         )
         recent_referrals = recent_referrals_result.scalar()
-        
-        if recent_referrals >= 5:
-            activity_score = 10
-        elif recent_referrals >= 2:
-            activity_score = 5
-        else:
-            activity_score = 0
-        
-        score += activity_score
-        factors.append({
-            "factor": "recent_activity",
-            "value": recent_referrals,
-            "score": activity_score,
-            "max_score": 10
-        })
-
-        # Factor 6: Negative factors (penalties)
-        # Check for fraud alerts
+
+        # Negative factors: open fraud alerts
         fraud_alerts_result = await self.db.execute(
             select(func.count(FraudAlert.id)).where(
                 and_(
@@ -179,27 +313,18 @@ class TrustService:
             )
         )
         open_fraud_alerts = fraud_alerts_result.scalar()
-        
-        if open_fraud_alerts > 0:
-            penalty = open_fraud_alerts * 10
-            score -= penalty
-            factors.append({
-                "factor": "fraud_alerts",
-                "value": open_fraud_alerts,
-                "score": -penalty,
-                "max_score": 0
-            })
-
-        # Ensure score is within bounds
-        score = max(0, min(100, score))
-
-        # Determine trust level
-        if score >= 71:
-            level = TrustScoreLevel.high
-        elif score >= 31:
-            level = TrustScoreLevel.medium
-        else:
-            level = TrustScoreLevel.low
+
+        score, factors = build_trust_factors(
+            account_age_days=(datetime.utcnow() - user.created_at).days,
+            email_verified=user.is_email_verified,
+            profile_score=profile_score,
+            is_employee=user.role == "employee",
+            total_referrals=total_referrals,
+            successful_referrals=successful_referrals,
+            recent_referrals=recent_referrals,
+            open_fraud_alerts=open_fraud_alerts,
+        )
+        level = trust_level_for(score)
 
         # Get previous score for trend calculation
         previous_score_result = await self.db.execute(
@@ -208,13 +333,7 @@ class TrustService:
         previous_trust_score = previous_score_result.scalar_one_or_none()
         
         previous_score = previous_trust_score.score if previous_trust_score else None
-        trend = "stable"
-        
-        if previous_score is not None:
-            if score > previous_score + 5:
-                trend = "up"
-            elif score < previous_score - 5:
-                trend = "down"
+        trend = trend_for(score, previous_score)
 
         # Update or create trust score
         if previous_trust_score:
@@ -236,17 +355,18 @@ class TrustService:
             )
             self.db.add(new_trust_score)
 
-        # Record in history
-        history_entry = TrustScoreHistory(
-            user_id=user_id,
-            score=score,
-            previous_score=previous_score,
-            score_change=score - (previous_score or 0),
-            reason="Automatic calculation",
-            factors=factors,
-            updated_by=user_id  # System update
-        )
-        self.db.add(history_entry)
+        # Record in history only when the score actually moved
+        if score != previous_score:
+            history_entry = TrustScoreHistory(
+                user_id=user_id,
+                score=score,
+                previous_score=previous_score,
+                score_change=score - (previous_score or 0),
+                reason="Automatic calculation",
+                factors=factors,
+                updated_by=user_id  # System update
+            )
+            self.db.add(history_entry)
 
         await self.db.commit()
 
@@ -356,48 +476,9 @@ class TrustService:
         return alerts
 
     async def get_trust_metrics(self) -> TrustMetrics:
-        """Get overall trust metrics."""
-        # Total users
-        total_users_result = await self.db.execute(select(func.count(User.id)))
-        total_users = total_users_result.scalar()
-        
-        # Trust score distribution
-        trust_scores_result = await self.db.execute(
-            select(TrustScore.level, func.count(TrustScore.id))
-            .group_by(TrustScore.level)
-        )
-        trust_distribution = {row[0]: row[1] for row in trust_scores_result.fetchall()}
-        
-        high_trust = trust_distribution.get("high", 0)
-        medium_trust = trust_distribution.get("medium", 0)
-        low_trust = trust_distribution.get("low", 0)
-        
-        # Average trust score
-        avg_score_result = await self.db.execute(
-            select(func.avg(TrustScore.score))
-        )
-        average_trust_score = avg_score_result.scalar() or 0.0
-        
-        # Fraud alerts
-        total_alerts_result = await self.db.execute(select(func.count(FraudAlert.id)))
-        total_alerts = total_alerts_result.scalar()
-        
-        resolved_alerts_result = await self.db.execute(
-            select(func.count(FraudAlert.id)).where(FraudAlert.status == "resolved")
-        )
-        resolved_alerts = resolved_alerts_result.scalar()
-        
-        false_positive_rate = 0.0  # Would need to track false positives
-        
-        return TrustMetrics(
-            total_users=total_users,
-            high_trust_users=high_trust,
-            medium_trust_users=medium_trust,
-            low_trust_users=low_trust,
-            average_trust_score=average_trust_score,
-            fraud_alerts_count=total_alerts,
-            resolved_alerts_count=resolved_alerts,
-            false_positive_rate=false_positive_rate
+        """Get overall trust metrics, served stale-while-revalidate from memory."""
+        return await trust_metrics_cache.get(
+            "trust_metrics", lambda: asyncio.to_thread(_load_trust_metrics_snapshot)
         )
 
     async def get_trust_analysis(self, user_id: int) -> TrustAnalysis:
@@ -435,3 +516,35 @@ class TrustService:
             last_activity=datetime.utcnow()
         )
 
+    async def get_trust_history(
+        self,
+        user_id: int,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        granularity: Optional[str] = None,
+    ) -> TrustHistory:
+        """Get score history points for trend charts.
+
+        Returns stored points (raw within the retention window, daily/weekly beyond it).
+        Passing a granularity of "daily" or "weekly" resamples to the last score per bucket.
+        """
+        query = select(
+            TrustScoreHistory.created_at,
+            TrustScoreHistory.score,
+            TrustScoreHistory.score_change,
+            TrustScoreHistory.resolution,
+        ).where(TrustScoreHistory.user_id == user_id)
+        if since:
+            query = query.where(TrustScoreHistory.created_at >= since)
+        if until:
+            query = query.where(TrustScoreHistory.created_at < until)
+
+        result = await self.db.execute(query.order_by(TrustScoreHistory.created_at))
+        points = [
+            TrustHistoryPoint(timestamp=created_at, score=score, score_change=change, resolution=resolution)
+            for created_at, score, change, resolution in result.all()
+        ]
+        if granularity in (HistoryResolution.daily, HistoryResolution.weekly):
+            points = resample_history(points, granularity)
+
+        return TrustHistory(user_id=user_id, points=points, granularity=granularity or "stored")
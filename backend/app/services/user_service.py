@@ -4,6 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 
 from app.models.user import User, Employee, JobSeeker, Company
+from app.security.principal import invalidate_user
 from app.schemas.user import (
     UserProfileUpdate, EmployeeProfileCreate, EmployeeProfileUpdate,
     JobSeekerProfileCreate, JobSeekerProfileUpdate, CompanyCreate, CompanyUpdate
@@ -40,6 +41,7 @@ class UserService:
         self.db.add(user)
         await self.db.commit()
         await self.db.refresh(user)
+        invalidate_user(user_id)
         return user
 
     async def get_employee_profile(self, user_id: int) -> Optional[Employee]:
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Move expired notifications to notifications_archive once and, on Postgres,
+create upcoming monthly partitions and drop emptied ones.
+
+--partition first converts a plain notifications table (fresh installs on
+Postgres) to a monthly-partitioned one. It locks the table while it copies the
+rows, so run it once right after setup or in a maintenance window.
+
+Usage:
+    python archive_notifications.py
+    python archive_notifications.py --partition
+"""
+import sys
+import time
+
+from sqlmodel import Session
+
+from app.db.session import engine
+from app.services.notification_retention_service import NotificationRetentionService
+
+
+def main() -> int:
+    started = time.monotonic()
+    with Session(engine) as session:
+        retention = NotificationRetentionService(session)
+        if "--partition" in sys.argv[1:]:
+            if not retention.is_postgres:
+                print("❌ Partitioning needs Postgres")
+                return 1
+            print(f"🗂️ Partitioned notifications into {retention.partition_table()} monthly partitions")
+        stats = retention.run()
+
+    elapsed = time.monotonic() - started
+    print(f"✅ Moved {stats['moved']} notifications to cold storage in {elapsed:.1f}s")
+    print(f"   📝 partitions_created={stats['partitions_created']} partitions_dropped={stats['partitions_dropped']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
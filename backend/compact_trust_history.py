@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Apply the trust score history retention policy (raw -> daily -> weekly).
+
+Usage:
+    python compact_trust_history.py
+    python compact_trust_history.py --batch-users 2000
+"""
+import argparse
+import sys
+import time
+
+from sqlmodel import Session
+
+from app.db.session import engine
+from app.services.trust_history_service import TrustHistoryService
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Trust history compaction")
+    parser.add_argument("--batch-users", type=int, default=None, help="Users per batch (default: TRUST_HISTORY_COMPACTION_BATCH_USERS)")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    with Session(engine) as session:
+        stats = TrustHistoryService(session, batch_users=args.batch_users).compact()
+
+    elapsed = time.monotonic() - started
+    print(f"✅ Compacted trust history in {elapsed:.1f}s")
+    print(f"   📝 daily_kept={stats['daily_kept']} weekly_kept={stats['weekly_kept']} deleted={stats['deleted']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -180,9 +180,10 @@ def create_all_tables():
             user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
             company_id INTEGER NOT NULL REFERENCES verified_companies(id),
             company_email VARCHAR(255) NOT NULL,
-            otp_code VARCHAR(6) NOT NULL,
+            otp_hash VARCHAR(128) NOT NULL,
             expires_at TIMESTAMP NOT NULL,
             verified BOOLEAN DEFAULT FALSE,
+            attempts INTEGER DEFAULT 0,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         );
@@ -231,6 +232,7 @@ def create_all_tables():
         CREATE INDEX IF NOT EXISTS idx_otp_verifications_user_id ON otp_verifications(user_id);
         CREATE INDEX IF NOT EXISTS idx_otp_verifications_company_id ON otp_verifications(company_id);
         CREATE INDEX IF NOT EXISTS idx_otp_verifications_expires_at ON otp_verifications(expires_at);
+        CREATE INDEX IF NOT EXISTS ix_otp_verifications_lookup ON otp_verifications(user_id, company_id, company_email, verified);
         CREATE INDEX IF NOT EXISTS idx_id_card_verifications_user_id ON id_card_verifications(user_id);
         CREATE INDEX IF NOT EXISTS idx_id_card_verifications_company_id ON id_card_verifications(company_id);
         CREATE INDEX IF NOT EXISTS idx_id_card_verifications_status ON id_card_verifications(status);
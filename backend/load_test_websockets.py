@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Open many /ws/notifications connections against a local server, push one message
+to every user through the real-time broker and report connect and delivery times.
+
+The server must run with REALTIME_BROKER=unix and the same REALTIME_SOCKET_DIR so
+this script can publish to it. Raise the open-file limit on both sides first
+(ulimit -n 20000 for 10k connections).
+
+Usage:
+    python load_test_websockets.py --connections 10000 --per-user 5 --seed-users
+    python load_test_websockets.py --url ws://127.0.0.1:8000/ws/notifications --connections 2000
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Dict, List
+
+import websockets
+from sqlalchemy import select
+from sqlmodel import Session
+
+from app.core import realtime
+from app.core.config import settings
+from app.db.session import engine
+from app.models.user import User, UserRole
+from app.security.jwt import create_access_token
+
+LOADTEST_DOMAIN = "loadtest.referconnect.local"
+
+
+def load_user_ids(count: int, seed: bool) -> List[int]:
+    with Session(engine) as session:
+        ids = session.execute(
+            select(User.id).where(User.email_domain == LOADTEST_DOMAIN).order_by(User.id).limit(count)
+        ).scalars().all()
+        if len(ids) < count and seed:
+            session.add_all([
+                User(
+                    email=f"ws{i}@{LOADTEST_DOMAIN}",
+                    email_domain=LOADTEST_DOMAIN,
+                    role=UserRole.jobseeker,
+                    hashed_password="!",
+                    is_active=True,
+                )
+                for i in range(len(ids), count)
+            ])
+            session.commit()
+            return load_user_ids(count, seed=False)
+        return list(ids)
+
+
+async def open_connection(url: str, token: str, received: Dict[str, int], handshakes: asyncio.Semaphore):
+    async with handshakes:
+        ws = await websockets.connect(f"{url}?token={token}", open_timeout=60, ping_interval=None)
+    async with ws:
+        received["open"] += 1
+        # Keep reading while the rest connect; protocol pings are answered by the library
+        async for raw in ws:
+            message = json.loads(raw)
+            if message.get("type") == realtime.NOTIFICATION:
+                received["messages"] += 1
+                received["last_at"] = time.monotonic()
+
+
+async def run(args) -> int:
+    users = (args.connections + args.per_user - 1) // args.per_user
+    user_ids = load_user_ids(users, args.seed_users)
+    if len(user_ids) < users:
+        print(f"❌ Need {users} load-test users, found {len(user_ids)}; pass --seed-users")
+        return 1
+    tokens = {user_id: create_access_token(str(user_id)) for user_id in user_ids}
+
+    received = {"open": 0, "messages": 0, "last_at": 0.0}
+    handshakes = asyncio.Semaphore(args.concurrency)
+    failures = 0
+
+    async def connect(user_id: int):
+        nonlocal failures
+        try:
+            await open_connection(args.url, tokens[user_id], received, handshakes)
+        except Exception:
+            failures += 1
+
+    started = time.monotonic()
+    tasks = [
+        asyncio.create_task(connect(user_ids[i // args.per_user])) for i in range(args.connections)
+    ]
+    while received["open"] + failures < args.connections and time.monotonic() - started < args.timeout:
+        await asyncio.sleep(0.2)
+    connect_time = time.monotonic() - started
+    print(f"✅ Opened {received['open']}/{args.connections} connections in {connect_time:.1f}s ({failures} failed)")
+
+    broker = realtime.UnixSocketBroker(settings.REALTIME_SOCKET_DIR)
+    sent_at = time.monotonic()
+    broker.publish([
+        {"user_id": user_id, "type": realtime.NOTIFICATION, "data": {"id": 0, "title": "load test"}}
+        for user_id in user_ids
+    ])
+    while received["messages"] < received["open"] and time.monotonic() - sent_at < args.timeout:
+        await asyncio.sleep(0.1)
+    if received["messages"]:
+        print(f"   📝 delivered {received['messages']}/{received['open']} in {received['last_at'] - sent_at:.2f}s")
+    else:
+        print("   📝 no messages delivered; is the server running with REALTIME_BROKER=unix?")
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return 0 if received["messages"] == received["open"] == args.connections else 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="WebSocket notification load test")
+    parser.add_argument("--url", default="ws://127.0.0.1:8000/ws/notifications")
+    parser.add_argument("--connections", type=int, default=10000)
+    parser.add_argument("--per-user", type=int, default=settings.WS_MAX_CONNECTIONS_PER_USER)
+    parser.add_argument("--concurrency", type=int, default=200, help="Handshakes in flight at once")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--seed-users", action="store_true", help=f"Create missing users under {LOADTEST_DOMAIN}")
+    return asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Send every email in the outbox that is due now, then exit. Servers do this
+continuously; use it when no server is running or after fixing provider settings.
+
+Usage:
+    python process_email_outbox.py
+    python process_email_outbox.py --retry-dead
+"""
+import asyncio
+import sys
+import time
+
+from sqlmodel import Session
+
+from app.db.session import engine
+from app.services.email_outbox_service import EmailOutboxService, email_dispatcher
+
+
+def main() -> int:
+    started = time.monotonic()
+    with Session(engine) as session:
+        outbox = EmailOutboxService(session)
+        if "--retry-dead" in sys.argv[1:]:
+            print(f"🔁 Requeued {outbox.retry_dead()} dead-lettered emails")
+
+    stats = asyncio.run(email_dispatcher.drain())
+
+    with Session(engine) as session:
+        remaining = EmailOutboxService(session).stats()
+    elapsed = time.monotonic() - started
+    print(f"✅ Sent {stats['sent']} emails in {elapsed:.1f}s ({stats['failed']} failed, {stats['dead']} dead-lettered)")
+    print(f"   📝 outbox: {remaining}")
+    return 0 if not stats["failed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
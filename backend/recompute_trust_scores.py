@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Recompute trust scores for all users (or a subset) using the bulk set-based engine.
+
+Usage:
+    python recompute_trust_scores.py                 # full refresh
+    python recompute_trust_scores.py --batch-size 5000
+    python recompute_trust_scores.py --user-id 12 --user-id 40
+"""
+import argparse
+import sys
+import time
+
+from sqlmodel import Session
+
+from app.db.session import engine
+from app.services.trust_recompute_service import TrustRecomputeService
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Bulk trust score recomputation")
+    parser.add_argument("--batch-size", type=int, default=None, help="Users per batch (default: TRUST_RECOMPUTE_BATCH_SIZE)")
+    parser.add_argument("--user-id", type=int, action="append", dest="user_ids", help="Only recompute these users")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    with Session(engine) as session:
+        service = TrustRecomputeService(session, batch_size=args.batch_size)
+        if args.user_ids:
+            stats = service.recompute_users(args.user_ids)
+        else:
+            stats = service.recompute_all()
+
+    elapsed = time.monotonic() - started
+    print(f"✅ Recomputed {stats['users']} users in {elapsed:.1f}s")
+    print(f"   📝 inserted={stats['inserted']} updated={stats['updated']} changed={stats['changed']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
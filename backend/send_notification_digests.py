@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Queue the pending notification email digests once (one email per user).
+Running servers send them from the email outbox; see process_email_outbox.py otherwise.
+
+Usage:
+    python send_notification_digests.py
+"""
+import sys
+import time
+
+from sqlmodel import Session
+
+from app.db.session import engine
+from app.services.notification_digest_service import NotificationDigestService
+
+
+def main() -> int:
+    started = time.monotonic()
+    with Session(engine) as session:
+        stats = NotificationDigestService(session).send_email_digests()
+
+    elapsed = time.monotonic() - started
+    print(f"✅ Queued {stats['emails']} digest emails in {elapsed:.1f}s")
+    print(f"   📝 users={stats['users']} notifications={stats['notifications']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Shared fixtures.
+
+Settings are read when `app` is first imported, so the environment is pointed at
+a throwaway SQLite database (and away from bcrypt cost, rate limits and the
+scheduler) before anything imports it.
+"""
+import asyncio
+import importlib
+import os
+import pkgutil
+import sys
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="referconnect-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/test.db"
+os.environ["DATABASE_READ_URLS"] = ""
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["SCHEDULER_ENABLED"] = "false"
+os.environ["PASSWORD_BCRYPT_ROUNDS"] = "4"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import pytest
+from sqlmodel import Session, SQLModel, select
+
+import app.models
+from app.security.jwt import create_access_token
+from app.db.session import async_engine, engine
+from app.models.user import Company, Employee, JobSeeker, User
+from app.security.principal import user_principals
+from app.security.revocation import token_revocations
+from app.services.notification_service import preferences_cache
+
+for _module in pkgutil.iter_modules(app.models.__path__):
+    importlib.import_module(f"app.models.{_module.name}")
+
+
+@pytest.fixture
+def db():
+    """A fresh schema per test, with the per-worker caches that hold row data emptied."""
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    for cache in (user_principals._users, token_revocations._jtis, token_revocations._cutoffs, preferences_cache):
+        cache.invalidate()
+    with Session(engine) as session:
+        yield session
+
+
+class ApiClient:
+    """Drives the ASGI app in-process on one event loop (no lifespan, no server)."""
+
+    def __init__(self):
+        from app.main import create_app
+
+        self.app = create_app()
+        self.loop = asyncio.new_event_loop()
+
+    def request(self, method: str, url: str, token: str = None, **kwargs) -> httpx.Response:
+        if token:
+            kwargs.setdefault("headers", {})["Authorization"] = f"Bearer {token}"
+
+        async def send():
+            transport = httpx.ASGITransport(app=self.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.request(method, url, **kwargs)
+
+        return self.loop.run_until_complete(send())
+
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def close(self) -> None:
+        self.loop.run_until_complete(async_engine.dispose())
+        self.loop.close()
+
+
+@pytest.fixture
+def client(db):
+    api = ApiClient()
+    yield api
+    api.close()
+
+
+def make_user(db: Session, email: str, role: str = "jobseeker", **fields) -> User:
+    user = User(
+        email=email,
+        email_domain=email.split("@", 1)[1],
+        role=role,
+        hashed_password=fields.pop("hashed_password", "x"),
+        is_email_verified=fields.pop("is_email_verified", True),
+        **fields,
+    )
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    if role == "employee":
+        domain = user.email_domain
+        company = db.exec(select(Company).where(Company.domain == domain)).first()
+        if company is None:
+            company = Company(name=domain, domain=domain)
+            db.add(company)
+            db.commit()
+            db.refresh(company)
+        db.add(Employee(user_id=user.id, company_id=company.id))
+    elif role == "jobseeker":
+        db.add(JobSeeker(user_id=user.id))
+    db.commit()
+    return user
+
+
+def token_for(user: User) -> str:
+    return create_access_token(str(user.id))
@@ -0,0 +1,69 @@
+import threading
+
+import pytest
+from sqlalchemy import event
+from sqlmodel import select
+
+from app.core.config import settings
+from app.db.session import engine
+from app.models.user import JobSeeker, User
+from app.security.passwords import hash_password
+
+REGISTER = {
+    "email": "new@mail.com",
+    "password": "correct-horse",
+    "first_name": "New",
+    "last_name": "User",
+    "role": "jobseeker",
+}
+
+
+@pytest.fixture
+def loop_queries():
+    """Statements executed on the test thread, which is the one running the event loop."""
+    loop_thread = threading.get_ident()
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        if threading.get_ident() == loop_thread:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def test_register_then_login_off_the_event_loop(db, client, loop_queries):
+    response = client.post("/api/v1/auth/register", json=REGISTER)
+    assert response.status_code == 201
+    assert response.json()["email"] == "new@mail.com"
+
+    assert client.post("/api/v1/auth/register", json=REGISTER).status_code == 400
+    response = client.post("/api/v1/auth/login", json={"email": "new@mail.com", "password": "correct-horse"})
+    assert response.status_code == 200
+    assert response.json()["access_token"]
+    assert client.post("/api/v1/auth/login", json={"email": "new@mail.com", "password": "wrong"}).status_code == 401
+    assert client.post("/api/v1/auth/login", json={"email": "nobody@mail.com", "password": "x"}).status_code == 401
+
+    assert loop_queries == []
+    user = db.exec(select(User).where(User.email == "new@mail.com")).one()
+    assert db.exec(select(JobSeeker).where(JobSeeker.user_id == user.id)).first() is not None
+
+
+def test_login_upgrades_the_hash_cost(db, client, loop_queries, monkeypatch):
+    db.add(User(
+        email="old@mail.com",
+        email_domain="mail.com",
+        role="jobseeker",
+        hashed_password=hash_password("correct-horse"),
+    ))
+    db.commit()
+    monkeypatch.setattr(settings, "PASSWORD_BCRYPT_ROUNDS", 5)
+    loop_queries.clear()
+
+    response = client.post("/api/v1/auth/login", json={"email": "old@mail.com", "password": "correct-horse"})
+    assert response.status_code == 200
+    assert loop_queries == []
+    user = db.exec(select(User).where(User.email == "old@mail.com")).one()
+    db.refresh(user)
+    assert user.hashed_password.split("$")[2] == "05"
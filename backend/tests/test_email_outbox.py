@@ -0,0 +1,120 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlmodel import select
+
+from app.core.config import settings
+from app.models.email import EmailOutbox
+from app.services import email_outbox_service
+from app.services.email_outbox_service import (
+    DEAD, PENDING, PRIORITY_DIGEST, PRIORITY_OTP, SENDING, SENT,
+    EmailDispatcher, EmailOutboxService, backoff_seconds,
+)
+from app.services.email_service import EmailContent
+
+CONTENT = EmailContent("Subject", "<p>Body</p>", "Body")
+
+
+def test_backoff_is_full_jitter_under_a_capped_ceiling(monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_OUTBOX_BACKOFF_BASE_SECONDS", 10)
+    monkeypatch.setattr(settings, "EMAIL_OUTBOX_BACKOFF_MAX_SECONDS", 100)
+    samples = [backoff_seconds(3) for _ in range(200)]
+    assert 0 <= min(samples) and max(samples) <= 40
+    assert max(backoff_seconds(20) for _ in range(200)) <= 100
+
+
+def test_claim_takes_the_most_urgent_due_rows_with_a_lease(db):
+    outbox = EmailOutboxService(db)
+    outbox.enqueue_many([("digest@mail.com", CONTENT)], priority=PRIORITY_DIGEST)
+    outbox.enqueue("otp@mail.com", CONTENT, priority=PRIORITY_OTP, commit=False)
+    outbox.enqueue("later@mail.com", CONTENT, commit=False).next_attempt_at = datetime.utcnow() + timedelta(hours=1)
+    db.commit()
+
+    rows = outbox.claim(10)
+    assert [row.to_email for row in rows] == ["otp@mail.com", "digest@mail.com"]
+    assert rows[0].attempts == 1
+    assert outbox.claim(10) == []
+
+    # An expired lease (worker crashed mid-send) makes the row claimable again
+    later = datetime.utcnow() + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS + 1)
+    assert {row.to_email for row in outbox.claim(10, max_priority=PRIORITY_OTP, now=later)} == {"otp@mail.com"}
+
+
+def test_failures_back_off_then_dead_letter(db, monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 2)
+    outbox = EmailOutboxService(db)
+    outbox.enqueue("user@mail.com", CONTENT, commit=False)
+    db.commit()
+
+    row = outbox.claim(1)[0]
+    assert outbox.mark_failed(row, "timeout") == PENDING
+    email = db.exec(select(EmailOutbox)).one()
+    db.refresh(email)
+    assert email.next_attempt_at >= email.updated_at
+    assert email.last_error == "timeout"
+
+    far = datetime.utcnow() + timedelta(days=1)
+    row = outbox.claim(1, now=far)[0]
+    assert row.attempts == 2
+    assert outbox.mark_failed(row, "timeout") == DEAD
+    assert outbox.stats() == {PENDING: 0, SENDING: 0, SENT: 0, DEAD: 1}
+
+    assert outbox.retry_dead() == 1
+    row = outbox.claim(1)[0]
+    assert row.attempts == 1
+
+
+def test_release_does_not_count_the_attempt(db):
+    outbox = EmailOutboxService(db)
+    outbox.enqueue("user@mail.com", CONTENT, commit=False)
+    db.commit()
+    row = outbox.claim(1)[0]
+    outbox.release([row.id])
+    assert outbox.claim(1)[0].attempts == 1
+
+
+def test_dispatcher_records_sends_and_failures(db, monkeypatch):
+    outbox = EmailOutboxService(db)
+    outbox.enqueue("ok@mail.com", CONTENT, commit=False)
+    outbox.enqueue("down@mail.com", CONTENT, commit=False)
+    db.commit()
+
+    async def deliver(to_email, subject, html, text):
+        return "resend" if to_email.startswith("ok") else None
+
+    monkeypatch.setattr(email_outbox_service.email_service, "deliver", deliver)
+    dispatcher = EmailDispatcher(workers=1, poll_seconds=1)
+
+    async def send_all():
+        for row in outbox.claim(10):
+            await dispatcher._send(row)
+
+    asyncio.run(send_all())
+    assert (dispatcher.sent, dispatcher.failed) == (1, 1)
+    by_email = {e.to_email: e for e in db.exec(select(EmailOutbox)).all()}
+    for email in by_email.values():
+        db.refresh(email)
+    assert (by_email["ok@mail.com"].status, by_email["ok@mail.com"].provider) == (SENT, "resend")
+    assert by_email["down@mail.com"].status == PENDING
+    assert by_email["down@mail.com"].last_error == "no email provider accepted the message"
+
+
+def test_bulk_lane_passes_the_template_and_context_along(db, monkeypatch):
+    outbox = EmailOutboxService(db)
+    contexts = [{"greeting": "Hello Ann", "items": []}, {"greeting": "Hello", "items": []}]
+    outbox.enqueue_many(
+        [("ann@mail.com", CONTENT), ("bob@mail.com", CONTENT)],
+        priority=PRIORITY_DIGEST, template="notification_digest", contexts=contexts,
+    )
+    db.commit()
+    sent = []
+
+    async def send_bulk(emails):
+        sent.extend(emails)
+        return {email.key: "sendgrid" for email in emails}
+
+    monkeypatch.setattr(email_outbox_service.email_service, "send_bulk", send_bulk)
+    dispatcher = EmailDispatcher(workers=1, poll_seconds=1)
+    asyncio.run(dispatcher._send_batch(outbox.claim(10)))
+    assert [(e.template, e.context) for e in sent] == [("notification_digest", context) for context in contexts]
+    assert dispatcher.sent == 2
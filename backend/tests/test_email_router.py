@@ -0,0 +1,142 @@
+import asyncio
+import time
+
+from app.core.config import settings
+from app.services.email_router import CLOSED, HALF_OPEN, OPEN, EmailProviderRouter
+from app.services.email_service import (
+    DIGEST_TEMPLATE, SENDGRID_TEXT_TAG, BulkEmail, EmailContent, EmailRejected, EmailService, _is_rejection,
+)
+
+
+def tripped(router: EmailProviderRouter, name: str) -> None:
+    for _ in range(settings.EMAIL_CIRCUIT_FAILURE_THRESHOLD):
+        router.record(name, False)
+    assert router.health[name].state == OPEN
+    # Cooldown over
+    router.health[name].retry_at = time.monotonic() - 1
+
+
+def service_with(providers, send_via=None, send_bulk_chunk=None) -> EmailService:
+    service = EmailService()
+    service.router = EmailProviderRouter(providers, probe=service._probe)
+    if send_via:
+        service._send_via = send_via
+    if send_bulk_chunk:
+        service._send_bulk_chunk = send_bulk_chunk
+    return service
+
+
+def test_rejection_statuses():
+    assert _is_rejection(400) and _is_rejection(422)
+    assert not any(_is_rejection(code) for code in (200, 401, 403, 429, 500, 503))
+
+
+def test_consecutive_failures_trip_and_success_closes():
+    router = EmailProviderRouter(["resend", "sendgrid"])
+    tripped(router, "resend")
+    assert router.candidates() == ["sendgrid", "resend"]
+    router.before_send("resend")
+    assert router.health["resend"].state == HALF_OPEN
+    assert not router.allows("resend")
+    router.record("resend", True)
+    assert router.health["resend"].state == CLOSED
+
+
+def test_unprobeable_provider_leaves_the_trial_to_the_next_send():
+    service = service_with(["resend"])
+    tripped(service.router, "resend")
+    asyncio.run(service.router._probe(service.router.health["resend"]))
+
+    health = service.router.health["resend"]
+    assert health.state != CLOSED
+    assert health.trial_due(time.monotonic())
+    assert service.router.candidates() == ["resend"]
+
+
+def test_recipient_rejections_do_not_feed_the_breaker(monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_ROUTER_EXPLORE_RATE", 0)
+    calls = []
+
+    async def send_via(provider, to_email, subject, html, text):
+        calls.append(provider)
+        raise EmailRejected("422 invalid to")
+
+    service = service_with(["resend", "sendgrid"], send_via=send_via)
+    for _ in range(settings.EMAIL_CIRCUIT_FAILURE_THRESHOLD + 2):
+        try:
+            asyncio.run(service.deliver("bad@", "s", "<p>h</p>"))
+        except EmailRejected:
+            pass
+        else:
+            raise AssertionError("rejection not raised")
+
+    # No failover for a bad address, and the circuit stays closed
+    assert set(calls) == {"resend"}
+    stats = service.router.stats()["resend"]
+    assert (stats["state"], stats["failed"], stats["rejected"]) == (CLOSED, 0, len(calls))
+    assert asyncio.run(service.send_email("bad@", "s", "<p>h</p>")) is False
+
+
+def test_a_rejection_during_the_trial_closes_the_circuit():
+    async def send_via(provider, *args):
+        raise EmailRejected("422")
+
+    service = service_with(["resend"], send_via=send_via)
+    tripped(service.router, "resend")
+    try:
+        asyncio.run(service.deliver("bad@", "s", "h"))
+    except EmailRejected:
+        pass
+    assert service.router.health["resend"].state == CLOSED
+
+
+def test_rejected_batch_is_resent_one_by_one():
+    requests = []
+
+    async def send_bulk_chunk(provider, chunk):
+        requests.append(len(chunk))
+        if any(email.to_email.startswith("bad") for email in chunk):
+            raise EmailRejected("422")
+        return True
+
+    service = service_with(["resend"], send_bulk_chunk=send_bulk_chunk)
+    content = EmailContent("s", "<p>h</p>")
+    emails = [BulkEmail(i, f"{'bad' if i == 1 else 'ok'}{i}@mail.com", content) for i in range(3)]
+    results = asyncio.run(service.send_bulk(emails))
+
+    assert results == {0: "resend", 1: None, 2: "resend"}
+    assert requests == [3, 1, 1, 1]
+    assert service.router.health["resend"].state == CLOSED
+    assert service.router.health["resend"].failed == 0
+
+
+def _digest(service: EmailService, key: int, first_name: str, items) -> BulkEmail:
+    context = service.notification_digest_context(first_name, items)
+    return BulkEmail(key, f"{first_name}@mail.com", service.notification_digest_email(first_name, items),
+                     DIGEST_TEMPLATE, context)
+
+
+def test_sendgrid_sends_personalized_digests_as_one_request():
+    service = service_with(["sendgrid"])
+    service.providers["sendgrid"]["from_email"] = "us@mail.com"
+    ann = _digest(service, 0, "Ann", [{"title": "Job", "message": "New job"}])
+    bob = _digest(service, 1, "Bob", [{"title": "Ref", "message": "Referred"}, {"title": "Job", "message": "x"}])
+    huge = _digest(service, 2, "Cy", [{"title": "Long", "message": "x" * 20000}])
+    one_off = BulkEmail(3, "d@mail.com", EmailContent("s", "<p>h</p>"))
+
+    chunks = service._bulk_chunks("sendgrid", [ann, one_off, bob, huge])
+    assert [[email.key for email in chunk] for chunk in chunks] == [[0, 1], [3], [2]]
+
+    payload = service._sendgrid_bulk_payload(chunks[0])
+    assert "subject" not in payload
+    assert "Ann" not in payload["content"][1]["value"]
+    for email, personalization in zip([ann, bob], payload["personalizations"]):
+        assert personalization["subject"] == email.content.subject
+        substitutions = personalization["substitutions"]
+        assert substitutions.pop(SENDGRID_TEXT_TAG) == email.content.text
+        body = payload["content"][1]["value"]
+        for tag, value in substitutions.items():
+            body = body.replace(tag, value)
+        assert body == email.content.html
+    # Too big for substitutions: sent whole, on its own
+    assert service._sendgrid_bulk_payload(chunks[2])["content"][-1]["value"] == huge.content.html
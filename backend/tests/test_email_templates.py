@@ -0,0 +1,72 @@
+import pytest
+
+from app.core.email_templates import (
+    EmailTemplate, TemplateEngine, TemplateError, compile_template, email_templates, inline_css,
+)
+
+
+def render(source: str, **context) -> str:
+    return EmailTemplate("t", source).render(context)
+
+
+def test_variables_are_escaped_and_dotted_paths_read_dicts():
+    assert render("Hi {{ user.name }}!", user={"name": "<b>Ann</b>"}) == "Hi &lt;b&gt;Ann&lt;/b&gt;!"
+    assert render("[{{ missing.key }}]") == "[]"
+
+
+def test_loops_nest_and_see_the_outer_scope():
+    source = "{% for g in groups %}{{ g.name }}:{% for i in g.items %}{{ i }}{{ sep }}{% endfor %};{% endfor %}"
+    groups = [{"name": "a", "items": [1, 2]}, {"name": "b", "items": []}]
+    assert render(source, groups=groups, sep=",") == "a:1,2,;b:;"
+
+
+def test_static_text_is_merged_into_single_nodes():
+    assert compile_template("a{% for x in xs %}{% endfor %}b") == ["a", ("x", ("xs",), []), "b"]
+
+
+@pytest.mark.parametrize("source", [
+    "{% for x in xs %}never closed",
+    "{% endfor %}",
+    "{% for x in xs %}{% for y in ys %}{% endfor %}",
+])
+def test_unbalanced_loops_are_rejected(source):
+    with pytest.raises(TemplateError):
+        compile_template(source)
+
+
+def test_shared_body_with_parts_substituted_renders_the_same():
+    template = EmailTemplate("t", "<h1>{{ greeting }}</h1>{% for i in items %}<li>{{ i }}</li>{% endfor %}<p>bye</p>")
+    context = {"greeting": "Hi <Ann>", "items": ["a", "b"]}
+    assert template.shared_body == "<h1>-part1-</h1>-part3-<p>bye</p>"
+    parts = template.render_parts(context)
+    assert parts == {"-part1-": "Hi &lt;Ann&gt;", "-part3-": "<li>a</li><li>b</li>"}
+    body = template.shared_body
+    for tag, value in parts.items():
+        body = body.replace(tag, value)
+    assert body == template.render(context)
+    assert template.static_bytes == len("<h1></h1><p>bye</p>")
+
+
+def test_single_class_rules_are_inlined():
+    html = inline_css('<style>.a { color: red; } .b{margin:0}</style><p class="a b" style="x:y">t</p>')
+    assert html == '<p style="color: red; margin:0; x:y">t</p>'
+
+
+def test_media_blocks_and_compound_selectors_are_kept():
+    css = "@media (max-width:600px){.a{color:blue !important}} .card .title{font-weight:bold}"
+    html = inline_css(f'<style>.a{{color:red}} {css}</style><p class="a">x</p><span class="title">t</span>')
+    assert html == f'<style>{css}</style>\n<p class="a" style="color:red;">x</p><span class="title">t</span>'
+
+
+def test_no_empty_style_attributes():
+    html = '<style>.btn:hover{color:red} .empty{}</style><a class="btn">l</a><i class="empty">e</i>'
+    assert inline_css(html) == '<style>.btn:hover{color:red}</style>\n<a class="btn">l</a><i class="empty">e</i>'
+
+
+def test_shipped_templates_compile_and_render():
+    engine = TemplateEngine(email_templates.directory)
+    assert engine.load() >= 2
+    html = engine.render("otp", {"otp_code": "123456", "company_name": "Acme"})
+    assert "123456" in html and "<style>" not in html
+    with pytest.raises(TemplateError):
+        engine.get("no_such_template")
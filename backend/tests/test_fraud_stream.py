@@ -0,0 +1,79 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+from app.core import events
+from app.services.fraud_stream_service import CompiledRule, FraudStreamEngine, SlidingWindowCounter
+
+BURST = CompiledRule.from_row(1, "Burst", 60, {
+    "event": events.REFERRAL_REQUEST_CREATED,
+    "group_by": ["actor_id"],
+    "window_seconds": 600,
+    "threshold": 2,
+})
+
+
+def engine_at(tmp_path) -> FraudStreamEngine:
+    engine = FraudStreamEngine(str(tmp_path / "fraud.json"))
+    engine.set_rules([BURST])
+    return engine
+
+
+def dead_pid() -> int:
+    child = subprocess.Popen([sys.executable, "-c", "pass"])
+    child.wait()
+    return child.pid
+
+
+def test_sliding_window_expires_old_buckets():
+    counter = SlidingWindowCounter(600)
+    assert counter.add(1000) == 1
+    assert counter.add(1100) == 2
+    counter.expire(1000 + 600 + 10)
+    assert counter.total == 1
+
+
+def test_alert_fires_once_per_window(tmp_path):
+    engine = engine_at(tmp_path)
+    for t in range(5):
+        engine.handle_event(events.REFERRAL_REQUEST_CREATED, {"actor_id": 7}, now=1000 + t)
+    assert len(engine.pending_alerts) == 1
+    assert engine.pending_alerts[0]["evidence"]["count"] == 3
+
+    # Muted until the window has passed, then counted afresh
+    for t in range(3):
+        engine.handle_event(events.REFERRAL_REQUEST_CREATED, {"actor_id": 7}, now=1700 + t)
+    assert len(engine.pending_alerts) == 2
+
+
+def test_each_worker_checkpoints_to_its_own_file(tmp_path):
+    engine = engine_at(tmp_path)
+    engine.handle_event(events.REFERRAL_REQUEST_CREATED, {"actor_id": 7})
+    engine.checkpoint()
+    assert os.listdir(tmp_path) == [f"fraud.{os.getpid()}.json"]
+
+
+def test_restore_merges_exited_workers_once(tmp_path):
+    now = time.time()
+    for pid in (dead_pid(), dead_pid()):
+        worker = engine_at(tmp_path)
+        worker.handle_event(events.REFERRAL_REQUEST_CREATED, {"actor_id": 7}, now=now)
+        worker.checkpoint()
+        os.rename(worker.worker_checkpoint_path(), worker.worker_checkpoint_path(pid))
+    # A live worker's checkpoint stays with it
+    live = tmp_path / f"fraud.{os.getppid()}.json"
+    live.write_text(json.dumps({"counters": [[[1, 7], 600, [[now, 5]]]], "muted_until": []}))
+
+    engine = engine_at(tmp_path)
+    assert engine.restore() == 2
+    assert engine.counters[(1, 7)].total == 2
+    assert sorted(os.listdir(tmp_path)) == [live.name]
+
+    # The merged counts carry on: a third event crosses the threshold
+    engine.handle_event(events.REFERRAL_REQUEST_CREATED, {"actor_id": 7}, now=now + 1)
+    assert len(engine.pending_alerts) == 1
+
+    # Nothing left to claim for the next worker
+    assert engine_at(tmp_path).restore() == 0
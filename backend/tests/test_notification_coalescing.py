@@ -0,0 +1,37 @@
+from sqlmodel import select
+
+from app.models.notification import Notification, NotificationCounter
+from app.services.notification_service import NotificationService
+from tests.conftest import make_user
+
+
+def test_requests_coalesce_per_job_not_per_title(db):
+    employee = make_user(db, "emp@acme.com", role="employee")
+    seeker = make_user(db, "seeker@mail.com")
+    service = NotificationService(db)
+
+    # Two different jobs that share a title
+    service.send_referral_notification(employee.id, seeker.id, "Engineer", referral_id=1, job_id=10)
+    service.send_referral_notification(employee.id, seeker.id, "Engineer", referral_id=2, job_id=11)
+    digest = service.send_referral_notification(employee.id, seeker.id, "Engineer", referral_id=3, job_id=10)
+
+    rows = db.exec(select(Notification).order_by(Notification.id)).all()
+    assert len(rows) == 2
+    assert [row.group_key for row in rows] == ["referral_received:10", "referral_received:11"]
+    assert digest.id == rows[0].id
+    assert digest.message == "2 new referral requests for Engineer"
+    assert rows[0].notification_metadata["grouped_ids"] == [1, 3]
+
+    counter = db.exec(select(NotificationCounter).where(NotificationCounter.user_id == employee.id)).one()
+    assert (counter.total_count, counter.unread_count) == (2, 2)
+
+
+def test_notifications_without_a_job_id_are_not_merged(db):
+    employee = make_user(db, "emp@acme.com", role="employee")
+    service = NotificationService(db)
+    service.send_referral_notification(employee.id, 1, "Engineer", referral_id=1)
+    service.send_referral_notification(employee.id, 1, "Engineer", referral_id=2)
+
+    rows = db.exec(select(Notification)).all()
+    assert len(rows) == 2
+    assert {row.group_key for row in rows} == {None}
@@ -0,0 +1,58 @@
+import time
+
+from sqlmodel import select
+
+from app.core.cache import LRUCache
+from app.models.notification import NotificationPreferences
+from app.services.notification_service import NotificationService, preferences_cache
+from tests.conftest import make_user, token_for
+
+PREFERENCES = "/api/v1/notifications/preferences"
+
+
+def test_lru_cache_evicts_least_recently_used_and_expires():
+    cache = LRUCache(maxsize=2, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get_many(["a", "b", "c"]) == {"a": 1, "c": 3}
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert len(cache) == 1
+
+
+def test_preferences_routes_are_not_shadowed_by_notification_id(db, client):
+    user = make_user(db, "u@mail.com")
+    token = token_for(user)
+
+    response = client.get(PREFERENCES, token=token)
+    assert response.status_code == 200
+    assert response.json()["email_notifications"] is True
+
+    body = {**response.json(), "email_notifications": False}
+    response = client.put(PREFERENCES, token=token, json=body)
+    assert response.status_code == 200
+    assert response.json()["email_notifications"] is False
+
+    preferences_cache.invalidate()
+    assert client.get(PREFERENCES, token=token).json()["email_notifications"] is False
+
+
+def test_default_rows_do_not_commit_the_callers_pending_work(db):
+    service = NotificationService(db)
+    db.add(NotificationPreferences(user_id=1, email_notifications=False))
+    db.flush()
+
+    preferences = service.get_preferences_bulk([1, 2])
+    assert preferences[2].email_notifications is True
+    db.rollback()
+
+    assert db.exec(select(NotificationPreferences)).all() == []
+
+
+def test_single_lookup_persists_the_default_row(db):
+    NotificationService(db).get_notification_preferences(5)
+    db.rollback()
+    assert [p.user_id for p in db.exec(select(NotificationPreferences)).all()] == [5]
+
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+from sqlmodel import select
+
+from app.core.config import settings
+from app.models.notification import Notification, NotificationArchive, NotificationCounter
+from app.services.notification_retention_service import NotificationRetentionService, month_start, partition_name
+from app.services.notification_service import bump_counters
+
+
+def add_notification(db, recipient_id: int, age_days: int, is_read=False, is_archived=False) -> Notification:
+    created = datetime.utcnow() - timedelta(days=age_days)
+    notification = Notification(
+        recipient_id=recipient_id, title="t", message="m", notification_type="system_announcement",
+        is_read=is_read, is_archived=is_archived, created_at=created, updated_at=created,
+    )
+    db.add(notification)
+    return notification
+
+
+def test_partition_names_are_monthly():
+    assert month_start(datetime(2026, 12, 31, 23), 1) == datetime(2027, 1, 1)
+    assert partition_name(datetime(2026, 3, 1)) == "notifications_p202603"
+
+
+def test_expired_rows_move_to_archive_with_counters(db):
+    old_days = settings.NOTIFICATION_RETENTION_DAYS + 1
+    add_notification(db, 1, old_days)
+    add_notification(db, 1, old_days, is_read=True)
+    add_notification(db, 1, settings.NOTIFICATION_ARCHIVED_RETENTION_DAYS + 1, is_archived=True)
+    keep = add_notification(db, 1, 1)
+    # Counters exclude archived rows
+    bump_counters(db, {1: (3, 2)})
+    db.commit()
+
+    stats = NotificationRetentionService(db, batch_size=2).run()
+    assert stats == {"moved": 3, "partitions_created": 0, "partitions_dropped": 0}
+
+    assert [n.id for n in db.exec(select(Notification)).all()] == [keep.id]
+    assert len(db.exec(select(NotificationArchive)).all()) == 3
+    counter = db.exec(select(NotificationCounter)).one()
+    assert (counter.total_count, counter.unread_count) == (1, 1)
+
+
+def test_scheduled_run_leaves_a_plain_table_alone(db, monkeypatch):
+    service = NotificationRetentionService(db)
+    monkeypatch.setattr(service, "partitions", lambda: [])
+    monkeypatch.setattr(service, "table_kind", lambda: "r")
+
+    def convert(now=None):
+        raise AssertionError("converted from the scheduled job")
+
+    monkeypatch.setattr(service, "partition_table", convert)
+    assert service.ensure_partitions(datetime.utcnow()) == 0
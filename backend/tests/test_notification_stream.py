@@ -0,0 +1,90 @@
+import asyncio
+from datetime import datetime
+
+from app.api.v1.endpoints.notifications import stream_notifications
+from app.core import realtime
+from app.core.config import settings
+from app.models.notification import Notification
+from app.security.principal import CurrentUser
+from tests.conftest import make_user, token_for
+
+
+class ConnectedRequest:
+    async def is_disconnected(self) -> bool:
+        return False
+
+
+def first_frames(user_id: int, since_id: int, count: int):
+    async def read():
+        user = CurrentUser(user_id, "u@mail.com", "jobseeker", True, True, None, None)
+        response = await stream_notifications(ConnectedRequest(), None, since_id, user)
+        frames = []
+        async for frame in response.body_iterator:
+            frames.append(frame)
+            if len(frames) == count:
+                break
+        await response.body_iterator.aclose()
+        return frames
+
+    return asyncio.run(read())
+
+
+def add_notifications(db, user_id: int, count: int):
+    now = datetime.utcnow()
+    rows = [
+        Notification(recipient_id=user_id, title=f"n{i}", message="m", notification_type="system_announcement",
+                     created_at=now, updated_at=now)
+        for i in range(count)
+    ]
+    db.add_all(rows)
+    db.commit()
+    return [row.id for row in rows]
+
+
+def test_reconnect_replays_missed_notifications(db):
+    ids = add_notifications(db, 1, 3)
+    frames = first_frames(1, ids[0], 3)
+    assert frames[0] == "retry: 3000\n\n"
+    assert frames[1].startswith(f"id: {ids[1]}\nevent: notification\n")
+    assert frames[2].startswith(f"id: {ids[2]}\n")
+
+
+def test_reconnect_past_the_replay_limit_asks_for_resync(db, monkeypatch):
+    monkeypatch.setattr(settings, "SSE_REPLAY_LIMIT", 2)
+    ids = add_notifications(db, 1, 4)
+    frames = first_frames(1, ids[0] - 1, 2)
+    # The resync moves Last-Event-ID to the newest notification
+    assert frames == ["retry: 3000\n\n", f"id: {ids[3]}\nevent: resync\ndata: {{}}\n\n"]
+
+    # Exactly at the limit everything is replayed
+    frames = first_frames(1, ids[1], 3)
+    assert [frame.split("\n", 1)[0] for frame in frames[1:]] == [f"id: {ids[2]}", f"id: {ids[3]}"]
+
+
+def test_fresh_stream_starts_at_the_newest_notification(db):
+    ids = add_notifications(db, 1, 2)
+    add_notifications(db, 2, 1)
+    assert first_frames(1, None, 1) == [f"retry: 3000\nid: {ids[1]}\n\n"]
+    assert first_frames(3, None, 1) == ["retry: 3000\nid: 0\n\n"]
+
+
+def test_browsers_authenticate_with_a_query_token(db, client, monkeypatch):
+    user = make_user(db, "sse@mail.com")
+    subscribe = realtime.connections.subscribe
+
+    def subscribe_and_close(*args, **kwargs):
+        # End the stream after its first frame; the test transport buffers whole responses
+        subscription = subscribe(*args, **kwargs)
+        subscription.close()
+        return subscription
+
+    monkeypatch.setattr(realtime.connections, "subscribe", subscribe_and_close)
+    response = client.get(f"/api/v1/notifications/stream?token={token_for(user)}")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text == "retry: 3000\nid: 0\n\n"
+
+    assert client.get("/api/v1/notifications/stream").status_code == 401
+    assert client.get("/api/v1/notifications/stream?token=garbage").status_code == 401
+    # Other endpoints keep requiring the header
+    assert client.get(f"/api/v1/notifications/unread-count?token={token_for(user)}").status_code == 401
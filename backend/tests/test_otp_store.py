@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import select
+
+from app.core.config import settings
+from app.models.email import EmailOutbox
+from app.models.verification import OTPVerification, VerifiedCompany
+from app.services import otp_store
+from app.services.email_outbox_service import (
+    DEAD, PENDING, PRIORITY_OTP, REDACTED, EmailOutboxService,
+)
+from app.services.email_service import EmailContent
+from app.services.otp_store import (
+    EXPIRED, INVALID, LOCKED, NOT_FOUND, VERIFIED, OTPStore, hash_otp, otp_matches,
+)
+from tests.conftest import make_user
+
+EMAIL = "me@acme.com"
+
+
+@pytest.fixture
+def issued(db):
+    if otp_store.active_otp_cache is not None:
+        otp_store.active_otp_cache.invalidate()
+    user = make_user(db, "seeker@mail.com")
+    company = VerifiedCompany(name="Acme", domain="acme.com")
+    db.add(company)
+    db.commit()
+
+    def issue(code: str, expires_in: timedelta = timedelta(minutes=10)):
+        OTPStore(db).issue(user.id, company.id, EMAIL, code, datetime.utcnow() + expires_in)
+        db.commit()
+        return user.id, company.id, EMAIL
+
+    return issue
+
+
+def test_codes_are_stored_as_salted_hashes():
+    first, second = hash_otp("123456"), hash_otp("123456")
+    assert first != second
+    assert "123456" not in first
+    assert otp_matches("123456", first)
+    assert not otp_matches("654321", first)
+
+
+def test_verify_counts_attempts_then_locks(db, issued):
+    key = issued("123456")
+    store = OTPStore(db)
+    check = store.verify(*key, "000000", max_attempts=2)
+    assert (check.result, check.remaining_attempts) == (INVALID, 1)
+    assert store.verify(*key, "000000", max_attempts=2).result == LOCKED
+    # The right code no longer helps once the attempts are used up
+    assert store.verify(*key, "123456", max_attempts=2).result == LOCKED
+
+
+def test_verify_accepts_the_latest_code_only(db, issued):
+    issued("111111")
+    key = issued("222222")
+    store = OTPStore(db)
+    assert store.verify(*key, "111111", max_attempts=3).result == INVALID
+    assert store.verify(*key, "222222", max_attempts=3).result == VERIFIED
+    assert store.verify(*key, "222222", max_attempts=3).result == NOT_FOUND
+    assert len(db.exec(select(OTPVerification)).all()) == 1
+
+
+def test_expired_codes_are_rejected_and_purged(db, issued):
+    key = issued("123456", expires_in=timedelta(minutes=-1))
+    store = OTPStore(db)
+    assert store.verify(*key, "123456", max_attempts=3).result == EXPIRED
+    assert store.purge_expired(batch_size=1) == 1
+    assert db.exec(select(OTPVerification)).all() == []
+
+
+def test_sent_and_dead_otp_emails_are_redacted(db, monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 1)
+    outbox = EmailOutboxService(db)
+    content = EmailContent("Your code", "<b>123456</b>", "123456")
+    outbox.enqueue("sent@acme.com", content, priority=PRIORITY_OTP, commit=False)
+    outbox.enqueue("dead@acme.com", content, priority=PRIORITY_OTP, commit=False)
+    outbox.enqueue("other@acme.com", content, commit=False)
+    db.commit()
+
+    rows = {row.to_email: row for row in outbox.claim(10)}
+    outbox.mark_sent(rows["sent@acme.com"].id, "smtp")
+    assert outbox.mark_failed(rows["dead@acme.com"], "bounced") == DEAD
+    outbox.mark_sent(rows["other@acme.com"].id, "smtp")
+
+    bodies = {e.to_email: (e.html_content, e.text_content) for e in db.exec(select(EmailOutbox)).all()}
+    assert bodies["sent@acme.com"] == (REDACTED, "")
+    assert bodies["dead@acme.com"] == (REDACTED, "")
+    assert bodies["other@acme.com"] == ("<b>123456</b>", "123456")
+    # A redacted OTP email is not worth requeueing
+    assert outbox.retry_dead() == 0
+
+
+def test_otp_emails_are_purged_once_the_code_expires(db):
+    outbox = EmailOutboxService(db)
+    content = EmailContent("Your code", "<b>123456</b>", "123456")
+    outbox.enqueue("otp@acme.com", content, priority=PRIORITY_OTP, commit=False)
+    outbox.enqueue("other@acme.com", content, commit=False)
+    db.commit()
+
+    assert outbox.purge_otp() == 0
+    later = datetime.utcnow() + timedelta(minutes=settings.OTP_EXPIRY_MINUTES + 1)
+    assert outbox.purge_otp(now=later) == 1
+    assert [(e.to_email, e.status) for e in db.exec(select(EmailOutbox)).all()] == [("other@acme.com", PENDING)]
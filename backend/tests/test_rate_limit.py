@@ -0,0 +1,164 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.core.rate_limit import (
+    SLIDING_WINDOW,
+    TOKEN_BUCKET,
+    LocalBackend,
+    Rate,
+    RateLimiter,
+    SharedBackend,
+    sliding_window,
+    token_bucket,
+)
+from app.dependencies import rate_limit as rate_limit_dependency
+from app.dependencies.rate_limit import BY_EMAIL, BY_EMAIL_AND_IP, client_ip, limit, rate_limit
+
+
+def test_rate_parse():
+    assert Rate.parse("5/600") == Rate(5, 600.0)
+
+
+def test_token_bucket_allows_burst_then_refills():
+    rate = Rate(3, 30)
+    state = []
+    for _ in range(3):
+        allowed, _, state = token_bucket(state, rate, 100.0)
+        assert allowed
+    allowed, retry_after, state = token_bucket(state, rate, 100.0)
+    assert not allowed
+    assert retry_after == pytest.approx(10.0)
+    allowed, _, state = token_bucket(state, rate, 110.0)
+    assert allowed
+
+
+def test_sliding_window_counts_hits_within_period():
+    rate = Rate(2, 60)
+    state = []
+    for now in (0.0, 10.0):
+        allowed, _, state = sliding_window(state, rate, now)
+        assert allowed
+    allowed, retry_after, state = sliding_window(state, rate, 30.0)
+    assert not allowed
+    # The first hit leaves the window at 60
+    assert retry_after == pytest.approx(30.0)
+    allowed, _, state = sliding_window(state, rate, 60.5)
+    assert allowed
+    assert state == [10.0, 60.5]
+
+
+def test_local_backend_drops_least_recently_used_keys():
+    backend = LocalBackend(max_keys=2)
+    rate = Rate(1, 60)
+    backend.hit("a", sliding_window, rate, 0.0)
+    backend.hit("b", sliding_window, rate, 0.0)
+    backend.hit("c", sliding_window, rate, 0.0)
+    # "a" was evicted, so it starts over
+    assert backend.hit("a", sliding_window, rate, 1.0) == (True, 0.0)
+    assert backend.hit("c", sliding_window, rate, 1.0)[0] is False
+
+
+def test_shared_backend_keeps_state_across_mappings(tmp_path):
+    path = str(tmp_path / "ratelimit")
+    rate = Rate(2, 60)
+    first = SharedBackend(path, slots=64)
+    second = SharedBackend(path, slots=64)
+    assert first.hit("otp:email:a@x.com", sliding_window, rate, 0.0)[0]
+    assert second.hit("otp:email:a@x.com", sliding_window, rate, 1.0)[0]
+    allowed, retry_after = first.hit("otp:email:a@x.com", sliding_window, rate, 2.0)
+    assert not allowed
+    assert retry_after == pytest.approx(58.0)
+    assert second.hit("otp:email:b@x.com", sliding_window, rate, 2.0)[0]
+
+
+def test_rate_limiter_counts_rejections():
+    limiter = RateLimiter(LocalBackend(max_keys=10))
+    rate = Rate(1, 60)
+    assert limiter.hit("k", TOKEN_BUCKET, rate) == 0.0
+    assert limiter.hit("k", TOKEN_BUCKET, rate) > 0
+    assert limiter.rejected == 1
+
+
+def _request(body: dict, host: str, forwarded_for: str = None) -> Request:
+    payload = json.dumps(body).encode()
+
+    async def receive():
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/",
+        "headers": [(b"content-type", b"application/json")] + (
+            [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+        ),
+        "client": (host, 1234),
+    }
+    return Request(scope, receive)
+
+
+def _call(check, body: dict, host: str) -> bool:
+    try:
+        asyncio.run(check(_request(body, host)))
+    except HTTPException as e:
+        assert e.status_code == 429
+        assert "Retry-After" in e.headers
+        return False
+    return True
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    fresh = RateLimiter(LocalBackend(max_keys=100))
+    monkeypatch.setattr(rate_limit_dependency, "rate_limiter", fresh)
+    return fresh
+
+
+def test_login_limit_is_per_email_and_address(limiter):
+    check = rate_limit("login", limit(BY_EMAIL_AND_IP, SLIDING_WINDOW, "2/900"))
+    body = {"email": "Victim@Example.com", "password": "guess"}
+    assert _call(check, body, "10.0.0.1")
+    assert _call(check, body, "10.0.0.1")
+    assert not _call(check, body, "10.0.0.1")
+    # Another client can still sign in to the same account
+    assert _call(check, body, "10.0.0.2")
+
+
+def test_otp_send_limit_stays_per_email(limiter):
+    check = rate_limit("send_otp", limit(BY_EMAIL, SLIDING_WINDOW, "1/60"))
+    assert _call(check, {"email": "a@example.com"}, "10.0.0.1")
+    assert not _call(check, {"email": "A@example.com "}, "10.0.0.2")
+
+
+def test_requests_without_a_key_are_not_limited(limiter):
+    check = rate_limit("login", limit(BY_EMAIL_AND_IP, SLIDING_WINDOW, "1/900"))
+    for _ in range(3):
+        assert _call(check, {"password": "x"}, "10.0.0.1")
+
+
+def test_client_ip_comes_from_the_proxy_header_only_behind_a_trusted_proxy(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUSTED_PROXIES", "10.0.0.0/8")
+    # Behind the proxy: the address it appended, not one the client made up
+    assert client_ip(_request({}, "10.1.2.3", "1.1.1.1, 203.0.113.7")) == "203.0.113.7"
+    assert client_ip(_request({}, "10.1.2.3", "203.0.113.7, 10.9.9.9")) == "203.0.113.7"
+    assert client_ip(_request({}, "10.1.2.3")) == "10.1.2.3"
+    # A direct client cannot spoof the header
+    assert client_ip(_request({}, "198.51.100.1", "203.0.113.7")) == "198.51.100.1"
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUSTED_PROXIES", "")
+    assert client_ip(_request({}, "10.1.2.3", "203.0.113.7")) == "10.1.2.3"
+
+
+def test_clients_behind_one_proxy_get_their_own_buckets(limiter, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUSTED_PROXIES", "10.0.0.0/8")
+    check = rate_limit("login", limit(BY_EMAIL_AND_IP, SLIDING_WINDOW, "1/900"))
+    body = {"email": "a@example.com"}
+    assert asyncio.run(check(_request(body, "10.0.0.1", "203.0.113.7"))) is None
+    assert asyncio.run(check(_request(body, "10.0.0.1", "203.0.113.8"))) is None
+    with pytest.raises(HTTPException):
+        asyncio.run(check(_request(body, "10.0.0.1", "203.0.113.7")))
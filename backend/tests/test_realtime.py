@@ -0,0 +1,119 @@
+import asyncio
+import os
+import socket
+import threading
+import time
+
+from app.core import realtime
+from app.core.realtime import ConnectionManager, Subscription, UnixSocketBroker
+
+
+def test_drop_oldest_keeps_newest_and_flags_resync():
+    async def run():
+        subscription = Subscription(1, maxsize=2)
+        for i in range(3):
+            assert subscription.offer({"n": i})
+        assert subscription.overflowed and subscription.dropped == 1
+        return [subscription.queue.get_nowait() for _ in range(2)]
+
+    assert asyncio.run(run()) == [{"n": 1}, {"n": 2}]
+
+
+def test_slow_consumer_is_evicted_under_disconnect_policy():
+    async def run():
+        manager = ConnectionManager()
+        subscription = manager.subscribe(1, maxsize=1, policy=realtime.DISCONNECT)
+        manager.deliver({"user_id": 1, "n": 1})
+        manager.deliver({"user_id": 1, "n": 2})
+        return manager, subscription
+
+    manager, subscription = asyncio.run(run())
+    assert subscription.closed
+    assert manager.counters["evicted_slow"] == 1
+    assert manager.stats()["connections"] == 0
+
+
+def test_connection_limit_closes_the_oldest():
+    async def run():
+        manager = ConnectionManager(max_per_user=2)
+        subs = [manager.subscribe(1, maxsize=5) for _ in range(3)]
+        return manager, subs
+
+    manager, subs = asyncio.run(run())
+    assert [sub.closed for sub in subs] == [True, False, False]
+    assert manager.counters["evicted_limit"] == 1
+
+
+def test_unix_publish_from_the_event_loop_does_not_wait_for_a_full_socket(tmp_path):
+    # A worker socket whose receive buffer is full and never drained
+    path = os.path.join(tmp_path, "worker-1.sock")
+    stuck = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    stuck.bind(path)
+    filler = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    filler.setblocking(False)
+    try:
+        while True:
+            filler.sendto(b"x" * 4096, path)
+    except BlockingIOError:
+        pass
+
+    broker = UnixSocketBroker(str(tmp_path))
+    sent = threading.Event()
+    original_send = broker._send
+
+    def send(messages):
+        original_send(messages)
+        sent.set()
+
+    broker._send = send
+
+    async def publish():
+        started = time.monotonic()
+        broker.publish([{"user_id": 1, "type": "notification", "data": {}}])
+        return time.monotonic() - started
+
+    try:
+        assert asyncio.run(publish()) < 0.1
+        # The blocking send still happens, off the loop, and gives up after its timeout
+        assert sent.wait(realtime.PUBLISH_TIMEOUT_SECONDS + 2)
+    finally:
+        filler.close()
+        stuck.close()
+
+
+class SilentClient:
+    """A WebSocket peer that never sends a frame until it disconnects."""
+
+    def __init__(self):
+        self.sent = []
+        self.closed = False
+        self.gone = asyncio.Event()
+
+    async def receive(self):
+        await self.gone.wait()
+        return {"type": "websocket.disconnect", "code": 1000}
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+    async def close(self, code: int = 1000):
+        self.closed = True
+
+
+def test_silent_clients_stay_connected_until_they_disconnect(monkeypatch):
+    monkeypatch.setattr(realtime.settings, "WS_PING_INTERVAL_SECONDS", 0.05)
+
+    async def run():
+        client = SilentClient()
+        task = asyncio.create_task(realtime.serve_websocket(client, user_id=42))
+        await asyncio.sleep(0.3)
+        still_open = not client.closed and not task.done()
+        client.gone.set()
+        await asyncio.wait_for(task, 1)
+        return client, still_open
+
+    client, still_open = asyncio.run(run())
+    assert still_open
+    assert {"type": "ping"} in client.sent
+    assert client.closed
+    assert 42 not in realtime.connections.subscriptions
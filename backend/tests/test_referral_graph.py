@@ -0,0 +1,84 @@
+from sqlmodel import select
+
+from app.models.referral_request import ReferralRequest
+from app.models.trust import FraudAlert
+from app.models.user import Employee, Job, JobSeeker, Referral
+from app.services.referral_graph_service import CollusionDetectionService, ReferralGraph
+from tests.conftest import make_user
+
+
+def graph_of(requests=(), referrals=()) -> ReferralGraph:
+    """requests are (seeker, employee) pairs, referrals (employee, seeker)."""
+    graph = ReferralGraph()
+    for seeker, employee in requests:
+        graph.add_edge(seeker, employee, employee=employee)
+    for employee, seeker in referrals:
+        graph.add_edge(employee, seeker, employee=employee)
+    graph.build_csr()
+    return graph
+
+
+def test_components_and_csr():
+    graph = graph_of(requests=[(1, 100), (2, 100), (3, 200)])
+    roots = graph.components()
+    assert roots[graph.index[1]] == roots[graph.index[2]] == roots[graph.index[100]]
+    assert roots[graph.index[3]] != roots[graph.index[1]]
+    assert graph.neighbor_set(graph.index[100]) == {graph.index[1], graph.index[2]}
+
+
+def test_one_employee_with_several_seekers_is_not_a_ring(db):
+    graph = graph_of(
+        requests=[(1, 100), (1, 100), (2, 100), (3, 100)],
+        referrals=[(100, 1), (100, 2), (100, 3)],
+    )
+    service = CollusionDetectionService(db)
+    assert service.find_rings(graph) == []
+
+    stats = service._component_stats(graph, list(range(graph.node_count)), list(zip(graph.src, graph.dst)))
+    assert stats["employees"] == 1
+    assert stats["bipartite_density"] == 0
+    assert stats["score"] < service.min_score
+
+
+def test_answered_requests_are_not_evidence(db):
+    # Two employees each referring the seekers who asked them: a normal, sparse component
+    graph = graph_of(
+        requests=[(1, 100), (2, 100), (3, 200), (2, 200)],
+        referrals=[(100, 1), (100, 2), (200, 3), (200, 2)],
+    )
+    assert CollusionDetectionService(db).find_rings(graph) == []
+
+
+def test_densely_cross_linked_employees_and_seekers_are_a_ring(db):
+    employees, seekers = (100, 101, 102), (1, 2, 3)
+    graph = graph_of(
+        requests=[(s, e) for s in seekers for e in employees],
+        referrals=[(e, s) for e in employees for s in seekers],
+    )
+    rings = CollusionDetectionService(db).find_rings(graph)
+    assert len(rings) == 1
+    ring = rings[0]
+    assert sorted(ring["user_ids"]) == [1, 2, 3, 100, 101, 102]
+    assert (ring["employees"], ring["seekers"], ring["min_degree"]) == (3, 3, 3)
+    assert ring["score"] >= 60
+
+
+def test_run_does_not_flag_a_popular_employee(db):
+    employee = make_user(db, "hub@acme.com", role="employee")
+    profile = db.exec(select(Employee).where(Employee.user_id == employee.id)).one()
+    job = Job(title="Engineer", description="d", location="Remote", employment_type="full-time",
+              company_id=profile.company_id, employee_id=profile.id)
+    db.add(job)
+    db.commit()
+    for i in range(3):
+        seeker = make_user(db, f"seeker{i}@mail.com")
+        for _ in range(2 if i == 0 else 1):
+            db.add(ReferralRequest(job_id=job.id, employee_id=employee.id, jobseeker_id=seeker.id,
+                                   jobseeker_name="S", jobseeker_email=seeker.email))
+        seeker_profile = db.exec(select(JobSeeker).where(JobSeeker.user_id == seeker.id)).one()
+        db.add(Referral(job_id=job.id, seeker_id=seeker_profile.id, employee_id=profile.id))
+    db.commit()
+
+    stats = CollusionDetectionService(db).run()
+    assert (stats["nodes"], stats["rings"], stats["alerts"]) == (4, 0, 0)
+    assert db.exec(select(FraudAlert)).all() == []
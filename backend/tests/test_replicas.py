@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from app.core.config import settings
+from app.db.replicas import ON_REPLICA, Replica, read_only, replica_router
+from app.db.session import async_engine
+from app.models.user import Employee, Job
+from tests.conftest import make_user, token_for
+
+
+class Reads:
+    def __init__(self, db: AsyncSession, error: Exception = None):
+        self.db = db
+        self.error = error
+        self.sessions = []
+
+    @read_only
+    async def outer(self):
+        self.sessions.append(self.db)
+        await self.inner()
+        if self.db.info.get(ON_REPLICA) and self.error is not None:
+            raise self.error
+        return "on replica" if self.db.info.get(ON_REPLICA) else "on primary"
+
+    @read_only
+    async def inner(self):
+        self.sessions.append(self.db)
+
+
+@pytest.fixture
+def replica(db, monkeypatch):
+    """The test database again, standing in as a healthy replica."""
+    standby = Replica(settings.DATABASE_URL)
+    standby.healthy = True
+    monkeypatch.setattr(replica_router, "replicas", [standby])
+    monkeypatch.setattr(replica_router, "primary_reads", 0)
+    yield standby
+
+
+def _run(reads: Reads, replica: Replica) -> str:
+    async def go():
+        async with AsyncSession(async_engine) as primary:
+            reads.db = primary
+            try:
+                return await reads.outer()
+            finally:
+                await replica.engine.dispose()
+                await async_engine.dispose()
+
+    return asyncio.run(go())
+
+
+def _lost_connection() -> OperationalError:
+    error = OperationalError("SELECT 1", {}, Exception("server closed the connection unexpectedly"))
+    error.connection_invalidated = True
+    return error
+
+
+def test_nested_reads_share_one_replica_session(replica):
+    reads = Reads(None)
+    assert _run(reads, replica) == "on replica"
+    assert reads.sessions[0] is reads.sessions[1]
+    assert replica.reads == 1
+    assert replica_router.primary_reads == 0
+
+
+@pytest.mark.parametrize("error", [
+    _lost_connection(),
+    InterfaceError("SELECT 1", {}, Exception("connection is closed")),
+    ConnectionRefusedError("connection refused"),
+])
+def test_connection_failures_mark_the_replica_down(replica, error):
+    assert _run(Reads(None, error), replica) == "on primary"
+    assert not replica.healthy
+    # The retried call and the one nested in it
+    assert replica_router.primary_reads == 2
+
+
+def test_a_failing_statement_retries_on_primary_without_marking_down(replica):
+    error = OperationalError("SELECT 1", {}, Exception("canceling statement due to conflict with recovery"))
+    assert _run(Reads(None, error), replica) == "on primary"
+    assert replica.healthy
+    assert replica.last_error is None
+    assert replica_router.primary_reads == 1
+
+
+def test_job_listing_uses_one_replica_session(db, client, replica):
+    user = make_user(db, "poster@acme.com", role="employee")
+    employee = db.exec(select(Employee).where(Employee.user_id == user.id)).one()
+    for n in range(3):
+        db.add(Job(
+            title=f"Engineer {n}",
+            description="Build things",
+            location="Remote",
+            employment_type="full_time",
+            company_id=employee.company_id,
+            employee_id=employee.id,
+        ))
+    db.commit()
+
+    response = client.get("/api/v1/jobs/", token=token_for(user))
+    client.loop.run_until_complete(replica.engine.dispose())
+    assert response.status_code == 200
+    assert response.json()["total"] == 3
+    assert len(response.json()["jobs"]) == 3
+    assert replica.reads == 1
@@ -0,0 +1,88 @@
+import time
+from datetime import datetime, timedelta
+
+from app.core.bloom import BloomFilter
+from app.models.auth import RevokedToken
+from app.security.jwt import create_refresh_token, decode_token
+from app.security.revocation import TokenRevocations, token_revocations
+from tests.conftest import make_user, token_for
+
+
+def _revocations() -> TokenRevocations:
+    return TokenRevocations(capacity=1000, error_rate=0.01, cache_size=100, cache_ttl=60)
+
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter.from_keys((f"jti:{i}" for i in range(1000)), capacity=1000, error_rate=0.01)
+    assert all(f"jti:{i}" in bloom for i in range(1000))
+    false_positives = sum(f"other:{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+    assert bloom.count == 1000
+
+
+def test_bloom_filter_is_sized_from_capacity_and_error_rate():
+    small, tight = BloomFilter(1000, 0.01), BloomFilter(1000, 0.0001)
+    assert tight.bits > small.bits
+    assert tight.hashes > small.hashes
+    assert BloomFilter(0, 0.01).bits == 64
+
+
+def test_filter_miss_is_decided_without_a_lookup(db):
+    revocations = _revocations()
+    # Before the first rebuild every token needs the table
+    assert revocations.check(1, "abc", 100) is None
+    assert revocations.refresh() == 0
+    assert revocations.check(1, "abc", 100) is False
+    assert revocations.lookups == 0
+
+
+def test_revoke_takes_effect_at_once_and_survives_a_rebuild(db):
+    revocations = _revocations()
+    revocations.refresh()
+    claims = {"jti": "abc", "exp": int(time.time()) + 600}
+    revocations.revoke(db, 7, claims)
+    assert revocations.check(7, "abc", 100) is True
+    # Revoking twice is harmless
+    revocations.revoke(db, 7, claims)
+
+    assert revocations.refresh() == 1
+    assert revocations.check(7, "abc", 100) is None
+    assert revocations.is_revoked(7, "abc", 100)
+    assert revocations.lookups == 1
+    assert revocations.check(7, "abc", 100) is True
+
+
+def test_revoke_all_cuts_off_tokens_issued_before_it(db):
+    revocations = _revocations()
+    revocations.refresh()
+    revocations.revoke_all(db, 7)
+    now = int(time.time())
+    assert revocations.check(7, "old", now - 10) is True
+    assert revocations.check(7, "new", now + 10) is False
+    assert revocations.check(8, "other", now - 10) is False
+
+    revocations.refresh()
+    assert revocations.is_revoked(7, "old", now - 10)
+    assert not revocations.is_revoked(7, "new", now + 10)
+
+
+def test_purge_expired_keeps_live_rows(db):
+    now = datetime.utcnow()
+    db.add(RevokedToken(jti="gone", user_id=1, expires_at=now - timedelta(minutes=1)))
+    db.add(RevokedToken(jti="live", user_id=1, expires_at=now + timedelta(minutes=1)))
+    db.commit()
+    assert _revocations().purge_expired(db) == 1
+    assert _revocations().refresh() == 1
+
+
+def test_logout_revokes_access_and_refresh_tokens(db, client):
+    user = make_user(db, "out@mail.com")
+    token_revocations.refresh()
+    access, refresh = token_for(user), create_refresh_token(str(user.id))
+    assert client.get("/api/v1/auth/me", token=access).status_code == 200
+
+    response = client.post("/api/v1/auth/logout", token=access, json={"refresh_token": refresh})
+    assert response.status_code == 204
+    assert client.get("/api/v1/auth/me", token=access).status_code == 401
+    assert client.post("/api/v1/auth/refresh", json={"refresh_token": refresh}).status_code == 401
+    assert token_revocations.is_revoked(user.id, decode_token(refresh)["jti"], 0)
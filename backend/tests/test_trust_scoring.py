@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+from sqlmodel import select
+
+from app.models.trust import FraudAlert, TrustScore, TrustScoreHistory
+from app.schemas.trust import TrustHistoryPoint, TrustScoreLevel
+from app.services.trust_recompute_service import TrustRecomputeService
+from app.services.trust_service import (
+    account_age_score,
+    build_trust_factors,
+    resample_history,
+    success_rate_score,
+    trend_for,
+    trust_level_for,
+)
+from tests.conftest import make_user
+
+
+def test_rule_thresholds():
+    assert [account_age_score(d) for d in (0, 30, 90, 180, 365)] == [0, 5, 10, 15, 20]
+    assert [success_rate_score(r) for r in (0, 10, 25, 50)] == [5, 10, 15, 25]
+    assert trust_level_for(30) == TrustScoreLevel.low
+    assert trust_level_for(31) == TrustScoreLevel.medium
+    assert trust_level_for(71) == TrustScoreLevel.high
+    assert trend_for(60, None) == "stable"
+    assert trend_for(66, 60) == "up"
+    assert trend_for(54, 60) == "down"
+    assert trend_for(65, 60) == "stable"
+
+
+def test_build_trust_factors_is_bounded():
+    best, _ = build_trust_factors(400, True, 15, True, 10, 10, 10, 0)
+    assert best == 100
+
+    worst, factors = build_trust_factors(0, False, 0, False, 0, 0, 0, 9)
+    assert worst == 0
+    assert factors[-1] == {"factor": "fraud_alerts", "value": 9, "score": -90, "max_score": 0}
+
+
+def test_success_rate_only_counts_for_employees_with_referrals():
+    score, factors = build_trust_factors(0, False, 0, True, 0, 0, 0, 0)
+    assert score == 50
+    assert "referral_success_rate" not in {f["factor"] for f in factors}
+
+    score, _ = build_trust_factors(0, False, 0, False, 4, 4, 0, 0)
+    assert score == 50
+
+
+def test_resample_history_keeps_last_score_and_sums_changes():
+    monday = datetime(2026, 10, 12, 9)
+    points = [
+        TrustHistoryPoint(timestamp=monday, score=50, score_change=50),
+        TrustHistoryPoint(timestamp=monday + timedelta(hours=3), score=55, score_change=5),
+        TrustHistoryPoint(timestamp=monday + timedelta(days=2), score=52, score_change=-3),
+    ]
+    daily = resample_history(points, "daily")
+    assert [(p.score, p.score_change) for p in daily] == [(55, 55), (52, -3)]
+
+    weekly = resample_history(points, "weekly")
+    assert len(weekly) == 1
+    assert weekly[0].timestamp == datetime(2026, 10, 12)
+    assert (weekly[0].score, weekly[0].score_change) == (52, 52)
+
+
+def test_bulk_recompute_applies_the_shared_rules(db):
+    old = make_user(db, "old@acme.com", role="employee", created_at=datetime.utcnow() - timedelta(days=400))
+    new = make_user(db, "new@mail.com", is_email_verified=False)
+    db.add(FraudAlert(user_id=new.id, activity_type="spam_behavior", risk_level="low",
+                      description="test", evidence={}, status="open"))
+    db.commit()
+
+    stats = TrustRecomputeService(db, batch_size=1).recompute_all()
+    assert stats == {"users": 2, "inserted": 2, "updated": 0, "changed": 2}
+
+    scores = {s.user_id: s for s in db.exec(select(TrustScore)).all()}
+    # Employee with a company: age 20, email 10, profile 5
+    assert scores[old.id].score == 85
+    assert scores[old.id].level == "high"
+    # Unverified seeker with one open alert
+    assert scores[new.id].score == 40
+
+    # Unchanged scores are updated in place without new history
+    stats = TrustRecomputeService(db).recompute_all()
+    assert stats == {"users": 2, "inserted": 0, "updated": 2, "changed": 0}
+    assert len(db.exec(select(TrustScoreHistory)).all()) == 2